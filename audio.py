@@ -0,0 +1,520 @@
+"""Recorded audio and the encoded versions of it that get uploaded to providers.
+
+Encoding pipes PCM through ffmpeg (the same binary pydub would use). Formats:
+- wav: the raw 16-bit PCM recording, ~48 KB per second at 24 kHz
+- flac: lossless, roughly half the size
+- opus: Ogg/Opus at 32 kbps, ~4 KB per second, tuned for speech
+- mp3: 48 kbps, for providers that don't take Opus
+"""
+
+import functools
+import hashlib
+import io
+import mmap
+import os
+import queue
+import shutil
+import subprocess
+import struct
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+
+import numpy as np
+
+UploadFormat = Literal["wav", "flac", "opus", "mp3"]
+
+MIME_TYPES: dict[UploadFormat, str] = {
+    "wav": "audio/wav",
+    "flac": "audio/flac",
+    "opus": "audio/ogg",
+    "mp3": "audio/mpeg",
+}
+FILE_EXTENSIONS: dict[UploadFormat, str] = {
+    "wav": "wav",
+    "flac": "flac",
+    "opus": "ogg",
+    "mp3": "mp3",
+}
+_FFMPEG_OUTPUT_ARGS: dict[UploadFormat, list[str]] = {
+    "wav": ["-f", "s16le"],
+    "flac": ["-c:a", "flac", "-f", "flac"],
+    "opus": ["-c:a", "libopus", "-b:a", "32k", "-application", "voip", "-f", "ogg"],
+    "mp3": ["-c:a", "libmp3lame", "-b:a", "48k", "-f", "mp3"],
+}
+
+
+WAV_HEADER_SIZE = 44
+# data chunk size for a WAV whose length isn't known yet (e.g. while streaming)
+WAV_UNKNOWN_SIZE = 0xFFFFFFFF
+
+
+def wav_header(n_frames: int | None, sample_rate: int, sample_width: int = 2) -> bytes:
+    """A 44-byte mono PCM WAV header. n_frames=None writes the streaming placeholder."""
+    if n_frames is None:
+        data_size = riff_size = WAV_UNKNOWN_SIZE
+    else:
+        data_size = n_frames * sample_width
+        riff_size = 36 + data_size
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        riff_size,
+        b"WAVE",
+        b"fmt ",
+        16,  # fmt chunk size
+        1,  # PCM
+        1,  # Mono
+        sample_rate,
+        sample_rate * sample_width,  # Byte rate
+        sample_width,  # Block align
+        sample_width * 8,
+        b"data",
+        data_size,
+    )
+
+
+def parse_wav_header(wav: memoryview) -> tuple[int, int, int]:
+    """Return (sample_rate, data_offset, data_size) without copying the samples."""
+    if bytes(wav[:4]) != b"RIFF" or bytes(wav[8:12]) != b"WAVE":
+        raise ValueError("Not a WAV file")
+    sample_rate = None
+    offset = 12
+    while offset + 8 <= len(wav):
+        chunk_id, chunk_size = struct.unpack_from("<4sI", wav, offset)
+        offset += 8
+        if chunk_id == b"fmt ":
+            sample_rate = struct.unpack_from("<I", wav, offset + 4)[0]
+        elif chunk_id == b"data":
+            if sample_rate is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            return sample_rate, offset, min(chunk_size, len(wav) - offset)
+        offset += chunk_size + (chunk_size & 1)
+    raise ValueError("WAV has no data chunk")
+
+
+def wav_from_frames(frames: list[np.ndarray], sample_rate: int) -> memoryview:
+    """Write int16 frames straight into one WAV buffer (one copy, no concat + tobytes)."""
+    n_frames = sum(len(x) for x in frames)
+    buffer = bytearray(WAV_HEADER_SIZE + n_frames * 2)
+    buffer[:WAV_HEADER_SIZE] = wav_header(n_frames, sample_rate)
+    if frames:
+        samples = np.frombuffer(buffer, np.int16, offset=WAV_HEADER_SIZE)
+        np.concatenate(frames, axis=0, out=samples.reshape(n_frames, -1))
+    return memoryview(buffer)
+
+
+class CaptureBuffer:
+    """A recording in one preallocated int16 buffer, with its WAV header in front.
+
+    `write()` runs in the audio callback and only copies the block into spare
+    capacity. Once the buffer is half full, a helper thread allocates one twice the
+    size and copies what's been recorded, so the callback never waits on a big copy.
+    `finish()` patches the header's lengths and returns a view of the WAV: O(1).
+    Start a new CaptureBuffer per recording; the finished one is the Audio's buffer.
+    """
+
+    def __init__(self, sample_rate: int, initial_s: float = 60):
+        self.sample_rate = sample_rate
+        self.n_samples = 0
+        self.grows = 0
+        self._lock = threading.Lock()
+        self._growing = False
+        self._buffer = self._allocate(int(initial_s * sample_rate))
+        self._buffer[:WAV_HEADER_SIZE] = np.frombuffer(
+            wav_header(None, sample_rate), np.uint8
+        )
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        # Not zero-filled, so pages are only committed as the recording reaches them
+        return np.empty(WAV_HEADER_SIZE + 2 * capacity, np.uint8)
+
+    @staticmethod
+    def _samples(buffer: np.ndarray) -> np.ndarray:
+        return buffer[WAV_HEADER_SIZE:].view(np.int16)
+
+    @property
+    def capacity(self) -> int:
+        return (len(self._buffer) - WAV_HEADER_SIZE) // 2
+
+    @property
+    def duration_s(self) -> float:
+        return self.n_samples / self.sample_rate
+
+    def write(self, block) -> np.ndarray:
+        """Append a block of int16 samples. Returns a view of them in the buffer."""
+        block = np.asarray(block, np.int16).reshape(-1)
+        with self._lock:
+            start, end = self.n_samples, self.n_samples + len(block)
+            if end > self.capacity:
+                self._resize(2 * end)  # Only if the helper thread fell behind
+            samples = self._samples(self._buffer)
+            samples[start:end] = block
+            self.n_samples = end
+            grow = not self._growing and 2 * end > self.capacity
+            self._growing |= grow
+        if grow:
+            threading.Thread(target=self._grow, daemon=True).start()
+        return samples[start:end]
+
+    def _resize(self, capacity: int) -> None:
+        """Swap in a bigger buffer right now. Call with the lock held."""
+        used = WAV_HEADER_SIZE + 2 * self.n_samples
+        buffer = self._allocate(capacity)
+        buffer[:used] = self._buffer[:used]
+        self._buffer = buffer
+        self.grows += 1
+
+    def _grow(self) -> None:
+        with self._lock:
+            old = self._buffer
+            copied = WAV_HEADER_SIZE + 2 * self.n_samples
+        # Samples already written never change, so copy them without the lock
+        buffer = self._allocate(2 * ((len(old) - WAV_HEADER_SIZE) // 2))
+        buffer[:copied] = old[:copied]
+        with self._lock:
+            if self._buffer is old:  # Unless write() had to resize meanwhile
+                used = WAV_HEADER_SIZE + 2 * self.n_samples
+                buffer[copied:used] = old[copied:used]
+                self._buffer = buffer
+                self.grows += 1
+            self._growing = False
+
+    def finish(self) -> memoryview:
+        """The recording as a WAV, with its real length in the header."""
+        with self._lock:
+            buffer, n_samples = self._buffer, self.n_samples
+        buffer[:WAV_HEADER_SIZE] = np.frombuffer(
+            wav_header(n_samples, self.sample_rate), np.uint8
+        )
+        return memoryview(buffer[: WAV_HEADER_SIZE + 2 * n_samples])
+
+
+class MappedCaptureBuffer(CaptureBuffer):
+    """A CaptureBuffer backed by a memory-mapped WAV file, for meeting-length recordings.
+
+    Growing extends the file and maps it again, copying nothing. Every few seconds
+    the audio written so far is dropped from this process's memory, so resident
+    memory stays at a few MB however long the recording gets. The finished Audio
+    reads the same mapping, and `save_wav()` moves the file rather than writing it
+    again.
+    """
+
+    RELEASE_EVERY_S = 5
+
+    def __init__(self, path: Path, sample_rate: int, initial_s: float = 600):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "w+b")
+        self._mmap: mmap.mmap | None = None
+        self._released = 0  # File offset up to which pages have been dropped
+        self._releasing = False
+        super().__init__(sample_rate, initial_s)
+
+    def _allocate(self, capacity: int) -> np.ndarray:
+        size = WAV_HEADER_SIZE + 2 * capacity
+        self._file.truncate(size)  # Sparse: disk blocks are only used once written
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        return np.frombuffer(self._mmap, np.uint8)
+
+    def _resize(self, capacity: int) -> None:
+        # Same file, so the new mapping already holds everything recorded
+        self._buffer = self._allocate(capacity)
+        self.grows += 1
+
+    def _grow(self) -> None:
+        with self._lock:
+            self._resize(2 * self.capacity)
+            self._growing = False
+
+    def write(self, block) -> np.ndarray:
+        samples = super().write(block)
+        unreleased = WAV_HEADER_SIZE + 2 * self.n_samples - self._released
+        if (
+            not self._releasing
+            and unreleased > 2 * self.RELEASE_EVERY_S * self.sample_rate
+        ):
+            self._releasing = True
+            threading.Thread(target=self._release, daemon=True).start()
+        return samples
+
+    def _release(self) -> None:
+        """Drop recorded pages from this process. The OS writes them back to the file.
+
+        No flush here: msync holds the GIL, which would stall the audio callback.
+        """
+        with self._lock:
+            mapping = self._mmap
+            written = WAV_HEADER_SIZE + 2 * self.n_samples
+        end = written - written % mmap.ALLOCATIONGRANULARITY
+        if end > self._released:
+            if hasattr(mapping, "madvise"):  # Not on Windows, which trims by itself
+                mapping.madvise(
+                    mmap.MADV_DONTNEED, self._released, end - self._released
+                )
+            self._released = end
+        self._releasing = False
+
+    def finish(self) -> memoryview:
+        # No flush: readers share the OS's cached pages, which it writes back itself
+        wav = super().finish()
+        try:
+            # The mapping stays bigger, but nothing reads past the end of the WAV
+            self._file.truncate(len(wav))
+        except OSError:
+            pass  # Windows won't shrink a mapped file; the header has the length
+        self._file.close()
+        return wav
+
+
+def block_started_at(time_info, now: float) -> float:
+    """When the first sample of a sounddevice callback's block was captured, on the
+    time.perf_counter() clock. *now* is perf_counter() at the start of the callback.
+    """
+    adc_time = getattr(time_info, "inputBufferAdcTime", 0.0)
+    current_time = getattr(time_info, "currentTime", 0.0)
+    if adc_time and current_time:  # Some host APIs leave these at 0
+        return now - max(0.0, current_time - adc_time)
+    return now
+
+
+class PrerollRing:
+    """The last `seconds` of an always-open input stream, kept while not recording.
+
+    A recording can then start from the hotkey press rather than from whenever
+    start() got round to it. `write()` runs in the audio callback and copies the
+    block into a fixed int16 ring: no allocation while idle.
+    """
+
+    def __init__(self, sample_rate: int, seconds: float = 0.5):
+        self.sample_rate = sample_rate
+        self._ring = np.zeros(max(1, int(seconds * sample_rate)), np.int16)
+        self._written = 0
+        # perf_counter() time just after the last sample written
+        self._end_at = 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return self._ring.nbytes
+
+    def write(self, block, started_at: float) -> None:
+        samples = np.frombuffer(block, np.int16)
+        size = len(self._ring)
+        if len(samples) > size:
+            self._written += len(samples) - size
+            samples = samples[-size:]
+        position = self._written % size
+        first = min(len(samples), size - position)
+        self._ring[position : position + first] = samples[:first]
+        self._ring[: len(samples) - first] = samples[first:]
+        self._written += len(samples)
+        self._end_at = started_at + len(samples) / self.sample_rate
+
+    def since(self, started_at: float) -> np.ndarray:
+        """A copy of the samples captured from *started_at* on, as far back as kept."""
+        count = round((self._end_at - started_at) * self.sample_rate)
+        count = max(0, min(count, self._written, len(self._ring)))
+        end = self._written % len(self._ring)
+        if count <= end:
+            return self._ring[end - count : end].copy()
+        return np.concatenate([self._ring[end - count :], self._ring[:end]])
+
+
+def save_wav(audio: "Audio", path: Path) -> None:
+    """Save *audio* as a WAV file. A disk-backed recording is moved there, not copied."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if audio.path is not None:
+        try:
+            os.replace(audio.path, path)
+            audio.path = path
+            return
+        except OSError:
+            pass  # e.g. Windows won't rename a file that is still mapped
+    path.write_bytes(audio.wav)
+
+
+@dataclass
+class Upload:
+    """Audio ready to send, in one format. For WAV, data is a view of the recording."""
+
+    data: bytes | memoryview
+    format: UploadFormat
+    duration_s: float
+
+    @property
+    def mime_type(self) -> str:
+        return MIME_TYPES[self.format]
+
+    @property
+    def filename(self) -> str:
+        return f"audio.{FILE_EXTENSIONS[self.format]}"
+
+
+class Audio:
+    """A mono 16-bit WAV recording, plus any encoded uploads made from it.
+
+    The recording is held as a memoryview and never copied on its way to a provider:
+    `wav` and `pcm` are views of the same buffer. Encoded versions are cached, so
+    comparing several providers that take the same format only encodes once.
+    """
+
+    def __init__(self, wav: bytes | bytearray | memoryview):
+        self.wav = memoryview(wav).cast("B")
+        self.sample_rate, data_offset, data_size = parse_wav_header(self.wav)
+        self.pcm = self.wav[data_offset : data_offset + data_size]
+        self.n_frames = data_size // 2
+        self.path: Path | None = None  # The file wav is mapped from, if any
+        # Keyed by format, with "@<rate>" when resampled, e.g. "flac@16000"
+        self._uploads: dict[str, Upload] = {}
+        self._lock = threading.Lock()  # Guards the dicts, never held while encoding
+        self._encode_locks: dict[str, threading.Lock] = {}
+
+    @classmethod
+    def from_wav_io(cls, wav_bytes: io.BytesIO) -> "Audio":
+        return cls(wav_bytes.getbuffer())
+
+    @property
+    def duration_s(self) -> float:
+        return self.n_frames / self.sample_rate
+
+    @functools.cached_property
+    def digest(self) -> str:
+        """sha256 of the sample rate and samples, computed once per recording."""
+        sha = hashlib.sha256(str(self.sample_rate).encode())
+        sha.update(self.pcm)
+        return sha.hexdigest()
+
+    def add_upload(self, upload: Upload) -> None:
+        with self._lock:
+            self._uploads[upload.format] = upload
+
+    def has_upload(self, format: UploadFormat) -> bool:
+        """Whether upload(format) is ready without encoding."""
+        return format == "wav" or format in self._uploads
+
+    def upload(self, format: UploadFormat, sample_rate: int | None = None) -> Upload:
+        """Return this audio in *format*, encoding it now if nobody has yet.
+
+        sample_rate resamples (in ffmpeg) when it differs from the recording's.
+        Falls back to the original WAV (with a printed warning) if ffmpeg fails.
+        """
+        if sample_rate is None or sample_rate == self.sample_rate:
+            sample_rate = self.sample_rate
+            if format == "wav":
+                return Upload(self.wav, "wav", self.duration_s)
+
+        key = format if sample_rate == self.sample_rate else f"{format}@{sample_rate}"
+        with self._lock:
+            if key in self._uploads:
+                return self._uploads[key]
+            # One encode per key; other keys (and readers) don't wait for it
+            encode_lock = self._encode_locks.setdefault(key, threading.Lock())
+        with encode_lock:
+            with self._lock:
+                if key in self._uploads:  # Encoded while we waited
+                    return self._uploads[key]
+            try:
+                data = encode(self.pcm, self.sample_rate, format, sample_rate)
+            except (OSError, subprocess.CalledProcessError) as exc:
+                print(f"Couldn't encode {key}, uploading WAV. ERROR: {exc}")
+                return Upload(self.wav, "wav", self.duration_s)
+            upload = Upload(data, format, self.duration_s)
+            with self._lock:
+                return self._uploads.setdefault(key, upload)
+
+
+@functools.cache
+def ffmpeg_path() -> str | None:
+    """ffmpeg on PATH, looked up once. Every format but WAV needs it."""
+    # pydub.utils.get_encoder_name() would do the same lookup, but importing pydub
+    # fails on Python 3.13+ without audioop-lts
+    return shutil.which("ffmpeg")
+
+
+def _ffmpeg_command(
+    sample_rate: int, format: UploadFormat, output_rate: int | None = None
+) -> list[str]:
+    ffmpeg = ffmpeg_path()
+    if ffmpeg is None:
+        raise FileNotFoundError("ffmpeg not found on PATH")
+
+    return [
+        ffmpeg,
+        *["-hide_banner", "-loglevel", "error"],
+        *["-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0"],
+        *["-ar", str(output_rate or sample_rate)],
+        *_FFMPEG_OUTPUT_ARGS[format],
+        "pipe:1",
+    ]
+
+
+def encode(
+    pcm: bytes | memoryview,
+    sample_rate: int,
+    format: UploadFormat,
+    output_rate: int | None = None,
+) -> bytes:
+    """Encode raw mono 16-bit PCM in one go, optionally resampling to output_rate."""
+    result = subprocess.run(
+        _ffmpeg_command(sample_rate, format, output_rate),
+        input=pcm,
+        capture_output=True,
+        check=True,
+    )
+    if format == "wav":
+        # ffmpeg can't patch the WAV length on a pipe, so it outputs raw PCM
+        n_samples = len(result.stdout) // 2
+        return wav_header(n_samples, output_rate or sample_rate) + result.stdout
+    return result.stdout
+
+
+class StreamingEncoder:
+    """Encodes PCM while it's being recorded, so only the tail is left at stop.
+
+    `write()` is safe to call from the audio callback: it only queues the chunk.
+    A feeder thread pipes chunks into ffmpeg and a reader thread collects output.
+    """
+
+    def __init__(self, sample_rate: int, format: UploadFormat):
+        self.sample_rate = sample_rate
+        self.format = format
+        self.n_bytes_in = 0
+        self._queue: queue.SimpleQueue[bytes | None] = queue.SimpleQueue()
+        self._output = bytearray()
+        self._process = subprocess.Popen(
+            _ffmpeg_command(sample_rate, format),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._feeder = threading.Thread(target=self._feed, daemon=True)
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._feeder.start()
+        self._reader.start()
+
+    def _feed(self):
+        stdin = self._process.stdin
+        while (chunk := self._queue.get()) is not None:
+            stdin.write(chunk)
+        stdin.close()
+
+    def _read(self):
+        while chunk := self._process.stdout.read1(65_536):
+            self._output += chunk
+
+    def write(self, pcm_chunk) -> None:
+        self.n_bytes_in += memoryview(pcm_chunk).nbytes
+        self._queue.put(pcm_chunk)
+
+    def finish(self) -> Upload:
+        self._queue.put(None)
+        self._feeder.join()
+        self._reader.join()
+        if self._process.wait() != 0:
+            raise OSError(f"ffmpeg exited with code {self._process.returncode}")
+        return Upload(
+            bytes(self._output),
+            self.format,
+            duration_s=self.n_bytes_in / 2 / self.sample_rate,
+        )
@@ -0,0 +1,120 @@
+"""Benchmark peak memory and copy time of the recording -> upload handoff.
+
+Compares the old pipeline (concatenate + tobytes, BytesIO, getvalue, b"".join of the
+multipart body) with the memoryview one (wav_from_frames + MultipartBody), sending
+each to a local server that discards the body. Memory is what tracemalloc sees on
+top of the captured frames, as a multiple of the recording size.
+
+    python bench_audio_memory.py --minutes 1 10 60
+"""
+
+import argparse
+import io
+import tracemalloc
+import uuid
+import wave
+from timeit import default_timer
+
+import numpy as np
+
+from audio import Audio, wav_from_frames
+from bench_utils import SAMPLE_RATE
+from mock_servers import DiscardHandler, MockServer
+from sessions import HTTPSession, MultipartBody
+
+BLOCK_SIZE = 480  # 20 ms callbacks
+
+
+def fake_frames(seconds: float) -> list[np.ndarray]:
+    """What Recorder.frames holds after *seconds*: one (block, 1) array per callback."""
+    rng = np.random.default_rng(0)
+    n_blocks = int(seconds * SAMPLE_RATE / BLOCK_SIZE)
+    return [
+        rng.integers(-2_000, 2_000, size=(BLOCK_SIZE, 1), dtype=np.int16)
+        for _ in range(n_blocks)
+    ]
+
+
+def old_pipeline(frames, session: HTTPSession):
+    wav_bytes = io.BytesIO()
+    with wave.open(wav_bytes, "wb") as wave_file:
+        wave_file.setframerate(SAMPLE_RATE)
+        wave_file.setnchannels(1)
+        wave_file.setsampwidth(2)
+        wave_file.writeframes(np.concatenate(frames, axis=0).tobytes())
+
+    boundary = f"----transcriber-{uuid.uuid4().hex}"
+    body = b"".join(
+        [
+            f"--{boundary}\r\n".encode(),
+            b'Content-Disposition: form-data; name="file"; filename="audio.wav"\r\n',
+            b"Content-Type: audio/wav\r\n\r\n",
+            wav_bytes.getvalue(),
+            b"\r\n",
+            f"--{boundary}--\r\n".encode(),
+        ]
+    )
+    prepared_at = default_timer()
+    session.request(
+        "POST",
+        "/upload",
+        body=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+    return prepared_at
+
+
+def new_pipeline(frames, session: HTTPSession):
+    upload = Audio(wav_from_frames(frames, SAMPLE_RATE)).upload("wav")
+    body = MultipartBody().add_file(
+        "file", upload.filename, upload.mime_type, upload.data
+    )
+    prepared_at = default_timer()
+    session.request("POST", "/upload", body=body, headers=body.headers())
+    return prepared_at
+
+
+def measure(pipeline, frames, session) -> dict:
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    started_at = default_timer()
+    prepared_at = pipeline(frames, session)
+    finished_at = default_timer()
+    _, peak = tracemalloc.get_traced_memory()
+    return dict(
+        extra_bytes=peak - baseline,
+        prepare_ms=(prepared_at - started_at) * 1000,
+        send_ms=(finished_at - prepared_at) * 1000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 10, 60])
+    args = parser.parse_args()
+
+    print(
+        f"{'minutes':>8} {'MB':>7} {'pipeline':<11} {'extra MB':>9} {'x size':>7}"
+        f" {'prepare ms':>11} {'send ms':>8}"
+    )
+    with MockServer(DiscardHandler) as server:
+        session = HTTPSession(server.base_url)
+        session.warm_up()
+
+        for minutes in args.minutes:
+            frames = fake_frames(minutes * 60)
+            size = sum(x.nbytes for x in frames)
+            tracemalloc.start()
+            for name, pipeline in [("old", old_pipeline), ("memoryview", new_pipeline)]:
+                result = measure(pipeline, frames, session)
+                print(
+                    f"{minutes:>8g} {size / 1e6:>7.1f} {name:<11}"
+                    f" {result['extra_bytes'] / 1e6:>9.1f} {result['extra_bytes'] / size:>7.2f}"
+                    f" {result['prepare_ms']:>11.1f} {result['send_ms']:>8.1f}"
+                )
+            tracemalloc.stop()
+            del frames
+
+
+if __name__ == "__main__":
+    main()
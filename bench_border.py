@@ -0,0 +1,97 @@
+"""Benchmark the border: from show() being called to the border window appearing.
+
+show() is called from a worker thread, as the hotkey and network threads do, while
+the Tk thread runs mainloop. "Appearing" is the first <Map> event of any of the
+border's windows, which Tk sees once the window manager has mapped it. Also
+reports how long show() held up its caller. To compare with an earlier Border,
+save that version of border.py and point --module at it:
+
+    git show <commit>:border.py > .private/border_old.py
+    python bench_border.py --module .private/border_old.py
+    python bench_border.py --shows 50
+
+Needs a display.
+"""
+
+import argparse
+import importlib
+import importlib.util
+import threading
+import time
+import tkinter as tk
+from pathlib import Path
+from time import perf_counter
+
+from bench_utils import percentiles
+
+
+def load_border(module: str):
+    if not module.endswith(".py"):
+        return importlib.import_module(module).Border
+    spec = importlib.util.spec_from_file_location(Path(module).stem, module)
+    border_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(border_module)
+    return border_module.Border
+
+
+def drive(border, mapped: threading.Event, args, results: dict, root: tk.Tk):
+    """On a worker thread: show, wait for the frame, hide, repeat."""
+    time.sleep(0.5)  # Let mainloop settle
+    for i in range(args.shows):
+        mapped.clear()
+        called_at = perf_counter()
+        border.show("#F8312F" if i % 2 else "#FFB02E")
+        results["call"].append(perf_counter() - called_at)
+        if mapped.wait(timeout=2):
+            results["appear"].append(results["mapped_at"] - called_at)
+        else:
+            results["missed"] += 1
+        time.sleep(args.gap_ms / 1000)
+        border.hide()
+        time.sleep(args.gap_ms / 1000)
+    root.after(0, root.quit)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="border", help="module or .py path")
+    parser.add_argument("--shows", type=int, default=30)
+    parser.add_argument("--gap-ms", type=float, default=100)
+    args = parser.parse_args()
+
+    Border = load_border(args.module)
+    root = tk.Tk()
+    border = Border(root)
+
+    results = dict(call=[], appear=[], missed=0, mapped_at=None)
+    mapped = threading.Event()
+
+    def on_map(event):
+        if not mapped.is_set():
+            results["mapped_at"] = perf_counter()
+            mapped.set()
+
+    windows = [w for w in root.winfo_children() if isinstance(w, tk.Toplevel)]
+    for window in windows:
+        window.bind("<Map>", on_map)
+
+    worker = threading.Thread(
+        target=drive, args=(border, mapped, args, results, root), daemon=True
+    )
+    root.after(0, worker.start)
+    root.mainloop()
+    root.destroy()
+
+    print(f"{args.module}: {len(windows)} windows, {args.shows} shows")
+    for name, label in (("call", "show() call"), ("appear", "show() to frame")):
+        pct = percentiles([t * 1000 for t in results[name]])
+        print(
+            f"  {label:<16} p50 {pct['p50']:.2f} ms, p95 {pct['p95']:.2f} ms,"
+            f" p99 {pct['p99']:.2f} ms"
+        )
+    if results["missed"]:
+        print(f"  {results['missed']} shows never appeared")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark capture: audio callback time and stop() latency by recording length.
+
+Compares the old frame list (copy + append per callback, concatenate into a WAV at
+stop) with CaptureBuffer (copy into a preallocated buffer, patch the header at
+stop) and MappedCaptureBuffer (the same over a memory-mapped file in
+.private/). Callbacks are paced at --speed x real time, so the helper
+threads get the share of time they would have while recording. "rss MB" is how
+much resident memory grew by the time the WAV was ready (Linux only).
+
+    python bench_capture.py --seconds 1 60 600 3600
+"""
+
+import argparse
+import gc
+import time
+from pathlib import Path
+from timeit import default_timer
+
+import numpy as np
+
+from audio import Audio, CaptureBuffer, MappedCaptureBuffer, wav_from_frames
+from bench_utils import SAMPLE_RATE, percentiles, rss_bytes
+
+BLOCK_SIZE = 480  # 20 ms callbacks
+
+
+class FrameList:
+    """The old Recorder: one copied array per callback."""
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.frames = []
+
+    def write(self, indata):
+        self.frames.append(indata.copy())
+
+    def finish(self):
+        return wav_from_frames(self.frames, self.sample_rate)
+
+
+def run(capture, seconds: float, speed: float) -> dict:
+    rng = np.random.default_rng(0)
+    # A few distinct blocks, reused: generating an hour of noise would dominate
+    blocks = rng.integers(-2_000, 2_000, size=(16, BLOCK_SIZE, 1), dtype=np.int16)
+    n_blocks = int(seconds * SAMPLE_RATE / BLOCK_SIZE)
+    interval_s = BLOCK_SIZE / SAMPLE_RATE / speed
+
+    callback_us = np.empty(n_blocks)
+    gc.collect()
+    rss_before = rss_bytes()
+    started_at = default_timer()
+    for i in range(n_blocks):
+        due = started_at + i * interval_s
+        if (ahead_s := due - default_timer()) > 0.001:
+            time.sleep(ahead_s)
+        t = default_timer()
+        capture.write(blocks[i % len(blocks)])
+        callback_us[i] = (default_timer() - t) * 1e6
+
+    t = default_timer()
+    audio = Audio(capture.finish())
+    stop_ms = (default_timer() - t) * 1000
+    assert audio.n_frames == n_blocks * BLOCK_SIZE
+    rss_mb = None if rss_before is None else (rss_bytes() - rss_before) / 1e6
+
+    callback = percentiles(list(callback_us))
+    return dict(
+        p50_us=callback["p50"],
+        p99_us=callback["p99"],
+        max_us=callback_us.max(),
+        stop_ms=stop_ms,
+        rss_mb=rss_mb,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--seconds", type=float, nargs="+", default=[1, 10, 60, 600, 3600]
+    )
+    parser.add_argument("--speed", type=float, default=200, help="x real time")
+    args = parser.parse_args()
+
+    print(
+        f"{'length s':>9} {'capture':<13} {'callback p50 us':>16} {'p99 us':>8}"
+        f" {'max us':>8} {'stop ms':>9} {'rss MB':>8}"
+    )
+    path = Path(".private") / "bench_capture.wav"
+    for seconds in args.seconds:
+        for name, make_capture in [
+            ("frame list", lambda: FrameList(SAMPLE_RATE)),
+            ("CaptureBuffer", lambda: CaptureBuffer(SAMPLE_RATE)),
+            ("mapped", lambda: MappedCaptureBuffer(path, SAMPLE_RATE)),
+        ]:
+            result = run(make_capture(), seconds, args.speed)
+            rss = "" if result["rss_mb"] is None else f"{result['rss_mb']:.1f}"
+            print(
+                f"{seconds:>9g} {name:<13} {result['p50_us']:>16.1f}"
+                f" {result['p99_us']:>8.1f} {result['max_us']:>8.0f}"
+                f" {result['stop_ms']:>9.3f} {rss:>8}"
+            )
+    path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
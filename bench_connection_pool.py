@@ -0,0 +1,90 @@
+"""Benchmark one-shot urlopen requests against pooled keep-alive sessions.
+
+Runs against a local HTTPS stand-in with a simulated round-trip time, so the numbers
+show how much of each request is connection setup.
+
+    python bench_connection_pool.py --rtt-ms 30 --requests 20
+"""
+
+import argparse
+import statistics
+from timeit import default_timer
+from urllib import request
+
+from mock_servers import EchoHandler, MockServer
+from sessions import HTTPSession
+
+
+def time_requests(send, n: int) -> list[float]:
+    times_ms = []
+    for _ in range(n):
+        started_at = default_timer()
+        send()
+        times_ms.append((default_timer() - started_at) * 1000)
+    return times_ms
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rtt-ms", type=float, default=30)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--body-kb", type=int, default=48, help="~1s of 24 kHz WAV")
+    args = parser.parse_args()
+
+    rtt_s = args.rtt_ms / 1000
+    body = bytes(args.body_kb * 1024)
+
+    with MockServer(
+        EchoHandler,
+        tls=True,
+        connect_delay_s=2 * rtt_s,  # TCP + TLS 1.3 handshakes
+        request_delay_s=rtt_s,
+    ) as server:
+        context = server.client_context
+        url = f"{server.base_url}/echo"
+
+        def urlopen():
+            req = request.Request(url, data=body, method="POST")
+            with request.urlopen(req, context=context) as response:
+                response.read()
+
+        pooled = HTTPSession(server.base_url, context=context)
+        warmed = HTTPSession(server.base_url, context=context)
+        warmed.warm_up()
+
+        rows = [
+            ("urlopen (no pooling)", time_requests(urlopen, args.requests), None),
+            (
+                "pooled session",
+                time_requests(
+                    lambda: pooled.request("POST", "/echo", body=body), args.requests
+                ),
+                pooled,
+            ),
+            (
+                "pooled + warm-up",
+                time_requests(
+                    lambda: warmed.request("POST", "/echo", body=body), args.requests
+                ),
+                warmed,
+            ),
+        ]
+
+    print(
+        f"Simulated RTT {args.rtt_ms:g} ms, {args.requests} requests, {args.body_kb} KB body"
+    )
+    print(
+        f"{'mode':<22} {'first ms':>9} {'steady p50':>11} {'steady p95':>11} {'connections':>12}"
+    )
+    for name, times_ms, session in rows:
+        steady = times_ms[1:]
+        p95 = statistics.quantiles(steady, n=20)[-1] if len(steady) > 1 else steady[0]
+        connections = session.connections_opened if session else len(times_ms)
+        print(
+            f"{name:<22} {times_ms[0]:>9.1f} {statistics.median(steady):>11.1f}"
+            f" {p95:>11.1f} {connections:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
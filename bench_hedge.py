@@ -0,0 +1,113 @@
+"""Benchmark hedged requests against mock providers with injected latency distributions.
+
+Each mock provider's latency is lognormal with occasional multi-second stalls.
+Times are scaled down by --time-scale so hundreds of dictations run in seconds,
+and reported back at full scale. The hedge delay is tuned from recorded latencies,
+exactly as in real use.
+
+    python bench_hedge.py --dictations 500
+"""
+
+import argparse
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+import hedge
+from bench_utils import percentiles
+from latency import LatencyTracker
+
+
+@dataclass
+class MockProvider:
+    name: str
+    median_s: float
+    sigma: float
+    stall_rate: float
+    stall_s: tuple[float, float]
+
+    def sample_s(self, rng: random.Random) -> float:
+        if rng.random() < self.stall_rate:
+            return rng.uniform(*self.stall_s)
+        return self.median_s * rng.lognormvariate(0, self.sigma)
+
+
+PROVIDERS = {
+    "primary": MockProvider("primary", 1.2, 0.3, 0.05, (4, 10)),
+    "secondary": MockProvider("secondary", 1.6, 0.3, 0.02, (4, 10)),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dictations", type=int, default=500)
+    parser.add_argument("--time-scale", type=float, default=0.01)
+    parser.add_argument("--percentiles", type=float, nargs="+", default=[80, 90, 95])
+    args = parser.parse_args()
+
+    scale = args.time_scale
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+
+    def make_transcribe(tracker: LatencyTracker):
+        def transcribe(audio, model):
+            with rng_lock:
+                latency_s = PROVIDERS[model].sample_s(rng)
+            time.sleep(latency_s * scale)
+            tracker.record(model, latency_s * scale)
+            return dict(text=f"from {model}")
+
+        return transcribe
+
+    baseline = [PROVIDERS["primary"].sample_s(rng) for _ in range(args.dictations)]
+    rows = [("primary only", percentiles(baseline), None, None, None)]
+
+    for pct in args.percentiles:
+        tracker = LatencyTracker(path=None)
+        transcribe = make_transcribe(tracker)
+        totals, hedged, secondary_wins, delays = [], 0, 0, []
+        for _ in range(args.dictations):
+            delays.append(hedge.hedge_delay("primary", pct, tracker))
+            started_at = time.perf_counter()
+            result = hedge.hedged_speech_to_text(
+                None,
+                "primary",
+                "secondary",
+                percentile=pct,
+                transcribe=transcribe,
+                tracker=tracker,
+            )
+            totals.append((time.perf_counter() - started_at) / scale)
+            hedged += result["hedged"]
+            secondary_wins += result["model"] == "secondary"
+        median_delay_s = sorted(delays)[len(delays) // 2] / scale
+        rows.append(
+            (
+                f"hedge at p{pct:g}",
+                percentiles(totals),
+                hedged / args.dictations,
+                secondary_wins / max(1, hedged),
+                median_delay_s,
+            )
+        )
+
+    print(f"{args.dictations} dictations, latencies in seconds at full scale")
+    print(
+        f"{'mode':<14} {'p50':>6} {'p95':>6} {'p99':>6} {'hedged':>7}"
+        f" {'hedge wins':>11} {'delay s':>8}"
+    )
+    for name, stats, hedge_rate, win_rate, delay_s in rows:
+        extra = (
+            f" {hedge_rate:>7.1%} {win_rate:>11.1%} {delay_s:>8.2f}"
+            if hedge_rate is not None
+            else ""
+        )
+        print(
+            f"{name:<14} {stats['p50']:>6.2f} {stats['p95']:>6.2f} {stats['p99']:>6.2f}"
+            + extra
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Benchmark kb's hook work per key event in a synthetic key storm, old vs new.
+
+Old: every registered hotkey's _handle() sees every key event, and each callback
+starts a threading.Timer thread (kb.py before hotkeys.py, reproduced below). New:
+hotkeys.ComboIndex, which looks the key up and queues callbacks for one
+Dispatcher thread. The storm is random typing keys with the hotkeys pressed and
+released among them. Reports the time the hook spends per event and checks both
+swallow the same events and fire the same callbacks. Then, with hotkey presses
+spaced out as a person makes them, how late callbacks run after their 20 ms
+delay, from a Timer thread each vs the Dispatcher.
+
+    python bench_hotkeys.py --events 200000 --hotkey-every 50 --presses 200
+"""
+
+import argparse
+import random
+import threading
+from time import perf_counter, sleep
+
+from bench_utils import percentiles
+from hotkeys import DISPATCH_DELAY_S, Combo, ComboIndex, Dispatcher
+
+CTRL, ALT, SHIFT, SPACE, ESC, SCROLL_LOCK = 0x11, 0x12, 0x10, 0x20, 0x1B, 0x91
+LETTERS = list(range(0x41, 0x5B))
+# (keys, hold?): the app's push-to-talk key, plus the sort of combos other
+# scripts register
+HOTKEYS = [
+    ([SCROLL_LOCK], True),
+    ([CTRL, ALT, SHIFT, ord("Q")], False),
+    ([ESC], False),
+    ([CTRL, SHIFT, SPACE], True),
+]
+
+
+class OldHotKeyHook:
+    """kb.HotKeyHook's state machine as it was, without the win32 parts."""
+
+    def __init__(self, vks, callback, release_callback=None):
+        self._combo = set(vks)
+        self._callback = callback
+        self._release_callback = release_callback
+        self._held: set[int] = set()
+        self._active = False
+        self.triggered_at = None
+
+    def _handle(self, vk: int, down: bool, up: bool) -> bool:
+        if down:
+            self._held.add(vk)
+        elif up:
+            self._held.discard(vk)
+
+        combo_held = self._combo.issubset(self._held)
+
+        if self._release_callback is not None:
+            if not self._active and combo_held:
+                self._active = True
+                self.triggered_at = perf_counter()
+                threading.Timer(0.02, self._callback).start()
+            elif self._active and not combo_held:
+                self._active = False
+                self._held.clear()
+                self.triggered_at = perf_counter()
+                threading.Timer(0.02, self._release_callback).start()
+
+            return self._active and down and vk in self._combo
+
+        if not self._active and combo_held:
+            self._active = True
+
+        if self._active and not (self._held & self._combo):
+            self._active = False
+            self._held.clear()
+            self.triggered_at = perf_counter()
+            threading.Timer(0.02, self._callback).start()
+
+        return self._active and down and vk in self._combo
+
+
+def key_storm(n: int, hotkey_every: int, seed: int) -> list[tuple[int, bool, bool]]:
+    """(vk, down, up) events: typing, with a random hotkey chord now and then."""
+    rng = random.Random(seed)
+    events = []
+    while len(events) < n:
+        if rng.random() < 1 / hotkey_every:
+            keys, _ = rng.choice(HOTKEYS)
+            events += [(vk, True, False) for vk in keys]
+            events += [(vk, False, True) for vk in reversed(keys)]
+        else:
+            vk = rng.choice(LETTERS)
+            events += [(vk, True, False), (vk, False, True)]
+    return events[:n]
+
+
+def make_callbacks(fired: list):
+    """Per hotkey, callbacks that record (hotkey, "press"/"release", run time)."""
+
+    def record(i: int, kind: str):
+        return lambda: fired.append((i, kind, perf_counter()))
+
+    return [
+        (record(i, "press"), record(i, "release") if hold else None)
+        for i, (_, hold) in enumerate(HOTKEYS)
+    ]
+
+
+def run_old(events) -> tuple[list[float], list[bool], list]:
+    fired = []
+    hooks = [
+        OldHotKeyHook(keys, *callbacks)
+        for (keys, _), callbacks in zip(HOTKEYS, make_callbacks(fired))
+    ]
+    times, swallowed = [], []
+    for vk, down, up in events:
+        started_at = perf_counter()
+        swallow = False
+        for inst in tuple(hooks):
+            swallow |= inst._handle(vk, down, up)
+        times.append(perf_counter() - started_at)
+        swallowed.append(swallow)
+    return times, swallowed, fired
+
+
+def run_new(events) -> tuple[list[float], list[bool], list]:
+    fired = []
+    index = ComboIndex()
+    for (keys, _), callbacks in zip(HOTKEYS, make_callbacks(fired)):
+        index.add(Combo(keys, *callbacks))
+    times, swallowed = [], []
+    for vk, down, up in events:
+        started_at = perf_counter()
+        swallowed.append(index.handle(vk, down, up))
+        times.append(perf_counter() - started_at)
+    index.dispatcher.close()
+    return times, swallowed, fired
+
+
+def lateness(schedule, presses: int, gap_s: float) -> list[float]:
+    """How late each callback ran after its delay, submitting one every gap_s."""
+    ran_at = []
+    due = []
+    for _ in range(presses):
+        due.append(perf_counter() + DISPATCH_DELAY_S)
+        schedule(lambda: ran_at.append(perf_counter()))
+        sleep(gap_s)
+    sleep(DISPATCH_DELAY_S * 2)
+    return [ran - due_at for ran, due_at in zip(ran_at, due)]
+
+
+def report(name: str, times: list[float]) -> None:
+    pct = percentiles([t * 1e6 for t in times])
+    print(
+        f"{name:<4} per event: p50 {pct['p50']:.2f} us, p99 {pct['p99']:.2f} us,"
+        f" max {max(times) * 1e6:.0f} us, total {sum(times) * 1000:.0f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument(
+        "--hotkey-every", type=int, default=50, help="1 in N chords is a hotkey"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--presses", type=int, default=200)
+    parser.add_argument("--gap-ms", type=float, default=30)
+    args = parser.parse_args()
+
+    events = key_storm(args.events, args.hotkey_every, args.seed)
+    print(f"{len(events):,} key events, {len(HOTKEYS)} hotkeys registered")
+
+    old_times, old_swallowed, old_fired = run_old(events)
+    for thread in threading.enumerate():  # Let the Timer threads finish
+        if isinstance(thread, threading.Timer):
+            thread.join()
+    report("old", old_times)
+    print(f"     {len(old_fired):,} callbacks, each on a new Timer thread")
+
+    new_times, new_swallowed, new_fired = run_new(events)
+    report("new", new_times)
+    print(f"     {len(new_fired):,} callbacks on one Dispatcher thread")
+
+    assert new_swallowed == old_swallowed, "swallowed different events"
+    # Timer threads can run out of order, so compare what fired, not when
+    assert sorted(f[:2] for f in new_fired) == sorted(f[:2] for f in old_fired)
+    print("Same events swallowed and callbacks fired")
+
+    print(
+        f"\n{args.presses} presses {args.gap_ms:g} ms apart, callback lateness"
+        f" after the {DISPATCH_DELAY_S * 1000:g} ms delay:"
+    )
+    dispatcher = Dispatcher()
+    for name, schedule in (
+        ("old", lambda cb: threading.Timer(DISPATCH_DELAY_S, cb).start()),
+        ("new", dispatcher.submit),
+    ):
+        pct = percentiles(
+            [s * 1000 for s in lateness(schedule, args.presses, args.gap_ms / 1000)]
+        )
+        print(f"{name:<4} p50 {pct['p50']:.3f} ms, p99 {pct['p99']:.3f} ms")
+    dispatcher.close()
+
+
+if __name__ == "__main__":
+    main()
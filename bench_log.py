@@ -0,0 +1,108 @@
+"""Benchmark writing log.jsonl and last_recording.wav on the hotkey thread vs log().
+
+Old: after each dictation, read the whole log, keep the last 499 lines, append,
+and rewrite it, then write the WAV; all before the next press is handled. New:
+jsonl_log's log() and run(save_wav, ...), which queue for the writer thread.
+Reports the time the calling thread spends, and for the new writer, how long
+until everything is on disk, how many fsyncs that took, and the rotations.
+
+    python bench_log.py --dictations 200 --existing 500
+"""
+
+import argparse
+import json
+import tempfile
+from pathlib import Path
+from timeit import default_timer
+
+from audio import Audio, save_wav
+from bench_utils import percentiles, synthetic_speech, to_wav
+from jsonl_log import JsonlLog, read_records
+
+
+def record(i: int) -> dict:
+    return dict(
+        audio_length_s=12.3,
+        upload_format="wav",
+        transcribe_time_ms=850,
+        milestones_ms=dict(hotkey_down=0.0, callback=0.4, typed=13_100.0 + i),
+        text=f"Dictation {i}: " + "a sentence of about this length, " * 6,
+    )
+
+
+def old_way(log_path: Path, wav_path: Path, audio: Audio, i: int) -> None:
+    log_line = json.dumps(record(i))
+    if not log_path.exists():
+        log_path.write_text(log_line)
+    else:
+        log_lines = log_path.read_text().splitlines()[-499:]  # Truncate
+        log_lines.append(log_line)
+        log_path.write_text("\n".join(log_lines))
+    save_wav(audio, wav_path)
+
+
+def report(name: str, times: list[float]) -> None:
+    pct = percentiles([t * 1000 for t in times])
+    print(
+        f"{name:<6} calling thread: p50 {pct['p50']:.3f} ms,"
+        f" p99 {pct['p99']:.3f} ms, max {max(times) * 1000:.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dictations", type=int, default=200)
+    parser.add_argument(
+        "--existing", type=int, default=500, help="records already logged"
+    )
+    parser.add_argument("--seconds", type=float, default=15, help="recording length")
+    parser.add_argument("--max-bytes", type=int, default=100_000)
+    args = parser.parse_args()
+
+    audio = Audio(to_wav(synthetic_speech(args.seconds)))
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        existing = "\n".join(json.dumps(record(i)) for i in range(args.existing))
+        print(
+            f"{args.dictations} dictations, log starts with {args.existing} records"
+            f" ({len(existing) / 1024:.0f} KiB), {args.seconds:g}s recordings"
+        )
+
+        log_path = tmp / "old" / "log.jsonl"
+        log_path.parent.mkdir()
+        log_path.write_text(existing)
+        times = []
+        for i in range(args.dictations):
+            started_at = default_timer()
+            old_way(log_path, log_path.with_name("last_recording.wav"), audio, i)
+            times.append(default_timer() - started_at)
+        report("old", times)
+
+        log_path = tmp / "new" / "log.jsonl"
+        log_path.parent.mkdir()
+        log_path.write_text(existing)
+        log = JsonlLog(log_path, max_bytes=args.max_bytes)
+        times = []
+        run_started_at = default_timer()
+        for i in range(args.dictations):
+            started_at = default_timer()
+            log.log(record(i))
+            log.run(save_wav, audio, log_path.with_name("last_recording.wav"))
+            times.append(default_timer() - started_at)
+        queued_at = default_timer()
+        log.flush()
+        flushed_at = default_timer()
+        log.close()
+        report("new", times)
+        n = sum(1 for _ in read_records(log_path, segments=True))
+        print(
+            f"       on disk {(flushed_at - queued_at) * 1000:.0f} ms after the last"
+            f" call ({(flushed_at - run_started_at) * 1000:.0f} ms in all),"
+            f" {log.fsyncs} fsyncs, {log.rotations} rotations"
+            f" into {len(log.segments())} segments, {n} records readable"
+        )
+        assert n == args.existing + args.dictations
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark long-audio mode: one request vs parallel chunks, and stitching accuracy.
+
+A mock provider takes base + per-second time (scaled by --speed) and "transcribes"
+a chunk as the words of a known script whose midpoints fall inside it, so words
+in the overlaps come back twice, as they would from a real provider. The stitched
+text is diffed against the script (substitutions, insertions and deletions).
+
+    python bench_long_audio.py --seconds 300 --chunk-s 30
+"""
+
+import argparse
+import time
+from difflib import SequenceMatcher
+from timeit import default_timer
+
+import numpy as np
+
+import long_audio
+from audio import Audio
+from bench_utils import synthetic_speech, to_wav
+
+VOCABULARY = (
+    "the a to and of in we it is that for this on with as was so then "
+    "model audio latency provider request chunk word silence upload text "
+    "python check result again first next after before quickly really"
+).split()
+WORD_S = 0.4
+
+
+def script(seconds: float, seed: int = 0) -> list[str]:
+    rng = np.random.default_rng(seed)
+    return list(rng.choice(VOCABULARY, int(seconds / WORD_S)))
+
+
+def mock_provider(
+    audio: Audio, words: list[str], chunk_s: float, base_s: float, per_s: float
+):
+    """transcribe_chunk(chunk, model) for *audio* or the chunks long_audio cuts it into."""
+    samples = np.frombuffer(audio.pcm, np.int16)
+    overlap = int(long_audio.DEFAULT_OVERLAP_S * audio.sample_rate)
+    starts = [max(0, cut - overlap) for cut in long_audio.cut_points(audio, chunk_s)]
+
+    def transcribe_chunk(chunk: Audio, model: str) -> str:
+        head = np.frombuffer(chunk.pcm, np.int16)[:overlap]
+        start = next(
+            i for i in starts if np.array_equal(samples[i : i + len(head)], head)
+        )
+        start_s = start / audio.sample_rate
+        end_s = start_s + chunk.duration_s
+        time.sleep(base_s + per_s * chunk.duration_s)
+        return " ".join(
+            word
+            for k, word in enumerate(words)
+            if start_s <= (k + 0.5) * WORD_S < end_s
+        )
+
+    return transcribe_chunk
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=300)
+    parser.add_argument("--chunk-s", type=float, default=30)
+    parser.add_argument("--base-s", type=float, default=0.4, help="per request")
+    parser.add_argument("--per-s", type=float, default=0.03, help="per audio second")
+    args = parser.parse_args()
+
+    audio = Audio(to_wav(synthetic_speech(args.seconds)))
+    words = script(args.seconds)
+    transcribe_chunk = mock_provider(
+        audio, words, args.chunk_s, args.base_s, args.per_s
+    )
+
+    started_at = default_timer()
+    transcribe_chunk(audio, "mock")
+    single_s = default_timer() - started_at
+
+    started_at = default_timer()
+    chunks = long_audio.split(audio, args.chunk_s)
+    split_s = default_timer() - started_at
+
+    started_at = default_timer()
+    text = long_audio.transcribe(
+        audio, "mock", args.chunk_s, transcribe_chunk=transcribe_chunk
+    )
+    chunked_s = default_timer() - started_at
+
+    # autojunk off: with a small vocabulary every word is "popular"
+    matcher = SequenceMatcher(a=words, b=text.split(), autojunk=False)
+    wrong = sum(
+        max(i2 - i1, j2 - j1)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    )
+    lengths = [chunk.duration_s for chunk in chunks]
+    print(
+        f"{audio.duration_s:.0f}s of audio, {len(chunks)} chunks of"
+        f" {min(lengths):.1f}-{max(lengths):.1f}s (split in {split_s * 1000:.0f} ms)"
+    )
+    print(f"one request:    {single_s:.2f}s")
+    print(f"chunked:        {chunked_s:.2f}s")
+    print(f"stitched words: {len(text.split())} of {len(words)}")
+    print(f"word errors:    {wrong} of {len(words)}")
+
+
+if __name__ == "__main__":
+    main()
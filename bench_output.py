@@ -0,0 +1,87 @@
+"""Benchmark typing transcript deltas inline vs on OutputWriter's thread.
+
+Replays a stream of deltas (a word or two every --delta-ms, like a streamed
+transcription) into FakeSinks whose per-call and per-character costs stand in for
+each output method. Inline is how deltas used to be typed: in the receive loop.
+Reports how far the receive loop fell behind the stream, how long after the last
+delta the text was all typed, and how many sink calls it took.
+
+    python bench_output.py --words 200 --delta-ms 5
+"""
+
+import argparse
+import time
+from timeit import default_timer
+
+from output import FakeSink, OutputWriter
+
+# (per call, per character) seconds. Keystrokes: two synthesized events per
+# character, each of which the target app has to process. SendInput: one call
+# for a batch, cheap per character. Paste: clipboard round trip + ctrl+v.
+COSTS = dict(
+    keystrokes=(0.0, 0.002),
+    sendinput=(0.002, 0.00005),
+    paste=(0.03, 0.0),
+)
+WORDS = "so the model should stream this text back as it hears it".split()
+
+
+def deltas(n_words: int) -> list[str]:
+    words = [WORDS[i % len(WORDS)] for i in range(n_words)]
+    stream, i = [], 0
+    while i < n_words:
+        n = 1 + len(stream) % 2  # One or two words per delta
+        stream.append(" " + " ".join(words[i : i + n]))
+        i += n
+    return stream
+
+
+def replay(stream: list[str], delta_s: float, write) -> float:
+    """Feed *stream* to write() on schedule; returns when the last delta was due."""
+    started_at = default_timer()
+    for i, delta in enumerate(stream):
+        time.sleep(max(0, started_at + i * delta_s - default_timer()))
+        write(delta)
+    last_due_at = started_at + (len(stream) - 1) * delta_s
+    return last_due_at
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=200)
+    # Batch transcription streams deltas faster than they can be typed
+    parser.add_argument("--delta-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    stream = deltas(args.words)
+    delta_s = args.delta_ms / 1000
+    chars = sum(map(len, stream))
+    print(
+        f"{len(stream)} deltas, {chars} characters, one every {args.delta_ms:g} ms"
+        f" ({(len(stream) - 1) * delta_s:.1f}s of streaming)"
+    )
+    print(
+        f"{'method':<11} {'mode':<7} {'receive lag ms':>15} {'typed after ms':>15}"
+        f" {'sink calls':>11}"
+    )
+    for method, (per_call_s, per_char_s) in COSTS.items():
+        for mode in ("inline", "writer"):
+            sink = FakeSink(per_call_s, per_char_s)
+            writer = OutputWriter(sink) if mode == "writer" else None
+            last_due_at = replay(
+                stream, delta_s, sink.write if writer is None else writer.write
+            )
+            received_at = default_timer()
+            if writer is not None:
+                writer.flush()
+                writer.close()
+            typed_at = default_timer()
+            assert sink.text == "".join(stream)
+            print(
+                f"{method:<11} {mode:<7} {(received_at - last_due_at) * 1000:>15.0f}"
+                f" {(typed_at - last_due_at) * 1000:>15.0f} {len(sink.writes):>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Benchmark release-to-first-keystroke: upload after release vs while recording.
+
+Records --seconds of audio in real time (20 ms blocks), then measures from the
+hotkey release to the first transcript delta against a local stand-in for the
+OpenAI transcription endpoint, with a throttled uplink and simulated RTT:
+- batch wav / opus: upload the whole file after release (opus encoded while
+  recording, as the transcriber does by default)
+- pipelined: the request opened at start, WAV streamed as a chunked body
+
+    python bench_pipelined_upload.py --seconds 10 --uplink-kbps 1000
+"""
+
+import argparse
+import statistics
+import time
+from timeit import default_timer
+
+import numpy as np
+
+from audio import Audio, StreamingEncoder, wav_from_frames
+from bench_utils import SAMPLE_RATE, recording_or_synthetic
+from mock_servers import OpenAIMockServer
+from pipelined_upload import PipelinedTranscription, iter_events
+from sessions import MultipartBody, get_session
+
+BLOCK_SIZE = 480  # 20 ms
+
+
+def record(samples: np.ndarray, on_block) -> float:
+    """Feed blocks in real time; returns the release timestamp."""
+    started_at = default_timer()
+    for i, start in enumerate(range(0, len(samples), BLOCK_SIZE)):
+        due = started_at + i * BLOCK_SIZE / SAMPLE_RATE
+        time.sleep(max(0, due - default_timer()))
+        on_block(samples[start : start + BLOCK_SIZE, None])
+    return default_timer()
+
+
+def batch(server, samples: np.ndarray, format: str) -> float:
+    blocks = []
+    encoder = StreamingEncoder(SAMPLE_RATE, format) if format != "wav" else None
+
+    def on_block(block):
+        blocks.append(block)
+        if encoder is not None:
+            encoder.write(block)
+
+    released_at = record(samples, on_block)
+    audio = Audio(wav_from_frames(blocks, SAMPLE_RATE))
+    upload = audio.upload("wav") if encoder is None else encoder.finish()
+    body = (
+        MultipartBody()
+        .add_field("model", "gpt-4o-mini-transcribe")
+        .add_field("stream", "true")
+        .add_file("file", upload.filename, upload.mime_type, upload.data)
+    )
+    lines = get_session(server.base_url).stream(
+        "POST", "/v1/audio/transcriptions", body=body, headers=body.headers()
+    )
+    events = iter_events(lines)
+    next(events)
+    first_delta_s = default_timer() - released_at
+    for _ in events:
+        pass
+    return first_delta_s
+
+
+def pipelined(server, samples: np.ndarray) -> float:
+    pipeline = PipelinedTranscription(
+        "gpt-4o-mini-transcribe",
+        SAMPLE_RATE,
+        base_url=f"{server.base_url}/v1",
+        api_key="x",
+    )
+    released_at = record(samples, pipeline.write)
+    events = pipeline.finish()
+    next(events)
+    first_delta_s = default_timer() - released_at
+    for _ in events:
+        pass
+    return first_delta_s
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--uplink-kbps", type=float, default=1000)
+    parser.add_argument("--rtt-ms", type=float, default=50)
+    parser.add_argument("--first-delta-ms", type=float, default=300)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    audio = Audio(recording_or_synthetic(args.seconds))
+    samples = np.frombuffer(audio.pcm, np.int16)[: int(args.seconds * SAMPLE_RATE)]
+    print(
+        f"{len(samples) / SAMPLE_RATE:.1f}s recordings,"
+        f" uplink {args.uplink_kbps:g} kbps, RTT {args.rtt_ms:g} ms,"
+        f" server answers {args.first_delta_ms:g} ms after upload"
+    )
+
+    with OpenAIMockServer(
+        first_delta_s=args.first_delta_ms / 1000,
+        request_delay_s=args.rtt_ms / 1000,
+        upload_bytes_per_s=args.uplink_kbps * 1000 / 8,
+    ) as server:
+        get_session(server.base_url).warm_up()
+        modes = dict(
+            batch_wav=lambda: batch(server, samples, "wav"),
+            batch_opus=lambda: batch(server, samples, "opus"),
+            pipelined=lambda: pipelined(server, samples),
+        )
+        for name, run in modes.items():
+            try:
+                times = [run() for _ in range(args.runs)]
+            except OSError as exc:
+                print(f"{name:<11} skipped: {exc}")
+                continue
+            print(
+                f"{name:<11} release to first delta: median"
+                f" {statistics.median(times) * 1000:7.0f} ms,"
+                f" max {max(times) * 1000:7.0f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark the idle cost of an always-open input stream with a pre-roll ring.
+
+Runs anywhere: times the idle path of the audio callback, PrerollRing.write with
+a 10 ms block, and reports its CPU per second and the memory it holds. With
+--device, also opens a real microphone stream (Recorder(always_open=True), needs
+sounddevice) for --seconds and reports the whole process's idle CPU, plus how long
+the steps that used to clip the first syllable take: volume.duck() and
+stream.start().
+
+    python bench_preroll.py --preroll-ms 500
+    python bench_preroll.py --device --seconds 10
+"""
+
+import argparse
+import time
+import tracemalloc
+from timeit import default_timer
+
+from audio import PrerollRing, block_started_at
+from bench_utils import SAMPLE_RATE, rss_bytes, synthetic_speech
+
+BLOCK_SIZE = 240  # 10 ms
+
+
+def simulated(preroll_s: float):
+    samples = synthetic_speech(1)
+    blocks = [
+        samples[i : i + BLOCK_SIZE, None] for i in range(0, len(samples), BLOCK_SIZE)
+    ]
+
+    def write(i: int):
+        ring.write(blocks[i % len(blocks)], block_started_at(None, time.perf_counter()))
+
+    tracemalloc.start()
+    ring = PrerollRing(SAMPLE_RATE, preroll_s)
+    ring_allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for i in range(10_000):
+        write(i)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    n = 100_000
+    timed_at = default_timer()
+    for i in range(n):
+        write(i)
+    per_call_us = (default_timer() - timed_at) / n * 1e6
+    calls_per_s = SAMPLE_RATE / BLOCK_SIZE
+
+    print(f"idle callback path (PrerollRing.write), {preroll_s * 1000:g} ms ring:")
+    print(
+        f"  CPU:    {per_call_us:.2f} us per 10 ms block,"
+        f" {per_call_us * calls_per_s / 1000:.3f} ms per second"
+    )
+    print(
+        f"  memory: ring {ring.nbytes / 1024:.0f} KiB (allocated at start"
+        f" {ring_allocated / 1024:.0f} KiB), peak over 10k writes"
+        f" {(peak - ring_allocated) / 1024:.1f} KiB more"
+    )
+
+
+def device(seconds: float, preroll_s: float):
+    import volume
+    from recorder import Recorder
+
+    rss_before = rss_bytes()
+    cpu_started_at = time.process_time()
+    recorder = Recorder(always_open=True, preroll_s=preroll_s)
+    time.sleep(seconds)
+    cpu_s = time.process_time() - cpu_started_at
+    print(f"real stream, {seconds:g}s idle:")
+    print(f"  process CPU: {cpu_s * 1000 / seconds:.2f} ms per second")
+    if rss_before is not None:
+        print(f"  RSS: +{(rss_bytes() - rss_before) / 2**20:.1f} MiB")
+    recorder.stream.stop()
+
+    started_at = default_timer()
+    volume.duck()
+    duck_ms = (default_timer() - started_at) * 1000
+    volume.restore()
+    started_at = default_timer()
+    recorder.stream.start()
+    start_ms = (default_timer() - started_at) * 1000
+    recorder.stream.close()
+    print(
+        f"  clipped without pre-roll: duck {duck_ms:.0f} ms"
+        f" + stream.start() {start_ms:.0f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--preroll-ms", type=float, default=500)
+    parser.add_argument("--device", action="store_true", help="open a real microphone")
+    args = parser.parse_args()
+
+    simulated(args.preroll_ms / 1000)
+    if args.device:
+        device(args.seconds, args.preroll_ms / 1000)
+
+
+if __name__ == "__main__":
+    main()
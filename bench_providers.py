@@ -0,0 +1,281 @@
+"""Benchmark every provider's client path in stt.py against local mock servers.
+
+Each provider's real backend (stt.openai_stt, microsoft_stt, ...) is pointed at a
+stand-in from mock_servers.py through its base URL environment variable, so the
+same simulated network and model sit behind every provider and differences come
+from our code and the SDKs. Per call it measures:
+- prepare: encoding the upload (Provider.prepare on a fresh Audio)
+- upload: from sending to the server having the whole audio body
+- server: time the server spent on the call's requests (simulated round trips
+  and processing), from its own timestamps
+- client overhead: the rest of the call, i.e. our code, the SDK and, for
+  Soniox, waiting between status polls
+- total: prepare + the call
+Connection setup is timed once per provider, as its warm-up on a cold client (for
+the SDK providers that includes importing the SDK). openai_stream is the streamed
+request transcriber.py makes, plus its first delta. Google's chirp_3 goes over
+gRPC and isn't covered; Gemini is skipped if google-genai isn't installed.
+
+Results go to --out as JSON. With --baseline, client overhead p50s are compared
+with an earlier run, and the exit status is 1 if any grew by more than
+--tolerance, so regressions in our own code show up offline.
+
+    python bench_providers.py --runs 20 --rtt-ms 30 --jitter 0.3 --error-rate 0.05
+    python bench_providers.py --baseline .private/bench_providers.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from timeit import default_timer
+
+from bench_utils import percentiles, recording_or_synthetic
+from mock_servers import (
+    AzureHandler,
+    ElevenLabsHandler,
+    GeminiHandler,
+    Latency,
+    MockServer,
+    OpenAIMockServer,
+    SonioxMockServer,
+    TranscriptionMockServer,
+)
+
+TEXT = "Hello from the mock server, with a sentence of about this length."
+CASES = dict(
+    openai="gpt-4o-mini-transcribe-2025-12-15",
+    openai_stream="gpt-4o-mini-transcribe-2025-12-15",
+    azure="mai-transcribe-1",
+    elevenlabs="scribe_v2",
+    soniox="stt-async-v4",
+    gemini="gemini-3-flash-preview",
+)
+METRICS = ("prepare_ms", "upload_ms", "server_ms", "client_overhead_ms", "total_ms")
+
+
+def start_servers(args) -> dict[str, MockServer]:
+    rtt = Latency(args.rtt_ms / 1000, args.jitter)
+    network = dict(
+        connect_delay_s=Latency(2 * args.rtt_ms / 1000, args.jitter),  # TCP + TLS
+        request_delay_s=rtt,
+        upload_bytes_per_s=args.uplink_kbps * 1000 / 8,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    processing = Latency(
+        args.processing_ms / 1000, args.jitter, tail_p=0.05, tail_s=args.tail_ms / 1000
+    )
+    servers = dict(
+        openai=OpenAIMockServer(text=TEXT, first_delta_s=processing, **network),
+        azure=TranscriptionMockServer(
+            AzureHandler, text=TEXT, processing_s=processing, **network
+        ),
+        elevenlabs=TranscriptionMockServer(
+            ElevenLabsHandler, text=TEXT, processing_s=processing, **network
+        ),
+        soniox=SonioxMockServer(processing_delay_s=processing, text=TEXT, **network),
+        gemini=TranscriptionMockServer(
+            GeminiHandler, text=TEXT, processing_s=processing, **network
+        ),
+    )
+    for server in servers.values():
+        server.start()
+
+    # Before stt and the SDK clients are imported, since they read these once
+    os.environ |= dict(
+        OPENAI_API_KEY="mock",
+        OPENAI_BASE_URL=f"{servers['openai'].base_url}/v1",
+        AZURE_SPEECH_API_KEY="mock",
+        AZURE_SPEECH_ENDPOINT=servers["azure"].base_url,
+        ELEVENLABS_API_KEY="mock",
+        ELEVENLABS_BASE_URL=servers["elevenlabs"].base_url,
+        SONIOX_API_KEY="mock",
+        SONIOX_BASE_URL=servers["soniox"].base_url,
+        GEMINI_API_KEY="mock",
+        GOOGLE_GEMINI_BASE_URL=servers["gemini"].base_url,
+    )
+    return servers
+
+
+def stream_openai(upload, model: str) -> tuple[str, float]:
+    """The request transcriber.py makes. Returns the text and first delta time."""
+    import sessions
+
+    stream = sessions.openai_client().audio.transcriptions.create(
+        model=model,
+        file=(upload.filename, bytes(upload.data), upload.mime_type),
+        language="en",
+        response_format="text",
+        stream=True,
+    )
+    text, first_delta_at = "", None
+    for event in stream:
+        if event.type == "transcript.text.delta":
+            first_delta_at = first_delta_at or default_timer()
+            text += event.delta
+    return text, first_delta_at
+
+
+def run_once(case: str, model: str, wav: bytes, upload_format, server) -> dict:
+    import providers
+    from audio import Audio
+
+    provider = providers.for_model(model)
+    started_at = default_timer()
+    upload = provider.prepare(Audio(wav), upload_format)
+    sent_at = default_timer()
+    first_delta_at = None
+    if case == "openai_stream":
+        text, first_delta_at = stream_openai(upload, model)
+    else:
+        text = provider.transcribe(upload, model)
+    done_at = default_timer()
+    assert text.strip() == TEXT, text
+
+    timings = [t for t in server.timings if sent_at <= t["started_at"] <= done_at]
+    server_s = sum(t["done_at"] - t["started_at"] for t in timings)
+    audio_request = max(timings, key=lambda t: t["body_bytes"])
+    result = dict(
+        prepare_ms=(sent_at - started_at) * 1000,
+        upload_ms=(audio_request["body_read_at"] - sent_at) * 1000,
+        server_ms=server_s * 1000,
+        client_overhead_ms=(done_at - sent_at - server_s) * 1000,
+        total_ms=(done_at - started_at) * 1000,
+        requests=len(timings),
+        upload_bytes=len(upload.data),
+    )
+    if first_delta_at is not None:
+        result["first_delta_ms"] = (first_delta_at - started_at) * 1000
+    return result
+
+
+def connect_ms(case: str, model: str) -> float:
+    import providers
+
+    started_at = default_timer()
+    providers.for_model(model).warm_up(model)
+    return (default_timer() - started_at) * 1000
+
+
+def bench_case(case: str, model: str, wav: bytes, server, args) -> dict:
+    result = dict(model=model, runs=[], errors=[])
+    server.errors_injected = 0
+    try:
+        if case != "openai_stream":  # Shares openai's client, already connected
+            result["connect_ms"] = connect_ms(case, model)
+    except ImportError as exc:
+        result["skipped"] = f"{exc.name} not installed"
+        return result
+
+    for _ in range(args.runs):
+        server.timings.clear()
+        try:
+            result["runs"].append(run_once(case, model, wav, args.format, server))
+        except Exception as exc:
+            result["errors"].append(f"{type(exc).__name__}: {exc}")
+
+    result["errors_injected"] = server.errors_injected
+    if result["runs"]:
+        result["summary"] = {
+            metric: percentiles([run[metric] for run in result["runs"]])
+            for metric in (*METRICS, "first_delta_ms")
+            if metric in result["runs"][0]
+        }
+    return result
+
+
+def compare(results: dict, baseline_path: Path, tolerance: float) -> bool:
+    """Print client overhead against the baseline; False if any regressed."""
+    baseline = json.loads(baseline_path.read_text())["results"]
+    ok = True
+    print(f"\nclient overhead p50 vs {baseline_path}:")
+    for case, result in results.items():
+        before = baseline.get(case, {}).get("summary")
+        after = result.get("summary")
+        if not before or not after:
+            continue
+        old = before["client_overhead_ms"]["p50"]
+        new = after["client_overhead_ms"]["p50"]
+        # A couple of ms is scheduling noise, whatever the ratio
+        regressed = new > old * (1 + tolerance) and new - old > 2
+        ok &= not regressed
+        print(
+            f"  {case:<14} {old:>7.1f} -> {new:>7.1f} ms"
+            f"{'  REGRESSED' if regressed else ''}"
+        )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=10, help="audio length")
+    parser.add_argument("--format", default="wav", help="upload format for all")
+    parser.add_argument("--rtt-ms", type=float, default=30)
+    parser.add_argument("--processing-ms", type=float, default=300)
+    parser.add_argument(
+        "--jitter", type=float, default=0.2, help="log-normal sigma of each delay"
+    )
+    parser.add_argument(
+        "--tail-ms", type=float, default=500, help="added to 5%% of processing"
+    )
+    parser.add_argument("--uplink-kbps", type=float, default=20_000)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cases", nargs="*", default=list(CASES), choices=CASES)
+    parser.add_argument(
+        "--out", type=Path, default=Path(".private") / "bench_providers.json"
+    )
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    servers = start_servers(args)
+    wav = recording_or_synthetic(args.seconds)
+    results = {}
+    print(
+        f"{args.runs} runs each, {args.format} upload, RTT {args.rtt_ms:g} ms,"
+        f" processing {args.processing_ms:g} ms, jitter {args.jitter:g},"
+        f" errors {args.error_rate:.0%}"
+    )
+    print(
+        f"{'case':<14} {'connect':>8} {'prepare':>8} {'upload':>8} {'server':>8}"
+        f" {'client':>8} {'total':>8} {'total p95':>10} {'errors':>7}   (p50 ms)"
+    )
+    for case in args.cases:
+        server = servers["openai" if case == "openai_stream" else case]
+        result = results[case] = bench_case(case, CASES[case], wav, server, args)
+        if "skipped" in result:
+            print(f"{case:<14} skipped: {result['skipped']}")
+            continue
+        if "summary" not in result:
+            print(f"{case:<14} every run failed: {result['errors'][0]}")
+            continue
+        p50 = {metric: pct["p50"] for metric, pct in result["summary"].items()}
+        print(
+            f"{case:<14} {result.get('connect_ms', float('nan')):>8.1f}"
+            f" {p50['prepare_ms']:>8.1f} {p50['upload_ms']:>8.1f}"
+            f" {p50['server_ms']:>8.1f} {p50['client_overhead_ms']:>8.1f}"
+            f" {p50['total_ms']:>8.1f}"
+            f" {result['summary']['total_ms']['p95']:>10.1f}"
+            f" {len(result['errors']):>7}"
+        )
+        if "first_delta_ms" in p50:
+            print(f"{'':<14} first delta p50 {p50['first_delta_ms']:.1f} ms")
+    for server in servers.values():
+        server.stop()
+
+    ok = True
+    if args.baseline:
+        ok = compare(results, args.baseline, args.tolerance)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    config = {key: str(value) for key, value in vars(args).items()}
+    args.out.write_text(json.dumps(dict(config=config, results=results), indent=2))
+    print(f"Saved to {args.out}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Benchmark realtime sender batching: CPU per audio second and delta latency.
+
+Feeds --seconds of audio in real time as 10 ms callback blocks to a realtime
+session on a local websocket stand-in (mock_servers.RealtimeMockServer), which
+sends a delta for each --word-ms of audio it receives. Compares the old sender (one
+SDK input_audio_buffer.append per block) with AudioBatcher at each window size:
+- sender CPU: thread CPU time of the sender thread, per second of audio
+- callback: CPU time in the audio callback per block
+- delta latency: from capturing the end of a word's audio to its delta arriving
+
+    python bench_realtime_batching.py --seconds 10 --windows 20 50 100 200
+"""
+
+import argparse
+import base64
+import queue
+import statistics
+import threading
+import time
+from timeit import default_timer
+
+import numpy as np
+from openai import OpenAI
+
+from bench_utils import SAMPLE_RATE, synthetic_speech
+from mock_servers import RealtimeMockServer
+from realtime_audio import AudioBatcher, append_message
+
+BLOCK_SIZE = 240  # 10 ms
+
+
+class PerBlockSender:
+    """The sender as it was: a bytes copy per block and one SDK append each."""
+
+    def __init__(self):
+        self.audio_queue = queue.Queue()
+        self.messages = 0
+
+    def write(self, block):
+        self.audio_queue.put(bytes(block))
+
+    def close(self):
+        self.audio_queue.put(None)
+
+    def send(self, connection):
+        while (chunk := self.audio_queue.get()) is not None:
+            connection.input_audio_buffer.append(
+                audio=base64.b64encode(chunk).decode("ascii")
+            )
+            self.messages += 1
+
+
+class BatchedSender:
+    def __init__(self, window_ms: float):
+        self.batcher = AudioBatcher(SAMPLE_RATE, window_ms)
+        self.write = self.batcher.write
+        self.close = self.batcher.close
+
+    @property
+    def messages(self):
+        return self.batcher.messages
+
+    def send(self, connection):
+        for batch in self.batcher:
+            connection.send_raw(append_message(batch))
+
+
+def run(server, samples: np.ndarray, sender) -> dict:
+    client = OpenAI(api_key="mock", websocket_base_url=server.url)
+    n_blocks = -(-len(samples) // BLOCK_SIZE)
+    captured_at = np.zeros(n_blocks)
+    arrived: dict[int, float] = {}
+    sender_cpu_s = 0.0
+
+    with client.realtime.connect(extra_query=dict(intent="transcription")) as conn:
+        conn.session.update(session=dict(type="transcription"))
+
+        def receive():
+            for event in conn:
+                if event.type.endswith("transcription.delta"):
+                    arrived[int(event.delta[2:])] = default_timer()
+                elif event.type.endswith("transcription.completed"):
+                    return
+
+        def send():
+            nonlocal sender_cpu_s
+            started_at = time.thread_time()
+            sender.send(conn)
+            conn.input_audio_buffer.commit()
+            sender_cpu_s = time.thread_time() - started_at
+
+        receiver = threading.Thread(target=receive)
+        sending = threading.Thread(target=send)
+        receiver.start()
+        sending.start()
+
+        callback_cpu_s = 0.0
+        started_at = default_timer()
+        for i in range(n_blocks):
+            due = started_at + i * BLOCK_SIZE / SAMPLE_RATE
+            time.sleep(max(0, due - default_timer()))
+            block = samples[i * BLOCK_SIZE : (i + 1) * BLOCK_SIZE, None]
+            cpu_started_at = time.thread_time()
+            sender.write(block)
+            callback_cpu_s += time.thread_time() - cpu_started_at
+            captured_at[i] = default_timer()
+        sender.close()
+        sending.join()
+        receiver.join()
+
+    word_samples = server.word_bytes // 2
+    latencies = [
+        arrived_at
+        - captured_at[min(((k + 1) * word_samples - 1) // BLOCK_SIZE, n_blocks - 1)]
+        for k, arrived_at in arrived.items()
+    ]
+    audio_s = len(samples) / SAMPLE_RATE
+    return dict(
+        messages=sender.messages,
+        rate=sender.messages / audio_s,
+        sender_ms_per_s=sender_cpu_s * 1000 / audio_s,
+        callback_us=callback_cpu_s * 1e6 / n_blocks,
+        p50_ms=statistics.median(latencies) * 1000,
+        p95_ms=statistics.quantiles(latencies, n=20)[-1] * 1000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--windows", type=float, nargs="+", default=[20, 50, 100, 200])
+    parser.add_argument("--delta-delay-ms", type=float, default=50)
+    # Not a multiple of the windows, so words end at random points within one
+    parser.add_argument("--word-ms", type=float, default=330)
+    args = parser.parse_args()
+
+    samples = synthetic_speech(args.seconds)
+    senders = {"per block": PerBlockSender} | {
+        f"{window:g} ms": (lambda window=window: BatchedSender(window))
+        for window in args.windows
+    }
+    print(
+        f"{args.seconds:g}s of audio in {BLOCK_SIZE / SAMPLE_RATE * 1000:g} ms blocks,"
+        f" server answers {args.delta_delay_ms:g} ms after each word's audio"
+    )
+    print(
+        f"{'sender':<10} {'messages':>8} {'msg/s':>6} {'sender CPU ms/s':>16}"
+        f" {'callback us':>12} {'delta p50 ms':>13} {'p95 ms':>7}"
+    )
+    with RealtimeMockServer(
+        SAMPLE_RATE,
+        word_s=args.word_ms / 1000,
+        delta_delay_s=args.delta_delay_ms / 1000,
+    ) as server:
+        for name, make_sender in senders.items():
+            result = run(server, samples, make_sender())
+            print(
+                f"{name:<10} {result['messages']:>8} {result['rate']:>6.0f}"
+                f" {result['sender_ms_per_s']:>16.2f} {result['callback_us']:>12.1f}"
+                f" {result['p50_ms']:>13.1f} {result['p95_ms']:>7.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
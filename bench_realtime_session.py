@@ -0,0 +1,121 @@
+"""Benchmark cold vs warm realtime sessions: connect time and time to first delta.
+
+Runs --dictations dictations of --seconds each against a local websocket stand-in
+(mock_servers.RealtimeMockServer) that takes --connect-ms to accept a connection
+and --session-ms to set up a session. Cold opens a session per dictation, as the
+realtime transcriber used to; warm uses realtime_session.WarmSessions. The server
+expires sessions after --max-session-s, so warm runs also show replacement.
+For each, from the hotkey press:
+- ready: the session is open and audio can be sent
+- first delta: the first transcript delta arrives
+
+    python bench_realtime_session.py --dictations 8 --connect-ms 300
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from timeit import default_timer
+
+import numpy as np
+from openai import OpenAI
+
+from bench_utils import SAMPLE_RATE, synthetic_speech
+from mock_servers import RealtimeMockServer
+from realtime_audio import AudioBatcher, append_message
+from realtime_session import WarmSessions
+
+BLOCK_SIZE = 240  # 10 ms
+
+
+def dictate(sessions: WarmSessions, samples: np.ndarray) -> tuple[float, float]:
+    """One dictation as TranscriberRealtime does it; returns (ready, first delta) s."""
+    pressed_at = default_timer()
+    batcher = AudioBatcher(SAMPLE_RATE, 50)
+    ready_at = first_delta_at = None
+
+    def send():
+        nonlocal ready_at, first_delta_at
+        session = sessions.acquire()
+        ready_at = default_timer()
+
+        def receive():
+            nonlocal first_delta_at
+            for event in iter(session.events.get, None):
+                if event.type.endswith("transcription.delta") and not first_delta_at:
+                    first_delta_at = default_timer()
+                elif event.type.endswith("transcription.completed"):
+                    return
+
+        receiver = threading.Thread(target=receive)
+        receiver.start()
+        for batch in batcher:
+            session.connection.send_raw(append_message(batch))
+        session.connection.input_audio_buffer.commit()
+        receiver.join()
+        sessions.release(session)
+
+    sender = threading.Thread(target=send)
+    sender.start()
+    for i in range(0, len(samples), BLOCK_SIZE):
+        time.sleep(max(0, pressed_at + i / SAMPLE_RATE - default_timer()))
+        batcher.write(samples[i : i + BLOCK_SIZE, None])
+    batcher.close()
+    sender.join()
+    return ready_at - pressed_at, first_delta_at - pressed_at
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dictations", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=2)
+    parser.add_argument("--pause-s", type=float, default=1, help="between dictations")
+    parser.add_argument("--connect-ms", type=float, default=300)
+    parser.add_argument("--session-ms", type=float, default=150)
+    parser.add_argument("--max-session-s", type=float, default=10)
+    args = parser.parse_args()
+
+    samples = synthetic_speech(args.seconds)
+    print(
+        f"{args.dictations} dictations of {args.seconds:g}s, {args.pause_s:g}s apart;"
+        f" connect {args.connect_ms:g} ms, session setup {args.session_ms:g} ms,"
+        f" sessions expire after {args.max_session_s:g}s"
+    )
+    print(
+        f"{'mode':<5} {'connects':>8} {'ready p50 ms':>13} {'max':>6}"
+        f" {'first delta p50 ms':>19} {'max':>6}"
+    )
+    for keep_warm in (False, True):
+        with RealtimeMockServer(
+            SAMPLE_RATE,
+            connect_delay_s=args.connect_ms / 1000,
+            session_delay_s=args.session_ms / 1000,
+            max_session_s=args.max_session_s,
+        ) as server:
+            client = OpenAI(api_key="mock", websocket_base_url=server.url)
+            # Replaced well before the server's cap, as MAX_AGE_S is in the app
+            sessions = WarmSessions(
+                client,
+                dict(type="transcription"),
+                keep_warm,
+                max_age_s=args.max_session_s / 2,
+            )
+            # As if the app had been open a while before the first dictation
+            time.sleep(args.pause_s)
+            ready, first_delta = [], []
+            for _ in range(args.dictations):
+                ready_s, first_delta_s = dictate(sessions, samples)
+                ready.append(ready_s * 1000)
+                first_delta.append(first_delta_s * 1000)
+                time.sleep(args.pause_s)
+            sessions.close()
+            print(
+                f"{'warm' if keep_warm else 'cold':<5} {server.connections_accepted:>8}"
+                f" {statistics.median(ready):>13.0f} {max(ready):>6.0f}"
+                f" {statistics.median(first_delta):>19.0f} {max(first_delta):>6.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
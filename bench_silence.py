@@ -0,0 +1,112 @@
+"""Evaluate silence trimming (silence.py) on saved recordings.
+
+For each recording, transcribe the original and the trimmed audio with each model
+(cache bypassed) and report how much audio was removed, the response time saved
+per model, and which transcripts changed. With no paths, uses every WAV under
+.private/; with none there, synthetic speech padded with silence.
+--dry-run skips the providers and only reports the trimming itself.
+
+    python bench_silence.py --models gpt-4o-mini-transcribe-2025-12-15 scribe_v2
+    python bench_silence.py --dry-run recordings/*.wav
+"""
+
+import argparse
+import statistics
+import tomllib
+from pathlib import Path
+from timeit import default_timer
+
+import numpy as np
+
+from audio import Audio
+from bench_utils import SAMPLE_RATE, synthetic_speech, to_wav
+from silence import SilenceSettings, compact_silence
+from text_diff import changed_indexes, tokenize
+
+PRIVATE_DIR = Path(".private")
+
+
+def load_recordings(paths: list[Path]) -> dict[str, Audio]:
+    if not paths:
+        paths = sorted(PRIVATE_DIR.glob("**/*.wav"))
+    if paths:
+        return {str(path): Audio(path.read_bytes()) for path in paths}
+
+    # Reaction-time silence at both ends, as from a push-to-talk hotkey
+    lead, tail = np.zeros(SAMPLE_RATE // 2, np.int16), np.zeros(SAMPLE_RATE, np.int16)
+    samples = np.concatenate([lead, synthetic_speech(20), tail])
+    return {"synthetic 21.5s": Audio(to_wav(samples))}
+
+
+def transcribe(audio: Audio, model: str) -> tuple[str, float]:
+    from stt import speech_to_text_result
+
+    started_at = default_timer()
+    text = speech_to_text_result(audio, model, use_cache=False)["text"]
+    return text, default_timer() - started_at
+
+
+def main():
+    config = tomllib.loads(Path(__file__).with_name("config.toml").read_text())
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="*", type=Path)
+    parser.add_argument("--models", nargs="+", default=[config["batch_model"]])
+    parser.add_argument("--dry-run", action="store_true", help="don't call providers")
+    args = parser.parse_args()
+
+    settings = SilenceSettings.from_config(config)
+    recordings = load_recordings(args.paths)
+    saved_s = {model: [] for model in args.models}
+    changed = {model: 0 for model in args.models}
+
+    for name, audio in recordings.items():
+        started_at = default_timer()
+        trimmed, removed_s = compact_silence(audio, settings)
+        trim_ms = (default_timer() - started_at) * 1000
+        print(
+            f"{name}: {audio.duration_s:.1f}s -> {trimmed.duration_s:.1f}s"
+            f" ({removed_s:.1f}s removed, {trim_ms:.1f} ms)"
+        )
+        if args.dry_run or removed_s == 0:
+            continue
+
+        for model in args.models:
+            try:
+                original_text, original_s = transcribe(audio, model)
+                trimmed_text, trimmed_s = transcribe(trimmed, model)
+            except Exception as exc:
+                print(f"  {model}: ERROR: {exc}")
+                continue
+
+            saved_s[model].append(original_s - trimmed_s)
+            original_tokens = tokenize(original_text)
+            original_changes, _ = changed_indexes(
+                original_tokens, tokenize(trimmed_text)
+            )
+            changed[model] += bool(original_changes)
+            print(
+                f"  {model}: {original_s:.2f}s -> {trimmed_s:.2f}s,"
+                f" {len(original_changes)}/{len(original_tokens)} tokens changed"
+            )
+            if original_changes:
+                print(f"    original: {original_text}")
+                print(f"    trimmed:  {trimmed_text}")
+
+    if args.dry_run:
+        return
+    print()
+    print(
+        f"{'model':<36} {'n':>3} {'mean saved s':>13} {'median saved s':>15}"
+        f" {'changed':>8}"
+    )
+    for model, values in saved_s.items():
+        if values:
+            print(
+                f"{model:<36} {len(values):>3} {statistics.mean(values):>13.2f}"
+                f" {statistics.median(values):>15.2f} {changed[model]:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
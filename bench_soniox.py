@@ -0,0 +1,93 @@
+"""Check the Soniox job engine against a local mock of the Soniox REST API.
+
+For a range of simulated processing delays, compares adaptive polling with the old
+fixed one-second poll and reports the latency added after the job finished, how many
+status polls were made, and whether the file and transcription were cleaned up.
+
+    python bench_soniox.py
+"""
+
+import argparse
+import itertools
+import time
+from timeit import default_timer
+
+import soniox
+from audio import Upload
+from mock_servers import SonioxMockServer
+
+
+def run(server: SonioxMockServer, audio_s: float, intervals=None) -> dict:
+    server.status_polls = 0
+    started_at = default_timer()
+    text = soniox.transcribe(
+        Upload(bytes(int(audio_s * 48_000)), "wav", audio_s),
+        "stt-async-v4",
+        api_key="test",
+        intervals=intervals,
+        base_url=server.base_url,
+    )
+    total_s = default_timer() - started_at
+    assert text == server.text
+
+    # Cleanup runs in the background; give it a moment before checking
+    cleanup_deadline = time.monotonic() + 2
+    while (
+        server.files or server.transcriptions
+    ) and time.monotonic() < cleanup_deadline:
+        time.sleep(0.01)
+
+    return dict(
+        total_s=total_s,
+        polls=server.status_polls,
+        cleaned_up=not server.files and not server.transcriptions,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rtt-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    rtt_s = args.rtt_ms / 1000
+    print(f"Simulated RTT {args.rtt_ms:g} ms")
+    print(
+        f"{'audio s':>8} {'processing s':>13} {'mode':<9} {'total s':>8}"
+        f" {'overshoot s':>12} {'polls':>6} {'cleaned up':>11}"
+    )
+
+    # Processing delay roughly proportional to audio length
+    for audio_s, processing_s in [(3, 0.35), (15, 0.9), (60, 2.6), (300, 7.5)]:
+        with SonioxMockServer(
+            processing_delay_s=processing_s, request_delay_s=rtt_s
+        ) as server:
+            for mode, intervals in [
+                ("fixed 1s", itertools.repeat(1.0)),
+                ("adaptive", None),
+            ]:
+                result = run(server, audio_s, intervals)
+                # Upload + create + fetch are three round trips on top of processing
+                overshoot_s = result["total_s"] - processing_s - 3 * rtt_s
+                print(
+                    f"{audio_s:>8} {processing_s:>13.2f} {mode:<9}"
+                    f" {result['total_s']:>8.2f} {overshoot_s:>12.2f}"
+                    f" {result['polls']:>6} {str(result['cleaned_up']):>11}"
+                )
+
+    # The deadline should turn a stuck job into a TimeoutError
+    with SonioxMockServer(processing_delay_s=60) as server:
+        started_at = default_timer()
+        try:
+            soniox.transcribe(
+                Upload(bytes(48_000), "wav", 1.0),
+                "stt-async-v4",
+                api_key="test",
+                timeout_s=0.5,
+                base_url=server.base_url,
+            )
+        except TimeoutError:
+            print(f"Deadline: TimeoutError after {default_timer() - started_at:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark upload formats: size, encode time and post-release latency.
+
+For each format, the audio is fed to a StreamingEncoder as if it were being
+recorded (sped up by --speed), then we time what's left after "release": finishing
+the encode plus uploading to a local server throttled to --uplink-kbps.
+Uses .private/last_recording.wav if present, otherwise synthetic speech.
+
+    python bench_upload_encoding.py --uplink-kbps 2000
+"""
+
+import argparse
+import time
+from timeit import default_timer
+
+from audio import Audio, StreamingEncoder, encode
+from bench_utils import recording_or_synthetic
+from mock_servers import EchoHandler, MockServer
+from sessions import HTTPSession
+
+CHUNK_S = 0.02
+
+
+def stream_encode(audio: Audio, format, speed: float) -> tuple:
+    """Feed PCM in real-time-ish chunks, return (upload, tail seconds after the last chunk)."""
+    encoder = StreamingEncoder(audio.sample_rate, format)
+    pcm = audio.pcm
+    chunk_bytes = int(CHUNK_S * audio.sample_rate) * 2
+    for i in range(0, len(pcm), chunk_bytes):
+        encoder.write(pcm[i : i + chunk_bytes])
+        time.sleep(CHUNK_S / speed)
+    started_at = default_timer()
+    upload = encoder.finish()
+    return upload, default_timer() - started_at
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=15, help="synthetic length")
+    parser.add_argument("--uplink-kbps", type=float, default=2000)
+    parser.add_argument("--rtt-ms", type=float, default=30)
+    parser.add_argument("--speed", type=float, default=10, help="x real time")
+    args = parser.parse_args()
+
+    audio = Audio(recording_or_synthetic(args.seconds))
+    print(
+        f"{audio.duration_s:.1f}s of audio, uplink {args.uplink_kbps:g} kbps,"
+        f" RTT {args.rtt_ms:g} ms"
+    )
+    print(
+        f"{'format':<6} {'bytes':>10} {'ratio':>6} {'encode ms':>10}"
+        f" {'tail ms':>8} {'upload ms':>10} {'post-release ms':>16}"
+    )
+
+    with MockServer(
+        EchoHandler,
+        request_delay_s=args.rtt_ms / 1000,
+        upload_bytes_per_s=args.uplink_kbps * 1000 / 8,
+    ) as server:
+        session = HTTPSession(server.base_url)
+        session.warm_up()
+
+        for format in ["wav", "flac", "opus", "mp3"]:
+            if format == "wav":
+                upload, encode_s, tail_s = audio.upload("wav"), 0.0, 0.0
+            else:
+                started_at = default_timer()
+                encode(audio.pcm, audio.sample_rate, format)
+                encode_s = default_timer() - started_at
+                upload, tail_s = stream_encode(audio, format, args.speed)
+
+            started_at = default_timer()
+            session.request("POST", "/upload", body=upload.data)
+            upload_s = default_timer() - started_at
+
+            print(
+                f"{format:<6} {len(upload.data):>10,} {len(audio.wav) / len(upload.data):>6.1f}"
+                f" {encode_s * 1000:>10.1f} {tail_s * 1000:>8.1f} {upload_s * 1000:>10.1f}"
+                f" {(tail_s + upload_s) * 1000:>16.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Shared helpers for the bench_*.py scripts."""
+
+import io
+import os
+import statistics
+import wave
+from pathlib import Path
+
+import numpy as np
+
+SAMPLE_RATE = 24_000
+LAST_RECORDING_PATH = Path(".private") / "last_recording.wav"
+
+
+def synthetic_speech(seconds: float, sample_rate: int = SAMPLE_RATE, seed: int = 0):
+    """Speech-like int16 audio: voiced syllables with a wandering pitch, and pauses.
+
+    Not intelligible, but it compresses and trips energy thresholds the way a
+    dictation does, which is what the benchmarks need.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+
+    drift = 10 * rng.standard_normal(n).cumsum() / np.sqrt(n)
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t) + drift
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+
+    # ~4 syllables per second, with a pause of 0.3-1.5 s every few seconds
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 0.5
+    position = 0.0
+    while position < seconds:
+        position += rng.uniform(2, 6)
+        pause_s = rng.uniform(0.3, 1.5)
+        start = int(position * sample_rate)
+        envelope[start : start + int(pause_s * sample_rate)] = 0
+        position += pause_s
+
+    noise = 0.01 * rng.standard_normal(n)
+    signal = 0.3 * voiced / 2 * envelope + noise
+    return (np.clip(signal, -1, 1) * 32_767).astype(np.int16)
+
+
+def to_wav(samples, sample_rate: int = SAMPLE_RATE) -> bytes:
+    wav_bytes = io.BytesIO()
+    with wave.open(wav_bytes, "wb") as wave_file:
+        wave_file.setframerate(sample_rate)
+        wave_file.setnchannels(1)
+        wave_file.setsampwidth(2)
+        wave_file.writeframes(samples)
+    return wav_bytes.getvalue()
+
+
+def recording_or_synthetic(seconds: float) -> bytes:
+    """The last real recording if there is one, otherwise synthetic speech."""
+    if LAST_RECORDING_PATH.exists():
+        return LAST_RECORDING_PATH.read_bytes()
+    return to_wav(synthetic_speech(seconds))
+
+
+def rss_bytes() -> int | None:
+    """Current resident memory of this process, where /proc makes it cheap (Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    if len(values) < 2:
+        value = values[0] if values else float("nan")
+        return dict(p50=value, p95=value, p99=value)
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return dict(p50=statistics.median(values), p95=cuts[94], p99=cuts[98])
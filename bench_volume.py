@@ -0,0 +1,92 @@
+"""Benchmark volume ducking: the time the hotkey thread spends, old vs new.
+
+Old: duck() read and then set the level on the calling thread, each call setting
+up from scratch (CoInitialize and the endpoint lookup on Windows, an osascript
+process on macOS), simulated here as --setup-ms before each call. New:
+VolumeController, which queues the change for a worker thread with a connection
+it keeps. Both drive PulseBackend against a FakePulse whose calls each take
+--call-ms, and the levels it ends up at are checked. Also reports how long the
+new duck takes to be applied, and with --ramp-ms, how many steps the ramp took.
+
+    python bench_volume.py --dictations 50 --setup-ms 20 --call-ms 2 --ramp-ms 150
+"""
+
+import argparse
+import time
+from timeit import default_timer
+
+from bench_utils import percentiles
+from volume import FakePulse, PulseBackend, VolumeController
+
+FACTOR = 0.3
+
+
+def old_duck(fake: FakePulse, setup_s: float) -> float:
+    time.sleep(setup_s)
+    level = PulseBackend(fake).get_level()
+    time.sleep(setup_s)
+    PulseBackend(fake).set_level(level * FACTOR)
+    return level
+
+
+def old_restore(fake: FakePulse, setup_s: float, level: float) -> None:
+    time.sleep(setup_s)
+    PulseBackend(fake).set_level(level)
+
+
+def report(name: str, label: str, times: list[float]) -> None:
+    pct = percentiles([t * 1000 for t in times])
+    print(f"{name:<4} {label}: p50 {pct['p50']:.3f} ms, p99 {pct['p99']:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dictations", type=int, default=50)
+    parser.add_argument("--setup-ms", type=float, default=20, help="old, per call")
+    parser.add_argument("--call-ms", type=float, default=2, help="per server call")
+    parser.add_argument("--ramp-ms", type=float, default=0)
+    args = parser.parse_args()
+    setup_s, call_s = args.setup_ms / 1000, args.call_ms / 1000
+    print(
+        f"{args.dictations} dictations, setup {args.setup_ms:g} ms, calls"
+        f" {args.call_ms:g} ms, ramp {args.ramp_ms:g} ms"
+    )
+
+    fake = FakePulse(call_s=call_s)
+    times = []
+    for _ in range(args.dictations):
+        started_at = default_timer()
+        level = old_duck(fake, setup_s)
+        times.append(default_timer() - started_at)
+        assert abs(fake.volume - FACTOR) < 1e-9
+        old_restore(fake, setup_s, level)
+        assert abs(fake.volume - 1.0) < 1e-9
+    report("old", "duck() on the calling thread", times)
+
+    fake = FakePulse(call_s=call_s)
+    controller = VolumeController(
+        lambda: PulseBackend(fake), ramp_s=args.ramp_ms / 1000
+    )
+    controller.flush()  # Connected
+    times, applied, steps = [], [], []
+    for _ in range(args.dictations):
+        sets = len(fake.levels)
+        started_at = default_timer()
+        controller.duck(FACTOR)
+        times.append(default_timer() - started_at)
+        controller.flush()
+        applied.append(default_timer() - started_at)
+        assert abs(fake.volume - FACTOR) < 1e-9
+        steps.append(len(fake.levels) - sets)
+        controller.restore()
+        controller.flush()
+        assert abs(fake.volume - 1.0) < 1e-9
+    controller.close()
+    report("new", "duck() on the calling thread", times)
+    report("", "until applied", applied)
+    if args.ramp_ms:
+        print(f"     {sum(steps) / len(steps):.0f} steps per ramp")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,248 +1,238 @@
 # %%
-import tkinter as tk
-import time
+"""The coloured border shown while recording (red) and transcribing (orange).
+
+Tk may only be used from the thread running mainloop, but show() and hide() are
+called from hotkey and network threads. So they only queue the change, and the
+Tk thread applies the latest one every POLL_MS, via after().
+
+Each monitor gets four thin edge windows rather than one full-screen transparent
+window, so the compositor blends a few thousand pixels, not the whole screen.
+Monitor geometry (Windows: every monitor; elsewhere: Tk's screen) is looked up
+once, and again only when the display layout changes.
+"""
+
+import queue
 import sys
-from typing import List, Tuple, Optional
+import threading
+import time
+import tkinter as tk
+from typing import List, Optional, Tuple
+
+WINDOWS = sys.platform.startswith("win")
 
-if sys.platform.startswith("win"):
+if WINDOWS:
     import ctypes
     from ctypes import wintypes
 
+    user32 = ctypes.windll.user32
+    user32.MonitorFromWindow.restype = wintypes.HMONITOR
+    user32.MonitorFromWindow.argtypes = [wintypes.HWND, wintypes.DWORD]
+    user32.GetForegroundWindow.restype = wintypes.HWND
 
-class Border:
-    def __init__(self, root: tk.Tk):
-        """
-        Initialize a border indicator overlay using the provided Tk root.
+    class MONITORINFO(ctypes.Structure):
+        _fields_ = [
+            ("cbSize", wintypes.DWORD),
+            ("rcMonitor", wintypes.RECT),
+            ("rcWork", wintypes.RECT),
+            ("dwFlags", wintypes.DWORD),
+        ]
 
-        Windows: shows the border on all detected monitors.
-        Other OS: shows the border on the primary screen only.
-
-        Parameters:
-        - root: the Tk instance managing the mainloop
-        """
-        self.root = root
-        self.thickness = 10
-        self.alpha = 0.8
-        transparent_color = "magenta"
+    MonitorEnumProc = ctypes.WINFUNCTYPE(
+        ctypes.c_int,
+        wintypes.HMONITOR,
+        wintypes.HDC,
+        ctypes.POINTER(wintypes.RECT),
+        wintypes.LPARAM,
+    )
 
-        # Hide the main root window (we only want our overlays)
-        root.withdraw()
+    MONITOR_DEFAULTTONEAREST = 2
+    # GetSystemMetrics: the virtual screen's bounds, and how many monitors make it
+    SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN = 76, 77
+    SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN = 78, 79
+    SM_CMONITORS = 80
 
-        # Determine monitor rectangles: list of (left, top, width, height)
-        monitors: List[Tuple[int, int, int, int]] = []
+Bounds = Tuple[int, int, int, int]  # left, top, width, height
 
-        if sys.platform.startswith("win"):
-            # Enumerate monitors via WinAPI
-            monitors = self._enumerate_windows_monitors()
-        if not monitors:
-            # Fallback: single monitor using Tk's primary screen
-            width = root.winfo_screenwidth()
-            height = root.winfo_screenheight()
-            monitors = [(0, 0, width, height)]
-
-        # Create one overlay per monitor
-        self._overlays = []  # list of dicts: {win, canvas, rect, bounds}
-        for left, top, width, height in monitors:
-            win = tk.Toplevel(root)
-            win.overrideredirect(True)
-            win.attributes("-topmost", True)
-            win.attributes("-alpha", self.alpha)
-            win.config(bg=transparent_color)
-            try:
-                # On Windows: make the transparent_color fully transparent
-                win.wm_attributes("-transparentcolor", transparent_color)
-            except tk.TclError:
-                pass
-            # Position to match the monitor bounds
-            win.geometry(f"{width}x{height}+{left}+{top}")
-
-            canvas = tk.Canvas(win, highlightthickness=0, bg=transparent_color)
-            canvas.pack(fill="both", expand=True)
-            half = self.thickness / 2
-            rect = canvas.create_rectangle(
-                half,
-                half,
-                width - half,
-                height - half,
-                width=self.thickness,
-                outline="black",
-            )
 
-            # Start hidden; use show() to display
-            win.withdraw()
-            self._overlays.append(
-                {
-                    "win": win,
-                    "canvas": canvas,
-                    "rect": rect,
-                    "bounds": (left, top, width, height),
-                }
-            )
+class MonitorTable:
+    """Monitor bounds, enumerated once and again only after a display change.
 
-    def _enumerate_windows_monitors(self) -> List[Tuple[int, int, int, int]]:
-        """Return a list of (left, top, width, height) for each Windows monitor."""
-        if not sys.platform.startswith("win"):
-            return []
+    Tk owns the window procedures, so WM_DISPLAYCHANGE isn't seen here. Instead
+    changed() compares the layout (monitor count and virtual screen bounds) with
+    the last one: a few GetSystemMetrics calls, not an enumeration.
+    """
 
-        user32 = ctypes.windll.user32
-        # Ensure coordinates reflect actual pixels per-monitor when possible
-        try:
-            # Make the process per-monitor DPI aware (best effort)
-            ctypes.windll.shcore.SetProcessDpiAwareness(2)
-        except Exception:
+    def __init__(self, root: tk.Tk):
+        self.root = root
+        self.monitors: List[Bounds] = []
+        self.refreshes = 0
+        self._layout: Optional[tuple] = None
+        self._index_by_handle: dict[int, int] = {}
+        if WINDOWS:
+            # Ensure coordinates reflect actual pixels per-monitor when possible
             try:
-                user32.SetProcessDPIAware()
+                ctypes.windll.shcore.SetProcessDpiAwareness(2)
             except Exception:
-                pass
-
-        class RECT(ctypes.Structure):
-            _fields_ = [
-                ("left", ctypes.c_long),
-                ("top", ctypes.c_long),
-                ("right", ctypes.c_long),
-                ("bottom", ctypes.c_long),
-            ]
-
-        class MONITORINFO(ctypes.Structure):
-            _fields_ = [
-                ("cbSize", ctypes.c_ulong),
-                ("rcMonitor", RECT),
-                ("rcWork", RECT),
-                ("dwFlags", ctypes.c_ulong),
-            ]
-
-        MonitorEnumProc = ctypes.WINFUNCTYPE(
-            ctypes.c_int,
-            ctypes.c_void_p,
-            ctypes.c_void_p,
-            ctypes.POINTER(RECT),
-            ctypes.c_longlong,
-        )
+                try:
+                    user32.SetProcessDPIAware()
+                except Exception:
+                    pass
+
+    def _current_layout(self) -> tuple:
+        if WINDOWS:
+            return tuple(
+                user32.GetSystemMetrics(metric)
+                for metric in (
+                    SM_CMONITORS,
+                    SM_XVIRTUALSCREEN,
+                    SM_YVIRTUALSCREEN,
+                    SM_CXVIRTUALSCREEN,
+                    SM_CYVIRTUALSCREEN,
+                )
+            )
+        return self._tk_screen()
+
+    def changed(self) -> bool:
+        """Re-read the monitors if the layout changed since last time. Call it on
+        the Tk thread. True if it changed (including the first call)."""
+        layout = self._current_layout()
+        if layout == self._layout:
+            return False
+        self._layout = layout
+        self.monitors, self._index_by_handle = [], {}
+        if WINDOWS:
+            self._enumerate_windows_monitors()
+        if not self.monitors:
+            # Fallback: single monitor using Tk's primary screen
+            self.monitors = [(0, 0, *self._tk_screen())]
+        self.refreshes += 1
+        return True
 
-        monitors: List[Tuple[int, int, int, int]] = []
+    def _tk_screen(self) -> Tuple[int, int]:
+        return self.root.winfo_screenwidth(), self.root.winfo_screenheight()
 
+    def _enumerate_windows_monitors(self) -> None:
         def _callback(hMonitor, hdcMonitor, lprcMonitor, dwData):
             info = MONITORINFO()
             info.cbSize = ctypes.sizeof(MONITORINFO)
             user32.GetMonitorInfoW(ctypes.c_void_p(hMonitor), ctypes.byref(info))
-            left = int(info.rcMonitor.left)
-            top = int(info.rcMonitor.top)
-            right = int(info.rcMonitor.right)
-            bottom = int(info.rcMonitor.bottom)
-            monitors.append((left, top, right - left, bottom - top))
+            rect = info.rcMonitor
+            self._index_by_handle[hMonitor] = len(self.monitors)
+            self.monitors.append(
+                (rect.left, rect.top, rect.right - rect.left, rect.bottom - rect.top)
+            )
             return 1  # continue enumeration
 
         # EnumDisplayMonitors(NULL, NULL, callback, dwData)
         user32.EnumDisplayMonitors(0, 0, MonitorEnumProc(_callback), 0)
-        return monitors
 
-    def show(self, color: str):
-        """Show the overlay with the specified border color."""
-        monitor_index = self.get_active_monitor_index()
-        for index, item in enumerate(self._overlays):
-            item["canvas"].itemconfig(item["rect"], outline=color)
-            if monitor_index is None or index == monitor_index:
-                item["win"].deiconify()
-            else:
-                item["win"].withdraw()
-        # immediate redraw without mainloop
-        # self.root.update()
+    def active_index(self) -> int:
+        """Index of the monitor with the foreground window (Windows), else 0."""
+        if not WINDOWS:
+            return 0
+        hwnd = user32.GetForegroundWindow()
+        if not hwnd:
+            return 0
+        hmon = user32.MonitorFromWindow(hwnd, MONITOR_DEFAULTTONEAREST)
+        return self._index_by_handle.get(hmon, 0)
 
-    def hide(self):
-        """Hide the overlay border."""
-        for item in self._overlays:
-            item["win"].withdraw()
-        # self.root.update()
 
-    def get_active_monitor_index(self) -> Optional[int]:
-        """Return the index of the monitor containing the foreground window.
+class Border:
+    POLL_MS = 10  # How often the Tk thread applies queued show()/hide() calls
 
-        Windows-only. Returns 0 on non-Windows or when detection fails.
+    def __init__(self, root: tk.Tk):
         """
-        if not sys.platform.startswith("win"):
-            return 0 if self._overlays else None
+        Initialize a border indicator overlay using the provided Tk root.
 
-        try:
-            user32 = ctypes.windll.user32
-
-            # Structures local to this function (duplicated to avoid refactoring)
-            class RECT(ctypes.Structure):
-                _fields_ = [
-                    ("left", ctypes.c_long),
-                    ("top", ctypes.c_long),
-                    ("right", ctypes.c_long),
-                    ("bottom", ctypes.c_long),
-                ]
-
-            class MONITORINFO(ctypes.Structure):
-                _fields_ = [
-                    ("cbSize", ctypes.c_ulong),
-                    ("rcMonitor", RECT),
-                    ("rcWork", RECT),
-                    ("dwFlags", ctypes.c_ulong),
-                ]
-
-            hwnd = user32.GetForegroundWindow()
-            if not hwnd:
-                return 0 if self._overlays else None
-
-            MONITOR_DEFAULTTONEAREST = 2
-            hmon = user32.MonitorFromWindow(
-                ctypes.c_void_p(hwnd), MONITOR_DEFAULTTONEAREST
-            )
-            if not hmon:
-                return 0 if self._overlays else None
+        Windows: shows the border on the monitor with the foreground window.
+        Other OS: shows the border on the primary screen only.
 
-            info = MONITORINFO()
-            info.cbSize = ctypes.sizeof(MONITORINFO)
-            user32.GetMonitorInfoW(ctypes.c_void_p(hmon), ctypes.byref(info))
-
-            left = int(info.rcMonitor.left)
-            top = int(info.rcMonitor.top)
-            right = int(info.rcMonitor.right)
-            bottom = int(info.rcMonitor.bottom)
-            width = right - left
-            height = bottom - top
-
-            # First try exact bounds match
-            for idx, item in enumerate(self._overlays):
-                l, t, w, h = item.get("bounds", (0, 0, 0, 0))
-                if (l, t, w, h) == (left, top, width, height):
-                    return idx
-
-            # Fallback: use center-point containment
-            cx = (left + right) // 2
-            cy = (top + bottom) // 2
-            for idx, item in enumerate(self._overlays):
-                l, t, w, h = item.get("bounds", (0, 0, 0, 0))
-                if l <= cx < l + w and t <= cy < t + h:
-                    return idx
-
-            return 0 if self._overlays else None
-        except Exception:
-            return 0 if self._overlays else None
-
-    # def destroy(self):
-    #     """Destroy the overlay and quit the application."""
-    #     self.win.destroy()
-    #     self.root.destroy()
+        Parameters:
+        - root: the Tk instance managing the mainloop
+        """
+        self.root = root
+        self.thickness = 10
+        self.alpha = 0.8
+        self.monitors = MonitorTable(root)
+        self._edges: List[List[tk.Toplevel]] = []  # Four per monitor
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+
+        # Hide the main root window (we only want our overlays)
+        root.withdraw()
+        self.monitors.changed()
+        self._build()
+        root.after(self.POLL_MS, self._poll)
+
+    def show(self, color: str):
+        """Show the border in *color*. Safe from any thread; returns at once."""
+        self._queue.put(color)
+
+    def hide(self):
+        """Hide the border. Safe from any thread; returns at once."""
+        self._queue.put(None)
+
+    def _poll(self):
+        # Only the newest of any calls queued since the last poll matters
+        latest = pending = object()
+        try:
+            while True:
+                latest = self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        if latest is not pending:
+            if self.monitors.changed():
+                self._build()
+            self._apply(latest)
+        self.root.after(self.POLL_MS, self._poll)
+
+    def _build(self):
+        """One set of edge windows per monitor, all hidden."""
+        for edges in self._edges:
+            for win in edges:
+                win.destroy()
+        t = self.thickness
+        self._edges = [
+            [  # Top, bottom, left, right
+                self._edge_window(left, top, width, t),
+                self._edge_window(left, top + height - t, width, t),
+                self._edge_window(left, top + t, t, height - 2 * t),
+                self._edge_window(left + width - t, top + t, t, height - 2 * t),
+            ]
+            for left, top, width, height in self.monitors.monitors
+        ]
+
+    def _edge_window(self, left: int, top: int, width: int, height: int):
+        win = tk.Toplevel(self.root)
+        win.overrideredirect(True)
+        win.attributes("-topmost", True)
+        win.attributes("-alpha", self.alpha)
+        win.geometry(f"{width}x{height}+{left}+{top}")
+        # Start hidden; use show() to display
+        win.withdraw()
+        return win
+
+    def _apply(self, color: Optional[str]):
+        active = None if color is None else self.monitors.active_index()
+        for index, edges in enumerate(self._edges):
+            for win in edges:
+                if index == active:
+                    win.config(bg=color)
+                    win.deiconify()
+                else:
+                    win.withdraw()
 
 
 if __name__ == "__main__":
-    # 1. Create the Tk root (no mainloop yet)
     root = tk.Tk()
-
-    # 2. Instantiate our indicator
     indicator = Border(root)
 
-    # 3. Use show/hide synchronously; show() already calls update()
-    indicator.show("red")
-    time.sleep(2)
-    indicator.show("orange")
-    time.sleep(2)
-    indicator.hide()
+    # show() and hide() only queue, so the mainloop has to be running to see them
+    def demo():
+        indicator.show("red")
+        time.sleep(2)
+        indicator.show("orange")
+        time.sleep(2)
+        indicator.hide()
 
-    # 4. Enter the Tk event loop:
-    #    - Processes UI events (clicks, redraws)
-    #    - Keeps the window alive until closed or destroy() is called
+    root.after(100, threading.Thread(target=demo).start)
     root.mainloop()
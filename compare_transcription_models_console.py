@@ -1,15 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import html
-import io
+import importlib.util
 import json
-import re
-from difflib import SequenceMatcher
 from pathlib import Path
 import threading
-from timeit import default_timer
 
+import jsonl_log
+import providers
+from audio import Audio, save_wav
 from recorder import Recorder
-from stt import Model, speech_to_text
+from stt import Model, speech_to_text_result, transcription_cache, warm_up
+from text_diff import changed_indexes, tokenize
 
 
 MODELS: list[Model] = [
@@ -21,48 +23,25 @@ MODELS: list[Model] = [
     "chirp_3",
     "gemini-3-flash-preview",
 ]
+# On-device, with the optional dependency installed (`uv sync --extra local`)
+if importlib.util.find_spec("faster_whisper") is not None:
+    MODELS.append("faster-whisper-small.en")
 
 PRIVATE_DIR = Path(".private")
 LAST_RECORDING_PATH = PRIVATE_DIR / "last_recording.wav"
 RESULTS_PATH = PRIVATE_DIR / "transcription_model_results.json"
 HTML_PATH = PRIVATE_DIR / "transcription_diff_views.html"
-TOKEN_RE = re.compile(r"\w+|[^\w\s]|\s+")
+# Max providers called at once. 1 reproduces the old one-at-a-time behaviour.
+MAX_CONCURRENCY = len(MODELS)
+# Reuse earlier transcriptions of identical audio. False calls every provider again.
+USE_CACHE = True
+# The pricing table's rows: the cloud models, less gemini, as in the hand-written
+# table this replaced
 MODEL_PRICING: dict[Model, dict[str, str]] = {
-    "gpt-4o-mini-transcribe-2025-12-15": dict(
-        price="$0.18/hr",
-        note="OpenAI estimated $0.003/min",
-        url="https://platform.openai.com/docs/pricing/",
-    ),
-    "gpt-4o-transcribe": dict(
-        price="$0.36/hr",
-        note="OpenAI estimated $0.006/min",
-        url="https://platform.openai.com/docs/pricing/",
-    ),
-    "mai-transcribe-1": dict(
-        price="~$0.36/hr",
-        note="Azure says LLM Speech shares Fast Transcription pricing; public page hides exact figure",
-        url="https://azure.microsoft.com/en-us/pricing/details/cognitive-services/speech-services/",
-    ),
-    "scribe_v2": dict(
-        price="$0.40/hr",
-        note="ElevenLabs additional-hour API rate",
-        url="https://elevenlabs.io/pricing/api?price.section=speech_to_text",
-    ),
-    "stt-async-v4": dict(
-        price="~$0.10/hr",
-        note="Soniox async pricing",
-        url="https://soniox.com/pricing/",
-    ),
-    "chirp_3": dict(
-        price="$0.96/hr",
-        note="Google $0.016/min for standard v2 models incl. Chirp",
-        url="https://cloud.google.com/speech-to-text/pricing?hl=en",
-    ),
-    # "gemini-3-flash-preview": dict(
-    #     price="~$0.12/hr + output",
-    #     note="Gemini API audio input at $1/1M tokens; audio is 32 tokens/s",
-    #     url="https://ai.google.dev/gemini-api/docs/pricing",
-    # ),
+    model: dict(price=pricing.label, note=pricing.note, url=pricing.url)
+    for provider in providers.PROVIDERS.values()
+    if provider.name not in ("gemini", "local")
+    for model, pricing in provider.models.items()
 }
 
 recorder = Recorder()
@@ -80,37 +59,49 @@ def start():
 
 
 def stop():
-    wav_bytes = recorder.stop()
-    PRIVATE_DIR.mkdir(exist_ok=True)
-    LAST_RECORDING_PATH.write_bytes(wav_bytes.getbuffer())
-    return compare_wav_bytes(wav_bytes.getvalue())
+    audio = recorder.stop()
+    jsonl_log.run(save_wav, audio, LAST_RECORDING_PATH)
+    return compare_wav_bytes(audio.wav)
 
 
 def compare_last_recording():
     compare_wav_bytes(LAST_RECORDING_PATH.read_bytes())
 
 
-def compare_wav_bytes(audio_bytes: bytes):
+def call_model(audio: Audio, model: Model) -> dict:
+    entry = speech_to_text_result(audio, model=model, use_cache=USE_CACHE)
+    # Cached entries keep the provider's original response time for the report,
+    # flagged with cached=True
+    if not entry["cached"]:
+        del entry["cached"]
+    return entry
+
+
+def compare_wav_bytes(audio_bytes: bytes, max_concurrency: int = MAX_CONCURRENCY):
     PRIVATE_DIR.mkdir(exist_ok=True)
     result = dict(recorded_at=datetime.now().isoformat(timespec="seconds"))
-
+    entries = {}
+    # Shared, so models that take the same upload format only encode once
+    audio = Audio(audio_bytes)
+
+    print(f"> Calling {len(MODELS)} models, {max_concurrency} at a time...")
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+        futures = {pool.submit(call_model, audio, model): model for model in MODELS}
+        for future in as_completed(futures):
+            model = futures[future]
+            try:
+                entries[model] = future.result()
+                cached = " cached" if entries[model].get("cached") else ""
+                print(f"> {model} ({entries[model]['response_time_s']}s{cached})")
+                print(entries[model]["text"])
+                print()
+            except Exception as exc:
+                print(f"Skipping {model}. ERROR: {exc}")
+
+    # Save in MODELS order (the first model is the diff root), not completion order
     for model in MODELS:
-        print(f"> Calling {model}...")
-        started_at = default_timer()
-        try:
-            text = speech_to_text(io.BytesIO(audio_bytes), model=model)
-            print(text)
-            print()
-            result[model] = dict(
-                text=text,
-                response_time_s=round(default_timer() - started_at, 2),
-            )
-        except Exception as exc:
-            print(f"Skipping {model}. ERROR: {exc}")
-            # result[model] = dict(
-            #     error=str(exc),
-            #     response_time_s=round(default_timer() - started_at, 2),
-            # )
+        if model in entries:
+            result[model] = entries[model]
 
     if RESULTS_PATH.exists():
         results = json.loads(RESULTS_PATH.read_text())
@@ -119,32 +110,14 @@ def compare_wav_bytes(audio_bytes: bytes):
 
     results.append(result)
     RESULTS_PATH.write_text(json.dumps(results, indent=2))
+    jsonl_log.log(dict(comparison=True, **result))
     write_diff_html(results)
+    print(f"Cache: {transcription_cache.stats()}")
     print(f"Saved to {RESULTS_PATH}")
     print(f"Updated {HTML_PATH}")
     return result
 
 
-def tokenize(text: str) -> list[str]:
-    return TOKEN_RE.findall(text)
-
-
-def changed_indexes(
-    root_tokens: list[str], other_tokens: list[str]
-) -> tuple[set[int], set[int]]:
-    matcher = SequenceMatcher(a=root_tokens, b=other_tokens)
-    root_changes = set()
-    other_changes = set()
-
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-        if tag == "equal":
-            continue
-        root_changes.update(range(i1, i2))
-        other_changes.update(range(j1, j2))
-
-    return root_changes, other_changes
-
-
 def render_text(tokens: list[str], changed: set[int]) -> str:
     parts = []
     for i, token in enumerate(tokens):
@@ -379,5 +352,12 @@ def write_diff_html(results: list[dict]):
     )
 
 
-print("Run start(), then press Enter.")
-print("Or run compare_last_recording().")
+def main():
+    # Load local models now, or the first comparison's time for them is mostly loading
+    warm_up([model for model in MODELS if providers.for_model(model).name == "local"])
+    print("Run start(), then press Enter.")
+    print("Or run compare_last_recording().")
+
+
+if __name__ == "__main__":
+    main()
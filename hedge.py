@@ -0,0 +1,74 @@
+"""Hedged transcription requests, to cut the tail when a provider stalls.
+
+Send to the primary model. If it hasn't answered after its pth percentile latency
+(from latency.py), send the same audio to a secondary model too, and return
+whichever answers first. The slower request can't be cancelled mid-flight; it's
+left to finish in the background, where its result still lands in the cache and
+its latency in the tracker.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from timeit import default_timer
+from typing import Callable
+
+from latency import LatencyTracker, latency_tracker
+
+DEFAULT_PERCENTILE = 90
+# Used until a model has enough recorded latencies to tune the delay from
+DEFAULT_DELAY_S = 2.0
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+
+def hedge_delay(
+    model: str,
+    percentile: float = DEFAULT_PERCENTILE,
+    tracker: LatencyTracker = latency_tracker,
+) -> float:
+    delay_s = tracker.percentile(model, percentile)
+    return DEFAULT_DELAY_S if delay_s is None else delay_s
+
+
+def hedged_speech_to_text(
+    audio,
+    primary: str,
+    secondary: str,
+    percentile: float = DEFAULT_PERCENTILE,
+    delay_s: float | None = None,
+    transcribe: Callable[..., dict] | None = None,
+    tracker: LatencyTracker = latency_tracker,
+) -> dict:
+    """Return dict(text, model, hedged, response_time_s) from the first model to answer.
+
+    delay_s overrides the tuned delay. transcribe(audio, model) -> dict(text=...)
+    defaults to stt.speech_to_text_result; benchmarks pass a mock.
+    """
+    if transcribe is None:
+        from stt import speech_to_text_result as transcribe
+    if delay_s is None:
+        delay_s = hedge_delay(primary, percentile, tracker)
+
+    started_at = default_timer()
+    futures = {_executor.submit(transcribe, audio, primary): primary}
+    done, _ = wait(futures, timeout=delay_s)
+
+    # Hedge when the primary is slow, or when it already failed
+    if not done or next(iter(done)).exception() is not None:
+        futures[_executor.submit(transcribe, audio, secondary)] = secondary
+
+    pending = set(futures)
+    errors = []
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                errors.append(future.exception())
+                continue
+            return dict(
+                text=future.result()["text"],
+                model=futures[future],
+                hedged=len(futures) > 1,
+                response_time_s=round(default_timer() - started_at, 2),
+            )
+
+    raise errors[-1]
@@ -0,0 +1,142 @@
+"""Hotkey combo state machines, indexed by key, and the thread their callbacks run on.
+
+kb.py's low-level hook sees every key event system-wide, and Windows silently
+removes a hook that's slow to return, so the hook only calls ComboIndex.handle():
+one dict lookup for keys no hotkey uses, and for the rest a state update and a
+queue put. Callbacks run on a Dispatcher's one long-lived thread, not a new
+thread per event. Nothing here touches win32, so it runs (and bench_hotkeys.py
+storms it) anywhere.
+"""
+
+import queue
+import threading
+import traceback
+from time import perf_counter, sleep
+from typing import Callable, Iterable
+
+# Callbacks run this long after the key event, once the hook has returned
+DISPATCH_DELAY_S = 0.02
+
+
+class Dispatcher:
+    """Runs callbacks in order on one thread, delay_s after they're submitted."""
+
+    def __init__(self, delay_s: float = DISPATCH_DELAY_S):
+        self.delay_s = delay_s
+        self.dispatched = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, callback: Callable[[], None]) -> None:
+        """Queue *callback*. Never blocks, so it's safe in the hook."""
+        self._queue.put((perf_counter() + self.delay_s, callback))
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while (item := self._queue.get()) is not None:
+            due_at, callback = item
+            sleep(max(0.0, due_at - perf_counter()))
+            try:
+                callback()
+            except Exception:
+                traceback.print_exc()
+            self.dispatched += 1
+
+
+class Combo:
+    """One hotkey's state.
+
+    With a release callback it's a hold hotkey: callback when the whole combo is
+    down, release_callback when any of it comes up. Otherwise it's a toggle:
+    callback once the combo has been held and all of it released. While active,
+    the combo's key presses are swallowed.
+    """
+
+    def __init__(
+        self,
+        vks: Iterable[int],
+        callback: Callable[[], None],
+        release_callback: Callable[[], None] | None = None,
+    ):
+        self.vks = frozenset(vks)
+        self._callback = callback
+        self._release_callback = release_callback
+        self._held: set[int] = set()
+        self._active = False
+        # perf_counter() when the key event that fired the last callback was seen
+        self.triggered_at: float | None = None
+
+    def handle(self, vk: int, down: bool, up: bool) -> tuple[bool, Callable | None]:
+        """*vk*, one of this combo's keys, went down or up. Returns whether to
+        swallow the event, and the callback to run, if any."""
+        if down:
+            self._held.add(vk)
+        elif up:
+            self._held.discard(vk)
+        combo_held = len(self._held) == len(self.vks)
+        callback = None
+
+        if self._release_callback is not None:
+            if not self._active and combo_held:
+                self._active = True
+                self.triggered_at = perf_counter()
+                callback = self._callback
+            elif self._active and not combo_held:
+                self._active = False
+                self._held.clear()
+                self.triggered_at = perf_counter()
+                callback = self._release_callback
+            return self._active and down, callback
+
+        if not self._active and combo_held:
+            self._active = True
+        if self._active and not self._held:
+            self._active = False
+            self.triggered_at = perf_counter()
+            callback = self._callback
+        return self._active and down, callback
+
+
+class ComboIndex:
+    """Combos by virtual-key code, so a key event only reaches the combos using it.
+
+    add() and remove() replace the index rather than changing it, so handle() on
+    the hook thread never needs a lock.
+    """
+
+    def __init__(self, dispatcher: Dispatcher | None = None):
+        self.dispatcher = dispatcher or Dispatcher()
+        self._by_vk: dict[int, tuple[Combo, ...]] = {}
+
+    def __len__(self) -> int:
+        return len({combo for combos in self._by_vk.values() for combo in combos})
+
+    def add(self, combo: Combo) -> None:
+        by_vk = dict(self._by_vk)
+        for vk in combo.vks:
+            by_vk[vk] = (*by_vk.get(vk, ()), combo)
+        self._by_vk = by_vk
+
+    def remove(self, combo: Combo) -> None:
+        by_vk = {
+            vk: tuple(c for c in combos if c is not combo)
+            for vk, combos in self._by_vk.items()
+        }
+        self._by_vk = {vk: combos for vk, combos in by_vk.items() if combos}
+
+    def handle(self, vk: int, down: bool, up: bool) -> bool:
+        """Update the combos using *vk* and queue any callbacks. True to swallow."""
+        combos = self._by_vk.get(vk)
+        if combos is None:
+            return False
+        swallow = False
+        for combo in combos:
+            hit, callback = combo.handle(vk, down, up)
+            swallow |= hit
+            if callback is not None:
+                self.dispatcher.submit(callback)
+        return swallow
@@ -0,0 +1,209 @@
+"""The dictation log, .private/log.jsonl: appended to by a background thread.
+
+log(record) only queues the record, so the hotkey and network threads never wait
+on disk. The writer thread appends one JSON line per record, and fsyncs at most
+once per fsync_interval_s however many records arrive. Lines are only ever
+appended, so a process killed mid-write can at worst leave a partial last line,
+which read_records() skips.
+
+Once the file passes max_bytes (or max_records) it's renamed to
+log-<timestamp>-<n>.jsonl and gzipped, on the writer thread, keeping the newest
+`keep` segments. The counter n tells apart rotations in the same second, and is
+zero-padded so names sort oldest first. run(fn, *args) puts other slow I/O (saving
+last_recording.wav) on the same thread.
+"""
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+LOG_PATH = Path(".private") / "log.jsonl"
+
+
+class JsonlLog:
+    def __init__(
+        self,
+        path: Path = LOG_PATH,
+        max_bytes: int = 1_000_000,
+        max_records: int | None = None,
+        keep: int = 20,
+        fsync_interval_s: float = 1.0,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.keep = keep
+        self.fsync_interval_s = fsync_interval_s
+        self.records_written = 0
+        self.fsyncs = 0
+        self.rotations = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._file = None
+        self._records_in_file = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def log(self, record: dict) -> None:
+        """Queue *record* to be appended. Returns immediately."""
+        self._queue.put(("log", record))
+
+    def run(self, fn: Callable, *args) -> None:
+        """Call fn(*args) on the writer thread, after what's already queued."""
+        self._queue.put(("run", (fn, args)))
+
+    def flush(self) -> None:
+        """Wait until everything queued so far is written and fsynced."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(("close", None))
+            self._thread.join()
+
+    def segments(self) -> list[Path]:
+        """Rotated, compressed segments, oldest first."""
+        return _segments(self.path)
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._records_in_file = 0
+        if self.max_records is not None and self._file.tell():
+            with open(self.path, "rb") as f:
+                self._records_in_file = sum(1 for line in f if line.strip())
+        # Logs written before this module had no trailing newline; so may a crash
+        if self._file.tell():
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write(b"\n")
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        # After the newest this second, even if older ones have been pruned
+        same_second = self.path.parent.glob(f"{self.path.stem}-{stamp}-*.jsonl.gz")
+        counters = (int(p.name.split(".")[0].rsplit("-", 1)[1]) for p in same_second)
+        n = max(counters, default=0) + 1
+        segment = self.path.with_name(f"{self.path.stem}-{stamp}-{n:03d}.jsonl")
+        os.replace(self.path, segment)
+        with open(segment, "rb") as source, gzip.open(f"{segment}.gz", "wb") as target:
+            shutil.copyfileobj(source, target)
+        segment.unlink()
+        self.rotations += 1
+        for old in self.segments()[: -self.keep]:
+            old.unlink(missing_ok=True)
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.fsyncs += 1
+
+    def _run(self) -> None:
+        dirty = False
+        last_sync = 0.0
+        while True:
+            timeout = None
+            if dirty:
+                timeout = max(0.0, last_sync + self.fsync_interval_s - time.monotonic())
+            try:
+                kind, item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                kind, item = "sync", None
+
+            try:
+                if kind == "log":
+                    if self._file is None:
+                        self._open()
+                    line = json.dumps(item, ensure_ascii=False) + "\n"
+                    self._file.write(line.encode())
+                    self.records_written += 1
+                    self._records_in_file += 1
+                    dirty = True
+                    if self._file.tell() >= self.max_bytes or (
+                        self.max_records is not None
+                        and self._records_in_file >= self.max_records
+                    ):
+                        self._sync()
+                        self._rotate()
+                        dirty = False
+                elif kind == "run":
+                    fn, args = item
+                    fn(*args)
+            except Exception as exc:
+                print(f"Log writer: {exc}")
+
+            if dirty and (
+                kind in ("sync", "flush", "close")
+                or time.monotonic() - last_sync >= self.fsync_interval_s
+            ):
+                try:
+                    self._sync()
+                except OSError as exc:
+                    print(f"Log writer: {exc}")
+                dirty = False
+                last_sync = time.monotonic()
+            if kind == "flush":
+                item.set()
+            elif kind == "close":
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                return
+
+
+def _segments(path: Path) -> list[Path]:
+    return sorted(path.parent.glob(f"{path.stem}-*.jsonl.gz"))
+
+
+def read_records(path: Path = LOG_PATH, segments: bool = False) -> Iterator[dict]:
+    """Records in *path*, after those in its rotated segments if *segments*.
+
+    Lines that aren't valid JSON (a write cut short) are skipped.
+    """
+    files = _segments(path) if segments else []
+    for file in [*files, path]:
+        if not file.exists():
+            continue
+        opener = gzip.open if file.suffix == ".gz" else open
+        with opener(file, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    pass
+
+
+_log: JsonlLog | None = None
+_log_lock = threading.Lock()
+
+
+def get_log() -> JsonlLog:
+    """The shared log for LOG_PATH, started on first use and flushed at exit."""
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = JsonlLog()
+            atexit.register(_log.close)
+        return _log
+
+
+def log(record: dict) -> None:
+    """Append *record* to .private/log.jsonl, in the background."""
+    get_log().log(record)
+
+
+def run(fn: Callable, *args) -> None:
+    """Call fn(*args) on the log's writer thread: for I/O the caller needn't wait on."""
+    get_log().run(fn, *args)
@@ -1,6 +1,8 @@
 import ctypes
 import threading
-from typing import Callable, Final, Set, List
+from typing import Callable, Final, List
+
+from hotkeys import Combo, ComboIndex
 
 # ---------------------------------------------------------------------------
 # Win32 constants
@@ -79,21 +81,21 @@ def _key_name_to_vk(name: str) -> int:
 
 
 class _HookThread(threading.Thread):
-    """Runs the message loop and dispatches events to registered instances."""
+    """Runs the message loop and feeds key events to the registered combos."""
 
     def __init__(self):
         super().__init__(daemon=True)
-        self._instances: Set["HotKeyHook"] = set()
+        self._index = ComboIndex()
         self._stop_evt = threading.Event()
         self._hook: int | None = None
 
     # Registration helpers ------------------------------------------------------
     def register(self, inst: "HotKeyHook") -> None:
-        self._instances.add(inst)
+        self._index.add(inst)
 
     def unregister(self, inst: "HotKeyHook") -> None:
-        self._instances.discard(inst)
-        if not self._instances:
+        self._index.remove(inst)
+        if not len(self._index):
             self._stop_evt.set()
             user32.PostThreadMessageW(self.ident, WM_QUIT, 0, 0)  # type: ignore[arg-type]
 
@@ -114,8 +116,10 @@ class _HookThread(threading.Thread):
 
         user32.UnhookWindowsHookEx(self._hook)
         self._hook = None
+        self._index.dispatcher.close()
 
     # Low‑level callback ---------------------------------------------------------
+    # Runs for every key event system-wide: keep it to a lookup and a queue put
     def _callback(self, nCode: int, wParam: int, lParam):  # noqa: N802, ANN001
         if nCode == 0:  # HC_ACTION
             kb = ctypes.cast(lParam, ctypes.POINTER(KBDLLHOOKSTRUCT)).contents
@@ -129,11 +133,7 @@ class _HookThread(threading.Thread):
             vk = _ALIAS_TO_GENERIC.get(kb.vkCode, kb.vkCode)
             down = wParam in (WM_KEYDOWN, WM_SYSKEYDOWN)
             up = wParam in (WM_KEYUP, WM_SYSKEYUP)
-
-            swallow = False
-            for inst in tuple(self._instances):
-                swallow |= inst._handle(vk, down, up)
-            if swallow:
+            if self._index.handle(vk, down, up):
                 return 1
         return user32.CallNextHookEx(self._hook, nCode, wParam, lParam)
 
@@ -155,8 +155,11 @@ def _ensure_thread() -> _HookThread:
 # ---------------------------------------------------------------------------
 
 
-class HotKeyHook:
-    """Internal object representing a registered global hot‑key."""
+class HotKeyHook(Combo):
+    """Internal object representing a registered global hot‑key.
+
+    The combo logic is in hotkeys.Combo; this registers it with the hook thread.
+    """
 
     def __init__(
         self,
@@ -164,45 +167,13 @@ class HotKeyHook:
         callback: Callable[[], None],
         release_callback: Callable[[], None] | None = None,
     ):
+        super().__init__(
+            {_key_name_to_vk(k) for k in combo.split("+")}, callback, release_callback
+        )
         self.combo_string = combo
-        self._combo = {_key_name_to_vk(k) for k in combo.split("+")}
-        self._callback = callback
-        self._release_callback = release_callback
-        self._held: set[int] = set()
-        self._active = False
         self._thread = _ensure_thread()
         self._thread.register(self)
 
-    # Event handler -------------------------------------------------------------
-    def _handle(self, vk: int, down: bool, up: bool) -> bool:
-        if down:
-            self._held.add(vk)
-        elif up:
-            self._held.discard(vk)
-
-        combo_held = self._combo.issubset(self._held)
-
-        if self._release_callback is not None:
-            if not self._active and combo_held:
-                self._active = True
-                threading.Timer(0.02, self._callback).start()
-            elif self._active and not combo_held:
-                self._active = False
-                self._held.clear()
-                threading.Timer(0.02, self._release_callback).start()
-
-            return self._active and down and vk in self._combo
-
-        if not self._active and combo_held:
-            self._active = True
-
-        if self._active and not (self._held & self._combo):
-            self._active = False
-            self._held.clear()
-            threading.Timer(0.02, self._callback).start()
-
-        return self._active and down and vk in self._combo
-
     # Cleanup -------------------------------------------------------------------
     def close(self) -> None:
         self._thread.unregister(self)
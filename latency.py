@@ -0,0 +1,79 @@
+"""Recent response times per model, kept across runs in .private/latencies.json.
+
+speech_to_text records every provider call here. Hedging uses the percentiles to
+decide how long to wait before asking a second model. record() only updates the
+in-memory window: the file is rewritten at most once per save_interval_s, on a
+timer thread, and at exit.
+"""
+
+import atexit
+import json
+import statistics
+import threading
+from pathlib import Path
+
+LATENCIES_PATH = Path(".private") / "latencies.json"
+
+
+class LatencyTracker:
+    def __init__(
+        self,
+        path: Path | None = LATENCIES_PATH,
+        window: int = 200,
+        save_interval_s: float = 5.0,
+    ):
+        """path=None keeps everything in memory."""
+        self.path = path
+        self.window = window
+        self.save_interval_s = save_interval_s
+        self.saves = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # One writer at a time, in order
+        self._save_timer: threading.Timer | None = None
+        self._latencies: dict[str, list[float]] = {}
+        if path is not None and path.exists():
+            try:
+                self._latencies = json.loads(path.read_text())
+            except ValueError:
+                pass
+        if path is not None:
+            atexit.register(self.save)
+
+    def record(self, model: str, seconds: float) -> None:
+        with self._lock:
+            latencies = self._latencies.setdefault(model, [])
+            latencies.append(round(seconds, 3))
+            del latencies[: -self.window]
+            if self.path is not None and self._save_timer is None:
+                self._save_timer = threading.Timer(self.save_interval_s, self.save)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def save(self) -> None:
+        """Write any unsaved latencies to the file now."""
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer is None:
+                    return  # Nothing recorded since the last save
+                self._save_timer.cancel()
+                self._save_timer = None
+                text = json.dumps(self._latencies)
+            self.path.parent.mkdir(exist_ok=True)
+            self.path.write_text(text)
+            self.saves += 1
+
+    def count(self, model: str) -> int:
+        with self._lock:
+            return len(self._latencies.get(model, []))
+
+    def percentile(self, model: str, pct: float) -> float | None:
+        """The *pct*th percentile latency in seconds, or None with under 5 samples."""
+        with self._lock:
+            latencies = list(self._latencies.get(model, []))
+        if len(latencies) < 5:
+            return None
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        return cuts[min(98, max(0, round(pct) - 1))]
+
+
+latency_tracker = LatencyTracker()
@@ -0,0 +1,130 @@
+"""Transcription on this machine with faster-whisper: no network, no per-minute cost.
+
+Needs the optional dependency (`uv sync --extra local`). The first use of a model
+downloads it to the Hugging Face cache; after that it works offline.
+
+Models load on first use (or at warm-up) and stay loaded until they've been idle
+for local_stt_keep_warm_s. Decoding uses local_stt_threads CPU threads, int8
+quantised. faster-whisper decodes in 30 s windows and yields segments as it goes,
+so with local_stt_stream_partials the text of a long recording is typed a window
+at a time rather than all at the end.
+"""
+
+import threading
+import tomllib
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterator
+
+import numpy as np
+
+import providers
+from audio import Upload, parse_wav_header
+
+config = tomllib.loads(Path(__file__).with_name("config.toml").read_text())
+threads = config["local_stt_threads"]
+keep_warm_s = config["local_stt_keep_warm_s"]
+stream_partials = config["local_stt_stream_partials"]
+
+MODEL_PREFIX = "faster-whisper-"
+WHISPER_SAMPLE_RATE = 16_000
+
+_models: dict[str, object] = {}
+_unload_timers: dict[str, threading.Timer] = {}
+_lock = threading.Lock()
+
+
+def _load(model: str):
+    """The loaded WhisperModel for *model* (e.g. "faster-whisper-small.en")."""
+    with _lock:
+        timer = _unload_timers.pop(model, None)
+        if timer is not None:
+            timer.cancel()
+        if model not in _models:
+            from faster_whisper import WhisperModel
+
+            _models[model] = WhisperModel(
+                model.removeprefix(MODEL_PREFIX),
+                device="cpu",
+                compute_type="int8",
+                cpu_threads=threads,
+            )
+        return _models[model]
+
+
+def _release(model: str) -> None:
+    """Done with *model* for now: unload it once it's been idle keep_warm_s."""
+    if keep_warm_s < 0:
+        return
+
+    def unload():
+        with _lock:
+            if _unload_timers.get(model) is timer:
+                del _unload_timers[model]
+                _models.pop(model, None)
+
+    with _lock:
+        timer = threading.Timer(keep_warm_s, unload)
+        timer.daemon = True
+        _unload_timers[model] = timer
+    timer.start()
+
+
+def _samples(upload: Upload) -> np.ndarray:
+    """The upload's WAV as float32 at 16 kHz, which is what Whisper takes."""
+    wav = memoryview(upload.data).cast("B")
+    sample_rate, offset, size = parse_wav_header(wav)
+    samples = np.frombuffer(wav[offset : offset + size], np.int16)
+    samples = samples.astype(np.float32) / 32_768
+    if sample_rate != WHISPER_SAMPLE_RATE:
+        # Linear interpolation: what aliases is above the 8 kHz Whisper listens to
+        n = round(len(samples) * WHISPER_SAMPLE_RATE / sample_rate)
+        positions = np.arange(n) * (sample_rate / WHISPER_SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+        samples = samples.astype(np.float32)
+    return samples
+
+
+def segments(upload: Upload, model: str, vad_filter: bool = True) -> Iterator[str]:
+    """Segment texts, as they're decoded.
+
+    vad_filter drops silence before decoding, as Whisper tends to invent text for
+    long silences. Pass False for audio whose silence has already been trimmed.
+    """
+    whisper = _load(model)
+    try:
+        decoded, _ = whisper.transcribe(
+            _samples(upload),
+            language="en",
+            initial_prompt=providers.for_model(model).prompt,
+            beam_size=1,  # Greedy: most of the accuracy for a fraction of the CPU
+            vad_filter=vad_filter,
+        )
+        for segment in decoded:
+            yield segment.text
+    finally:
+        _release(model)
+
+
+def events(
+    upload: Upload, model: str, vad_filter: bool = True
+) -> Iterator[SimpleNamespace]:
+    """Transcript events shaped like the OpenAI SDK's stream=True ones."""
+    text = ""
+    for segment in segments(upload, model, vad_filter):
+        delta = segment if text else segment.lstrip()
+        text += delta
+        if stream_partials:
+            yield SimpleNamespace(type="transcript.text.delta", delta=delta)
+    if not stream_partials and text:
+        yield SimpleNamespace(type="transcript.text.delta", delta=text)
+    yield SimpleNamespace(type="transcript.text.done", text=text)
+
+
+def transcribe(upload: Upload, model: str) -> str:
+    return "".join(segments(upload, model)).strip()
+
+
+def warm_up(model: str) -> None:
+    _load(model)
+    _release(model)
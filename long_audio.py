@@ -0,0 +1,174 @@
+"""Long-audio mode: split at silences, transcribe chunks in parallel, stitch the text.
+
+One request for a 5-minute dictation takes roughly as long as the audio is long,
+and some providers cap duration (Google's sync recognize takes 60 s). Splitting
+into ~chunk_s pieces bounds post-release latency by the slowest chunk instead.
+
+Cuts go at the quietest point near each evenly spaced boundary, and each chunk
+overlaps its neighbours by overlap_s in case a cut lands in a word. The words
+transcribed twice in an overlap are aligned with text_diff.changed_indexes and
+kept once.
+"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import numpy as np
+
+from audio import Audio, wav_from_frames
+from silence import frame_levels_db
+from text_diff import changed_indexes, tokenize
+
+DEFAULT_CHUNK_S = 30.0
+DEFAULT_OVERLAP_S = 0.5
+# How far from an even split a cut may move to find silence, as a fraction of chunk_s
+SEARCH_FRACTION = 0.2
+FRAME_S = 0.02
+# Words (and punctuation marks) each side of a seam searched for ones transcribed
+# twice: a couple of seconds of speech, comfortably more than the overlap
+SEAM_WORDS = 8
+
+
+def should_split(duration_s: float, chunk_s: float = DEFAULT_CHUNK_S) -> bool:
+    return duration_s > chunk_s * 1.5
+
+
+def cut_points(audio: Audio, chunk_s: float = DEFAULT_CHUNK_S) -> list[int]:
+    """Sample indexes to cut at, including 0 and the end."""
+    samples = np.frombuffer(audio.pcm, np.int16)
+    n_chunks = max(1, math.ceil(audio.duration_s / chunk_s))
+    if n_chunks == 1:
+        return [0, len(samples)]
+
+    frame_len = int(FRAME_S * audio.sample_rate)
+    levels = frame_levels_db(samples, frame_len)
+    # Average over 0.2 s, so a cut prefers a pause to a gap between syllables
+    width = int(0.2 / FRAME_S)
+    levels = np.convolve(levels, np.ones(width) / width, mode="same")
+
+    search = int(chunk_s * SEARCH_FRACTION / FRAME_S)
+    cuts = [0]
+    for i in range(1, n_chunks):
+        target = i * len(levels) // n_chunks
+        lo, hi = max(0, target - search), min(len(levels), target + search)
+        cuts.append((lo + int(np.argmin(levels[lo:hi]))) * frame_len)
+    cuts.append(len(samples))
+    return cuts
+
+
+def split(
+    audio: Audio,
+    chunk_s: float = DEFAULT_CHUNK_S,
+    overlap_s: float = DEFAULT_OVERLAP_S,
+) -> list[Audio]:
+    samples = np.frombuffer(audio.pcm, np.int16)
+    cuts = cut_points(audio, chunk_s)
+    overlap = int(overlap_s * audio.sample_rate)
+    return [
+        Audio(
+            wav_from_frames(
+                [samples[max(0, start - overlap) : end + overlap, None]],
+                audio.sample_rate,
+            )
+        )
+        for start, end in zip(cuts, cuts[1:])
+    ]
+
+
+def _seam(left: list[str], right: list[str]) -> tuple[int, int] | None:
+    """Where to join two transcripts: (last token kept of left, of right's overlap).
+
+    The overlap was transcribed at the end of left and the start of right, so the
+    longest run of words both share is taken to be it, and stray matches of common
+    words ("the") lose to it.
+    """
+    # Align words only: runs of spaces would otherwise pad every match
+    tail = [i for i in range(len(left)) if left[i].strip()][-SEAM_WORDS:]
+    head = [j for j in range(len(right)) if right[j].strip()][:SEAM_WORDS]
+    tail_changes, head_changes = changed_indexes(
+        [left[i].lower() for i in tail], [right[j].lower() for j in head]
+    )
+    # Equal blocks keep their order and length, so unchanged indexes pair up
+    pairs = zip(
+        (i for i in range(len(tail)) if i not in tail_changes),
+        (j for j in range(len(head)) if j not in head_changes),
+    )
+
+    runs: list[list[tuple[int, int]]] = []
+    for i, j in pairs:
+        if runs and runs[-1][-1] == (i - 1, j - 1):
+            runs[-1].append((i, j))
+        else:
+            runs.append([(i, j)])
+
+    def words(run):
+        return sum(left[tail[i]][0].isalnum() for i, _ in run)
+
+    # Ties go to the run nearest the end of left, where the overlap is
+    best = max(runs, key=lambda run: (words(run), run[-1][0]), default=None)
+    if best is None or words(best) == 0:
+        return None
+    i, j = best[-1]
+    return tail[i], head[j]
+
+
+def stitch(texts: list[str]) -> str:
+    """Join chunk transcripts, keeping words repeated across each seam once."""
+    tokens: list[str] = []
+    for text in texts:
+        next_tokens = tokenize(text.strip())
+        if not tokens:
+            tokens = next_tokens
+            continue
+        if not next_tokens:
+            continue
+        seam = _seam(tokens, next_tokens)
+        if seam is None:
+            tokens += [" ", *next_tokens]
+        else:
+            i, j = seam
+            tokens = tokens[: i + 1] + next_tokens[j + 1 :]
+    return "".join(tokens)
+
+
+def chunk_length_for(
+    max_duration_s: float | None,
+    chunk_s: float,
+    overlap_s: float = DEFAULT_OVERLAP_S,
+) -> float:
+    """chunk_s, shrunk so that chunks plus overlaps fit a provider's duration limit."""
+    if max_duration_s is None:
+        return chunk_s
+    # A cut can move SEARCH_FRACTION either way, and chunks overlap on both ends
+    fits = (max_duration_s - 2 * overlap_s) / (1 + 2 * SEARCH_FRACTION)
+    return min(chunk_s, math.floor(fits))
+
+
+def transcribe(
+    audio: Audio,
+    model: str,
+    chunk_s: float = DEFAULT_CHUNK_S,
+    overlap_s: float = DEFAULT_OVERLAP_S,
+    max_duration_s: float | None = None,
+    max_workers: int = 8,
+    transcribe_chunk: Callable[[Audio, str], str] | None = None,
+) -> str:
+    """Transcribe *audio* in parallel chunks with any model stt.py knows.
+
+    Audio is split if it's over 1.5 chunks long, or over max_duration_s (the
+    provider's limit), which also shrinks chunk_s to fit.
+    transcribe_chunk(audio, model) -> text defaults to stt.speech_to_text.
+    """
+    if transcribe_chunk is None:
+        from stt import speech_to_text as transcribe_chunk
+
+    too_long = max_duration_s is not None and audio.duration_s > max_duration_s
+    if not too_long and not should_split(audio.duration_s, chunk_s):
+        return transcribe_chunk(audio, model)
+
+    chunk_s = chunk_length_for(max_duration_s, chunk_s, overlap_s)
+    chunks = split(audio, chunk_s, overlap_s)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        texts = list(pool.map(transcribe_chunk, chunks, [model] * len(chunks)))
+    return stitch(texts)
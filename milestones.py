@@ -0,0 +1,145 @@
+"""Timestamps for each stage of a dictation, to see where the latency goes.
+
+Every dictation logs `milestones_ms` to .private/log.jsonl: milliseconds from the
+hotkey press to each stage it reached. Stages, in the order they usually happen:
+- hotkey_down: the kb hook saw the press
+- callback: the start callback began running (after kb's dispatch delay)
+- ducked: volume.duck() returned (it queues the change for volume's worker thread)
+- stream_started: the input stream was started
+- first_audio: the first block of audio was captured
+- session_ready: (realtime) a session was open to send the audio to
+- hotkey_up: the kb hook saw the release (or the second press, in toggle mode)
+- encoded: (batch) the upload was ready to send, either the recorder's background
+  encode or an encode after the release (e.g. of trimmed audio)
+- upload_done: the upload finished (batch) or the commit was sent (realtime)
+- first_delta, last_delta: transcript text arrived
+- typed: the output writer finished typing it
+
+    python milestones.py             # p50/p95/p99 of each gap, over the whole log
+    python milestones.py --last 50
+    python milestones.py --segments  # include rotated, gzipped logs
+"""
+
+import argparse
+import statistics
+from pathlib import Path
+from time import perf_counter
+
+from jsonl_log import LOG_PATH, read_records
+
+STAGES = (
+    "hotkey_down",
+    "callback",
+    "ducked",
+    "stream_started",
+    "first_audio",
+    "session_ready",
+    "hotkey_up",
+    "encoded",
+    "upload_done",
+    "first_delta",
+    "last_delta",
+    "typed",
+)
+# Gaps between stages worth watching, then end-to-end spans
+GAPS = (
+    ("hotkey_down", "callback"),
+    ("callback", "ducked"),
+    ("ducked", "stream_started"),
+    ("stream_started", "first_audio"),
+    ("hotkey_up", "encoded"),
+    ("encoded", "upload_done"),
+    ("hotkey_up", "upload_done"),
+    ("upload_done", "first_delta"),
+    ("first_delta", "last_delta"),
+    ("last_delta", "typed"),
+    ("hotkey_down", "first_audio"),
+    ("hotkey_down", "session_ready"),
+    ("hotkey_up", "first_delta"),
+    ("hotkey_up", "typed"),
+)
+# Realtime deltas arrive while the user is still speaking, so the time from the
+# release (or the commit) to the first one isn't a latency, and is often negative
+STREAMING_GAPS = tuple(
+    gap
+    for gap in GAPS
+    if gap not in {("upload_done", "first_delta"), ("hotkey_up", "first_delta")}
+) + (("hotkey_down", "first_delta"), ("hotkey_up", "last_delta"))
+
+
+class Milestones:
+    """perf_counter() times of the stages one dictation reaches. Thread-safe enough:
+    each stage is marked from one thread."""
+
+    def __init__(self):
+        self.times: dict[str, float] = {}
+
+    def mark(self, stage: str, at: float | None = None) -> None:
+        """Record *stage* at *at* (default now), unless it's already recorded."""
+        if stage not in self.times:
+            self.times[stage] = perf_counter() if at is None else at
+
+    def mark_latest(self, stage: str, at: float | None = None) -> None:
+        """Record *stage*, replacing an earlier time."""
+        self.times[stage] = perf_counter() if at is None else at
+
+    def as_ms(self) -> dict[str, float]:
+        """Milliseconds from hotkey_down (or the earliest stage), in stage order."""
+        if not self.times:
+            return {}
+        origin = self.times.get("hotkey_down", min(self.times.values()))
+        return {
+            stage: round((self.times[stage] - origin) * 1000, 1)
+            for stage in STAGES
+            if stage in self.times
+        }
+
+
+def _percentile(values: list[float], pct: int) -> float:
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def summarize(records: list[dict]) -> None:
+    records = [record for record in records if "milestones_ms" in record]
+    batch = [r["milestones_ms"] for r in records if not r.get("realtime")]
+    realtime = [r["milestones_ms"] for r in records if r.get("realtime")]
+    for name, milestones, gaps in (
+        ("batch", batch, GAPS),
+        ("realtime", realtime, STREAMING_GAPS),
+    ):
+        if milestones or not records:
+            _print_gaps(name, milestones, gaps)
+
+
+def _print_gaps(name: str, milestones: list[dict], gap_names) -> None:
+    print(f"{len(milestones)} {name} dictations with milestones")
+    print(f"{'gap':<30} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for start, end in gap_names:
+        gaps = [m[end] - m[start] for m in milestones if start in m and end in m]
+        if gaps:
+            print(
+                f"{start + ' -> ' + end:<30} {len(gaps):>5}"
+                f" {statistics.median(gaps):>8.0f} {_percentile(gaps, 95):>8.0f}"
+                f" {_percentile(gaps, 99):>8.0f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", nargs="?", type=Path, default=LOG_PATH)
+    parser.add_argument("--last", type=int, help="only the last N dictations")
+    parser.add_argument(
+        "--segments", action="store_true", help="read rotated segments too"
+    )
+    args = parser.parse_args()
+
+    records = list(read_records(args.path, segments=args.segments))
+    if args.last:
+        records = records[-args.last :]
+    summarize(records)
+
+
+if __name__ == "__main__":
+    main()
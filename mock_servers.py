@@ -0,0 +1,679 @@
+"""Local stand-ins for provider APIs, so benchmarks don't hit the network or cost money.
+
+Servers speak HTTP/1.1 with keep-alive, optionally over TLS with a throwaway
+self-signed certificate; RealtimeMockServer speaks websocket. Network round trips
+are simulated with sleeps: a new connection waits `connect_delay_s` (think TCP +
+TLS handshakes) and every request waits `request_delay_s`. `upload_bytes_per_s`
+throttles how fast request bodies are read, to mimic a slow uplink.
+
+Delays can be a fixed number of seconds or a Latency distribution, sampled per
+request. `error_rate` answers that fraction of transcription requests with a 503.
+`timings` records when each request started, when its body had arrived and when
+the response was sent (perf_counter, so comparable with the client's clock).
+"""
+
+import base64
+import heapq
+import itertools
+import json
+import queue
+import random
+import re
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from functools import cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+@cache
+def _self_signed_cert() -> tuple[str, str]:
+    """Create a localhost cert/key pair once per process, return their paths."""
+    cert_dir = Path(tempfile.mkdtemp(prefix="transcriber-mock-"))
+    cert_path = cert_dir / "cert.pem"
+    key_path = cert_dir / "key.pem"
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-days",
+            "1",
+            "-subj",
+            "/CN=localhost",
+            "-addext",
+            "subjectAltName=DNS:localhost,IP:127.0.0.1",
+            "-keyout",
+            str(key_path),
+            "-out",
+            str(cert_path),
+        ],
+        capture_output=True,
+        check=True,
+    )
+    return str(cert_path), str(key_path)
+
+
+TRANSCRIPTION_PATH_RE = re.compile(r"/v1/transcriptions/([\w-]+)(/transcript)?")
+GEMINI_PATH_RE = re.compile(r"/v1beta/models/([\w.-]+)(:generateContent)?")
+
+
+@dataclass(frozen=True)
+class Latency:
+    """A random delay: log-normal around median_s (sigma=0 makes it fixed), plus a
+    stall of tail_s with probability tail_p, for the occasional slow request."""
+
+    median_s: float
+    sigma: float = 0.0
+    tail_p: float = 0.0
+    tail_s: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        delay = self.median_s * rng.lognormvariate(0, self.sigma)
+        if self.tail_p and rng.random() < self.tail_p:
+            delay += self.tail_s
+        return delay
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    server: "MockServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def parse_request(self) -> bool:
+        self.started_at = time.perf_counter()
+        return super().parse_request()
+
+    def handle_one_request(self):
+        self.started_at = None
+        self.body_read_at = None
+        self.body_bytes = 0
+        super().handle_one_request()
+        if self.started_at is not None:
+            self.server.timings.append(
+                dict(
+                    method=self.command,
+                    path=self.path,
+                    started_at=self.started_at,
+                    body_read_at=self.body_read_at,
+                    body_bytes=self.body_bytes,
+                    done_at=time.perf_counter(),
+                )
+            )
+
+    def read_exactly(self, n: int) -> bytes:
+        rate = self.server.upload_bytes_per_s
+        if not rate:
+            return self.rfile.read(n)
+
+        data = bytearray()
+        started_at = time.monotonic()
+        while len(data) < n:
+            data += self.rfile.read(min(16_384, n - len(data)))
+            ahead_s = len(data) / rate - (time.monotonic() - started_at)
+            if ahead_s > 0:
+                time.sleep(ahead_s)
+        return bytes(data)
+
+    def read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.read_exactly(size))
+                self.rfile.readline()
+            body = b"".join(chunks)
+        else:
+            body = self.read_exactly(int(self.headers.get("Content-Length", 0)))
+        self.body_read_at = time.perf_counter()
+        self.body_bytes = len(body)
+        return body
+
+    def send_json(self, payload, status: int = 200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def simulate_round_trip(self):
+        time.sleep(self.server.sample(self.server.request_delay_s))
+
+    def injected_error(self) -> bool:
+        """Answer with a 503 at the server's error_rate; True if it did."""
+        server = self.server
+        if not server.error_rate or server.rng.random() >= server.error_rate:
+            return False
+        server.errors_injected += 1
+        self.send_json(
+            dict(error=dict(message="Mock server error", code=503)), status=503
+        )
+        return True
+
+
+class EchoHandler(MockHandler):
+    """Accepts any GET/POST and reports how many body bytes arrived."""
+
+    def do_GET(self):
+        self.simulate_round_trip()
+        self.send_json(dict(ok=True, bytes=0))
+
+    def do_POST(self):
+        body = self.read_body()
+        self.simulate_round_trip()
+        self.send_json(dict(ok=True, bytes=len(body)))
+
+
+class DiscardHandler(MockHandler):
+    """Reads request bodies in small pieces and throws them away, keeping no copy."""
+
+    def do_POST(self):
+        remaining = int(self.headers.get("Content-Length", 0))
+        while remaining:
+            remaining -= len(self.rfile.read(min(65_536, remaining)))
+        self.simulate_round_trip()
+        self.send_json(dict(ok=True))
+
+
+class SonioxHandler(MockHandler):
+    """Soniox async REST API: files, transcriptions, status polling and deletes."""
+
+    server: "SonioxMockServer"
+
+    def do_POST(self):
+        body = self.read_body()
+        self.simulate_round_trip()
+        if self.injected_error():
+            return
+        if self.path == "/v1/files":
+            file_id = self.server.new_id("file")
+            self.server.files[file_id] = len(body)
+            self.send_json(dict(id=file_id))
+        elif self.path == "/v1/transcriptions":
+            file_id = json.loads(body)["file_id"]
+            if file_id not in self.server.files:
+                self.send_json(dict(message="file not found"), status=404)
+                return
+            transcription_id = self.server.new_id("tx")
+            self.server.transcriptions[transcription_id] = (
+                time.monotonic() + self.server.sample(self.server.processing_delay_s)
+            )
+            self.send_json(dict(id=transcription_id, status="queued"))
+        else:
+            self.send_json(dict(message="not found"), status=404)
+
+    def do_GET(self):
+        self.simulate_round_trip()
+        match = TRANSCRIPTION_PATH_RE.fullmatch(self.path)
+        if not match or match[1] not in self.server.transcriptions:
+            self.send_json(dict(message="not found"), status=404)
+            return
+
+        done = time.monotonic() >= self.server.transcriptions[match[1]]
+        if match[2]:
+            if not done:
+                self.send_json(dict(message="not completed"), status=409)
+            else:
+                self.send_json(dict(id=match[1], text=self.server.text))
+        else:
+            self.server.status_polls += 1
+            status = "completed" if done else "processing"
+            self.send_json(dict(id=match[1], status=status))
+
+    def do_DELETE(self):
+        self.simulate_round_trip()
+        kind, _, item_id = self.path.removeprefix("/v1/").partition("/")
+        store = self.server.files if kind == "files" else self.server.transcriptions
+        if store.pop(item_id, None) is None:
+            self.send_json(dict(message="not found"), status=404)
+            return
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class OpenAITranscriptionHandler(MockHandler):
+    """POST /v1/audio/transcriptions, with or without stream=true.
+
+    Accepts Content-Length and chunked uploads. Answers first_delta_s after the body
+    has arrived; a streamed answer then sends one word per delta_interval_s as
+    server-sent events, over a chunked response. GET /v1/models/<model> is for
+    warm-up.
+    """
+
+    server: "OpenAIMockServer"
+
+    def do_GET(self):
+        self.simulate_round_trip()
+        model = self.path.rpartition("/")[2]
+        self.send_json(dict(id=model, object="model", created=0, owned_by="openai"))
+
+    def do_POST(self):
+        body = self.read_body()
+        self.server.uploads.append(len(body))
+        self.simulate_round_trip()
+        if self.injected_error():
+            return
+        time.sleep(self.server.sample(self.server.first_delta_s))
+
+        if b'name="stream"\r\n\r\ntrue' not in body:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(self.server.text.encode())))
+            self.end_headers()
+            self.wfile.write(self.server.text.encode())
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = self.server.text.split(" ")
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.server.sample(self.server.delta_interval_s))
+            delta = word if i == 0 else " " + word
+            self.send_event(dict(type="transcript.text.delta", delta=delta))
+        self.send_event(dict(type="transcript.text.done", text=self.server.text))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def send_event(self, event: dict):
+        data = f"data: {json.dumps(event)}\n\n".encode()
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class AzureHandler(MockHandler):
+    """Azure fast transcription: a multipart POST with the audio and a definition."""
+
+    server: "TranscriptionMockServer"
+
+    def do_POST(self):
+        body = self.read_body()
+        self.simulate_round_trip()
+        if not self.path.startswith("/speechtotext/transcriptions:transcribe"):
+            self.send_json(dict(error=dict(message="not found")), status=404)
+            return
+        if b'name="definition"' not in body:
+            self.send_json(dict(error=dict(message="no definition")), status=400)
+            return
+        if self.injected_error():
+            return
+        time.sleep(self.server.sample(self.server.processing_s))
+        self.send_json(
+            dict(
+                durationMilliseconds=0,
+                combinedPhrases=[dict(text=self.server.text)],
+                phrases=[],
+            )
+        )
+
+
+class ElevenLabsHandler(MockHandler):
+    """ElevenLabs speech to text: a multipart POST with the file and model_id."""
+
+    server: "TranscriptionMockServer"
+
+    def do_POST(self):
+        body = self.read_body()
+        self.simulate_round_trip()
+        if self.path != "/v1/speech-to-text":
+            self.send_json(dict(detail="not found"), status=404)
+            return
+        if b'name="model_id"' not in body:
+            self.send_json(dict(detail="model_id is required"), status=422)
+            return
+        if self.injected_error():
+            return
+        time.sleep(self.server.sample(self.server.processing_s))
+        self.send_json(
+            dict(
+                language_code="en",
+                language_probability=1.0,
+                text=self.server.text,
+                words=[],
+            )
+        )
+
+
+class GeminiHandler(MockHandler):
+    """Gemini REST: POST models/<model>:generateContent with inline audio, and
+    GET models/<model> (warm-up)."""
+
+    server: "TranscriptionMockServer"
+
+    def do_GET(self):
+        self.simulate_round_trip()
+        match = GEMINI_PATH_RE.fullmatch(self.path.partition("?")[0])
+        if not match or match[2]:
+            self.send_json(dict(error=dict(code=404, message="not found")), 404)
+            return
+        self.send_json(dict(name=f"models/{match[1]}", displayName=match[1]))
+
+    def do_POST(self):
+        body = self.read_body()
+        self.simulate_round_trip()
+        match = GEMINI_PATH_RE.fullmatch(self.path.partition("?")[0])
+        if not match or not match[2]:
+            self.send_json(dict(error=dict(code=404, message="not found")), 404)
+            return
+        request = json.loads(body)
+        audio = [
+            part["inlineData"]["data"]
+            for content in request["contents"]
+            for part in content["parts"]
+            if "inlineData" in part
+        ]
+        if not audio:
+            self.send_json(dict(error=dict(code=400, message="no audio")), 400)
+            return
+        if self.injected_error():
+            return
+        time.sleep(self.server.sample(self.server.processing_s))
+        self.send_json(
+            dict(
+                candidates=[
+                    dict(
+                        content=dict(parts=[dict(text=self.server.text)], role="model"),
+                        finishReason="STOP",
+                        index=0,
+                    )
+                ],
+                modelVersion=match[1],
+            )
+        )
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        handler: type[MockHandler],
+        tls: bool = False,
+        connect_delay_s: float | Latency = 0.0,
+        request_delay_s: float | Latency = 0.0,
+        upload_bytes_per_s: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = 0,
+    ):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.tls = tls
+        self.connect_delay_s = connect_delay_s
+        self.request_delay_s = request_delay_s
+        self.upload_bytes_per_s = upload_bytes_per_s
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.errors_injected = 0
+        self.timings: list[dict] = []
+        self.connections_accepted = 0
+        self._thread = None
+        self._server_context = None
+        if tls:
+            cert_path, key_path = _self_signed_cert()
+            self._server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            self._server_context.load_cert_chain(cert_path, key_path)
+
+    def sample(self, delay: float | Latency) -> float:
+        return delay.sample(self.rng) if isinstance(delay, Latency) else delay
+
+    @property
+    def base_url(self) -> str:
+        scheme = "https" if self.tls else "http"
+        return f"{scheme}://localhost:{self.server_address[1]}"
+
+    @property
+    def client_context(self) -> ssl.SSLContext | None:
+        """An SSL context that trusts this server's self-signed certificate."""
+        if not self.tls:
+            return None
+        return ssl.create_default_context(cafile=_self_signed_cert()[0])
+
+    def finish_request(self, request, client_address):
+        # Runs on the per-connection thread, so handshakes don't serialise
+        self.connections_accepted += 1
+        # Like real API front ends; otherwise Nagle + delayed ACK adds ~40 ms per response
+        request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        time.sleep(self.sample(self.connect_delay_s))
+        if self._server_context is not None:
+            try:
+                request = self._server_context.wrap_socket(request, server_side=True)
+            except (ssl.SSLError, OSError):
+                return
+        super().finish_request(request, client_address)
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        return False
+
+
+class SonioxMockServer(MockServer):
+    """Transcriptions complete `processing_delay_s` after they are created."""
+
+    def __init__(
+        self,
+        processing_delay_s: float | Latency = 0.5,
+        text: str = "Hello from the mock Soniox server.",
+        **kwargs,
+    ):
+        super().__init__(SonioxHandler, **kwargs)
+        self.processing_delay_s = processing_delay_s
+        self.text = text
+        self.files: dict[str, int] = {}
+        self.transcriptions: dict[str, float] = {}
+        self.status_polls = 0
+        self._ids = itertools.count(1)
+
+    def new_id(self, prefix: str) -> str:
+        return f"{prefix}-{next(self._ids)}"
+
+
+class OpenAIMockServer(MockServer):
+    """The transcription endpoint; `uploads` records the body size of each request."""
+
+    def __init__(
+        self,
+        text: str = "Hello from the mock OpenAI server.",
+        first_delta_s: float | Latency = 0.3,
+        delta_interval_s: float | Latency = 0.02,
+        **kwargs,
+    ):
+        super().__init__(OpenAITranscriptionHandler, **kwargs)
+        self.text = text
+        self.first_delta_s = first_delta_s
+        self.delta_interval_s = delta_interval_s
+        self.uploads: list[int] = []
+
+
+class TranscriptionMockServer(MockServer):
+    """A one-request transcription API (AzureHandler, ElevenLabsHandler,
+    GeminiHandler) that answers processing_s after the upload has arrived."""
+
+    def __init__(
+        self,
+        handler: type[MockHandler],
+        text: str = "Hello from the mock transcription server.",
+        processing_s: float | Latency = 0.3,
+        **kwargs,
+    ):
+        super().__init__(handler, **kwargs)
+        self.text = text
+        self.processing_s = processing_s
+
+
+class RealtimeMockServer:
+    """A websocket stand-in for realtime transcription (client.realtime.connect).
+
+    For every word_s of audio appended it sends a delta naming the word's index
+    (" w0", " w1", ...) delta_delay_s later, as a model transcribing just behind
+    the audio would. A commit flushes the last partial word, then sends the
+    completed event. `appends` records (arrival time, audio bytes) per message.
+    Compression is off by default, so client CPU measures our code, not zlib.
+
+    New connections wait connect_delay_s (handshakes), and the first delta of a
+    session waits session_delay_s more (server-side session setup). Sessions end
+    with a session_expired error after max_session_s, like the real API's cap.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 24_000,
+        word_s: float = 0.3,
+        delta_delay_s: float = 0.05,
+        compression: str | None = None,
+        connect_delay_s: float = 0.0,
+        session_delay_s: float = 0.0,
+        max_session_s: float | None = None,
+    ):
+        self.word_bytes = int(word_s * sample_rate) * 2
+        self.delta_delay_s = delta_delay_s
+        self.compression = compression
+        self.connect_delay_s = connect_delay_s
+        self.session_delay_s = session_delay_s
+        self.max_session_s = max_session_s
+        self.connections_accepted = 0
+        self.appends: list[tuple[float, int]] = []
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        """For OpenAI(websocket_base_url=...)."""
+        return f"ws://127.0.0.1:{self._server.socket.getsockname()[1]}/v1"
+
+    def handle(self, websocket) -> None:
+        outbox: queue.SimpleQueue = queue.SimpleQueue()
+        sender = threading.Thread(
+            target=self._send_due, args=(websocket, outbox), daemon=True
+        )
+        sender.start()
+        self.connections_accepted += 1
+        opened_at = time.perf_counter()
+        # Transcribing can't start until the session is set up
+        ready_at = opened_at + self.session_delay_s
+        outbox.put((0, dict(type="session.created", session={})))
+        if self.max_session_s is not None:
+            expired = dict(
+                type="error",
+                error=dict(
+                    type="invalid_request_error",
+                    code="session_expired",
+                    message="Your session hit the maximum duration.",
+                ),
+            )
+            outbox.put((opened_at + self.max_session_s, expired))
+        received = words = 0
+
+        def send_word(index: int):
+            delta = dict(
+                type="conversation.item.input_audio_transcription.delta",
+                item_id="item_1",
+                content_index=0,
+                delta=f" w{index}",
+            )
+            due = max(time.perf_counter(), ready_at) + self.delta_delay_s
+            outbox.put((due, delta))
+
+        try:
+            for message in websocket:
+                event = json.loads(message)
+                if event["type"] == "session.update":
+                    outbox.put((0, dict(type="session.updated", session={})))
+                elif event["type"] == "input_audio_buffer.append":
+                    size = len(base64.b64decode(event["audio"]))
+                    self.appends.append((time.perf_counter(), size))
+                    received += size
+                    while received >= (words + 1) * self.word_bytes:
+                        send_word(words)
+                        words += 1
+                elif event["type"] == "input_audio_buffer.commit":
+                    if received > words * self.word_bytes:
+                        send_word(words)
+                        words += 1
+                    transcript = "".join(f" w{i}" for i in range(words)).strip()
+                    completed = dict(
+                        type="conversation.item.input_audio_transcription.completed",
+                        item_id="item_1",
+                        content_index=0,
+                        transcript=transcript,
+                    )
+                    due = max(time.perf_counter(), ready_at) + self.delta_delay_s
+                    outbox.put((due, completed))
+        finally:
+            outbox.put(None)
+
+    @staticmethod
+    def _send_due(websocket, outbox: queue.SimpleQueue) -> None:
+        from websockets.exceptions import ConnectionClosed
+
+        pending = []
+        order = itertools.count()  # Ties keep their queue order
+        while True:
+            # Events come out in due order; the expiry is queued long before it's due
+            timeout = max(0, pending[0][0] - time.perf_counter()) if pending else None
+            try:
+                item = outbox.get(timeout=timeout)
+            except queue.Empty:
+                due, _, event = heapq.heappop(pending)
+                try:
+                    websocket.send(json.dumps(event))
+                except ConnectionClosed:
+                    return
+                if event.get("error", {}).get("code") == "session_expired":
+                    websocket.close()
+                    return
+                continue
+            if item is None:
+                return
+            heapq.heappush(pending, (item[0], next(order), item[1]))
+
+    def _delay_connect(self, connection, request):
+        time.sleep(self.connect_delay_s)
+
+    def start(self) -> "RealtimeMockServer":
+        from websockets.sync.server import serve
+
+        self._server = serve(
+            self.handle,
+            "127.0.0.1",
+            0,
+            compression=self.compression,
+            process_request=self._delay_connect,
+        )
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        return False
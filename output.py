@@ -0,0 +1,279 @@
+"""Type transcripts into the focused window from a dedicated writer thread.
+
+keyboard.write() synthesizes a key press per character, so typing a delta takes
+longer than receiving the next one. Called from the network loop, that held up
+reading later deltas. OutputWriter takes deltas from a queue, joins whatever has
+piled up while the last batch was typed, and hands it to a Sink in one call.
+
+Sinks:
+- KeystrokeSink: keyboard.write(), one synthesized key press per character
+- SendInputSink: one Win32 SendInput call per batch, as KEYEVENTF_UNICODE events
+- PasteSink: put the batch on the clipboard, paste it, restore the clipboard
+- FakeSink: records what it's given, with simulated costs, for benchmarks
+"""
+
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import Literal, Protocol
+
+OutputMethod = Literal["keystrokes", "sendinput", "paste"]
+
+
+class Sink(Protocol):
+    def write(self, text: str) -> None:
+        """Type *text*. Called on the writer thread only."""
+
+    def finish(self) -> None:
+        """The dictation's text is all written."""
+
+
+class KeystrokeSink:
+    def __init__(self):
+        import keyboard
+
+        self._write = keyboard.write
+
+    def write(self, text: str) -> None:
+        self._write(text)
+
+    def finish(self) -> None:
+        pass
+
+
+class SendInputSink:
+    """All of a batch's characters in one SendInput call (Windows)."""
+
+    INPUT_KEYBOARD = 1
+    KEYEVENTF_KEYUP = 0x0002
+    KEYEVENTF_UNICODE = 0x0004
+    VK_RETURN = 0x0D
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        class KEYBDINPUT(ctypes.Structure):
+            _fields_ = [
+                ("wVk", wintypes.WORD),
+                ("wScan", wintypes.WORD),
+                ("dwFlags", wintypes.DWORD),
+                ("time", wintypes.DWORD),
+                ("dwExtraInfo", ctypes.c_size_t),
+            ]
+
+        class MOUSEINPUT(ctypes.Structure):
+            _fields_ = [
+                ("dx", wintypes.LONG),
+                ("dy", wintypes.LONG),
+                ("mouseData", wintypes.DWORD),
+                ("dwFlags", wintypes.DWORD),
+                ("time", wintypes.DWORD),
+                ("dwExtraInfo", ctypes.c_size_t),
+            ]
+
+        class INPUTUNION(ctypes.Union):
+            # MOUSEINPUT is the largest member, so it sets INPUT's size
+            _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT)]
+
+        class INPUT(ctypes.Structure):
+            _fields_ = [("type", wintypes.DWORD), ("u", INPUTUNION)]
+
+        self._INPUT = INPUT
+        self._send_input = ctypes.windll.user32.SendInput  # type: ignore[attr-defined]
+        self._sizeof_input = ctypes.sizeof(INPUT)
+
+    def write(self, text: str) -> None:
+        events = []
+        for line_number, line in enumerate(text.split("\n")):
+            if line_number:
+                # Apps treat a unicode "\n" inconsistently; Enter is unambiguous
+                events += [(self.VK_RETURN, 0, 0), (self.VK_RETURN, 0, 1)]
+            units = line.encode("utf-16-le")
+            # UTF-16 code units, so characters outside the BMP go as surrogate pairs
+            for i in range(0, len(units), 2):
+                code_unit = units[i] | units[i + 1] << 8
+                events += [(0, code_unit, 0), (0, code_unit, 1)]
+
+        inputs = (self._INPUT * len(events))()
+        for event, (vk, scan, up) in zip(inputs, events):
+            event.type = self.INPUT_KEYBOARD
+            event.u.ki.wVk = vk
+            event.u.ki.wScan = scan
+            event.u.ki.dwFlags = (self.KEYEVENTF_UNICODE if scan else 0) | (
+                self.KEYEVENTF_KEYUP if up else 0
+            )
+        sent = self._send_input(len(inputs), inputs, self._sizeof_input)
+        if sent != len(inputs):
+            raise OSError(f"SendInput sent {sent} of {len(inputs)} key events")
+
+    def finish(self) -> None:
+        pass
+
+
+class PasteSink:
+    """Paste each batch through the clipboard, then put back what was there.
+
+    Only text clipboard contents are restored. The restore waits restore_delay_s
+    after the last paste, since the target app reads the clipboard asynchronously.
+    It runs on a timer, so finish() returns at once rather than holding up the
+    writer. Pasting again before then cancels it, keeping the clipboard saved
+    before the first paste.
+    """
+
+    def __init__(self, restore_delay_s: float = 0.3):
+        import keyboard
+
+        self._send = keyboard.send
+        self.restore_delay_s = restore_delay_s
+        self._saved: str | None = None
+        self._pasted = False
+        self._restore_timer: threading.Timer | None = None
+        self._lock = threading.Lock()  # The timer restores on its own thread
+        if sys.platform.startswith("win"):
+            import win32clipboard
+
+            self._clipboard = win32clipboard
+        elif sys.platform != "darwin":
+            raise OSError("Paste output is only supported on Windows and macOS")
+
+    def _get(self) -> str | None:
+        if sys.platform == "darwin":
+            return subprocess.run(["pbpaste"], capture_output=True, text=True).stdout
+        self._clipboard.OpenClipboard()
+        try:
+            if not self._clipboard.IsClipboardFormatAvailable(
+                self._clipboard.CF_UNICODETEXT
+            ):
+                return None
+            return self._clipboard.GetClipboardData(self._clipboard.CF_UNICODETEXT)
+        finally:
+            self._clipboard.CloseClipboard()
+
+    def _set(self, text: str) -> None:
+        if sys.platform == "darwin":
+            subprocess.run(["pbcopy"], input=text, text=True, check=True)
+            return
+        self._clipboard.OpenClipboard()
+        try:
+            self._clipboard.EmptyClipboard()
+            self._clipboard.SetClipboardData(self._clipboard.CF_UNICODETEXT, text)
+        finally:
+            self._clipboard.CloseClipboard()
+
+    def write(self, text: str) -> None:
+        with self._lock:
+            if self._restore_timer is not None:
+                self._restore_timer.cancel()
+                self._restore_timer = None
+            if not self._pasted:
+                self._saved = self._get()
+                self._pasted = True
+            self._set(text)
+            self._send("command+v" if sys.platform == "darwin" else "ctrl+v")
+
+    def finish(self) -> None:
+        with self._lock:
+            if not self._pasted or self._restore_timer is not None:
+                return
+            # Not a daemon, so a restore still due at exit happens
+            self._restore_timer = threading.Timer(self.restore_delay_s, self._restore)
+            self._restore_timer.start()
+
+    def _restore(self) -> None:
+        with self._lock:
+            if self._restore_timer is not threading.current_thread():
+                return  # Cancelled by a paste after the timer fired
+            self._restore_timer = None
+            if self._saved is not None:
+                self._set(self._saved)
+            self._saved = None
+            self._pasted = False
+
+
+class FakeSink:
+    """Collects output instead of typing it, taking per_call_s + per_char_s each
+    write to stand in for a real sink's cost."""
+
+    def __init__(self, per_call_s: float = 0.0, per_char_s: float = 0.0):
+        self.per_call_s = per_call_s
+        self.per_char_s = per_char_s
+        self.writes: list[str] = []
+        self.finishes = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.writes)
+
+    def write(self, text: str) -> None:
+        time.sleep(self.per_call_s + self.per_char_s * len(text))
+        self.writes.append(text)
+
+    def finish(self) -> None:
+        self.finishes += 1
+
+
+def make_sink(method: OutputMethod) -> Sink:
+    if method == "sendinput":
+        return SendInputSink()
+    if method == "paste":
+        return PasteSink()
+    return KeystrokeSink()
+
+
+class OutputWriter:
+    """Types text on its own thread, coalescing what queues up behind a slow sink."""
+
+    def __init__(self, sink: Sink):
+        self.sink = sink
+        self.chars = 0
+        self.sink_calls = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, text: str) -> None:
+        """Queue *text* to be typed. Returns immediately."""
+        if text:
+            self._queue.put(text)
+
+    def flush(self) -> None:
+        """Wait until everything written so far has been typed, then finish the sink."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            texts = []
+            # Text that arrived while the last batch was typed goes in one call
+            while isinstance(item, str):
+                texts.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = ""
+                    break
+            if texts:
+                text = "".join(texts)
+                try:
+                    self.sink.write(text)
+                except Exception as exc:
+                    print(f"Output failed: {exc}")
+                self.chars += len(text)
+                self.sink_calls += 1
+            if isinstance(item, threading.Event):
+                try:
+                    self.sink.finish()
+                except Exception as exc:
+                    print(f"Output failed: {exc}")
+                item.set()
+            elif item is None:
+                return
@@ -0,0 +1,114 @@
+"""Upload a recording to OpenAI while it's still being recorded.
+
+The transcription request is opened when recording starts. The audio goes up as
+a chunked-transfer multipart body: a WAV header with the placeholder "unknown"
+length, then PCM as the recorder captures it. When the hotkey is released only
+the last few hundred milliseconds are left to send, not the whole recording. The
+answer streams back as server-sent events, as with the SDK's stream=True.
+"""
+
+import json
+import os
+import queue
+import threading
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Iterable, Iterator
+
+import sessions
+from audio import wav_header
+
+# The SDK's variable, so replay.py can point both at a local stand-in
+OPENAI_URL = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1")
+
+
+def iter_events(lines: Iterable[bytes]) -> Iterator[dict]:
+    """Parse server-sent events whose data is JSON."""
+    for line in lines:
+        if line.startswith(b"data:"):
+            data = line[5:].strip()
+            if data and data != b"[DONE]":
+                yield json.loads(data)
+
+
+class PipelinedTranscription:
+    """One streamed transcription request, fed by `write()` from the audio callback."""
+
+    def __init__(
+        self,
+        model: str,
+        sample_rate: int,
+        prompt: str = "",
+        language: str = "en",
+        base_url: str = OPENAI_URL,
+        api_key: str | None = None,
+    ):
+        self.sample_rate = sample_rate
+        self.bytes_sent = 0
+        # perf_counter() time the last of the audio was handed to the socket
+        self.upload_done_at: float | None = None
+        self._chunks: queue.SimpleQueue = queue.SimpleQueue()
+        self._events: queue.SimpleQueue = queue.SimpleQueue()
+
+        body = (
+            sessions.MultipartBody()
+            .add_field("model", model)
+            .add_field("language", language)
+            .add_field("response_format", "text")
+            .add_field("prompt", prompt)
+            .add_field("stream", "true")
+            .add_file_stream("file", "audio.wav", "audio/wav", self._wav_chunks())
+        )
+        api_key = api_key or os.environ["OPENAI_API_KEY"]
+        headers = body.headers() | {"Authorization": f"Bearer {api_key}"}
+        self._thread = threading.Thread(
+            target=self._send,
+            args=(sessions.get_session(base_url), body, headers),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def write(self, samples) -> None:
+        """Queue captured int16 samples. Safe to call from the audio callback."""
+        self._chunks.put(samples)
+
+    def _wav_chunks(self) -> Iterator[bytes]:
+        yield wav_header(None, self.sample_rate)
+        while True:
+            chunks = [self._chunks.get()]
+            # Whatever piled up while the last chunk was sent goes as one chunk
+            while True:
+                try:
+                    chunks.append(self._chunks.get_nowait())
+                except queue.Empty:
+                    break
+            done = chunks[-1] is None
+            if done:
+                chunks.pop()
+            if chunks:
+                data = b"".join(memoryview(chunk).cast("B") for chunk in chunks)
+                self.bytes_sent += len(data)
+                yield data
+            if done:
+                self.upload_done_at = perf_counter()
+                return
+
+    def _send(self, session: sessions.HTTPSession, body, headers: dict) -> None:
+        try:
+            lines = session.stream(
+                "POST", "/audio/transcriptions", body=body, headers=headers
+            )
+            for event in iter_events(lines):
+                self._events.put(event)
+        except Exception as exc:
+            self._events.put(exc)
+        finally:
+            self._events.put(None)
+
+    def finish(self) -> Iterator[SimpleNamespace]:
+        """End the upload and yield the response events, shaped like the SDK's."""
+        self._chunks.put(None)
+        while (event := self._events.get()) is not None:
+            if isinstance(event, Exception):
+                raise event
+            yield SimpleNamespace(**event)
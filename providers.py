@@ -0,0 +1,287 @@
+"""Registry of speech-to-text backends and what each one supports.
+
+Each Provider names its backend function as "module:function", imported on first
+use, so adding a provider is one `register()` call and a module; stt.py's
+dispatcher doesn't change. Capabilities drive payload adaptation (codec, sample
+rate, size limits) and `choose()`, which picks the cheapest model meeting a set of
+requirements.
+"""
+
+import importlib
+from dataclasses import dataclass, field
+from typing import Callable
+
+from audio import Audio, Upload, UploadFormat
+from latency import LatencyTracker, latency_tracker
+
+LOSSLESS_FORMATS: set[UploadFormat] = {"wav", "flac"}
+
+
+@dataclass(frozen=True)
+class Pricing:
+    usd_per_hour: float
+    label: str  # Shown in the comparison report, e.g. "~$0.36/hr"
+    note: str
+    url: str
+
+
+@dataclass
+class Provider:
+    name: str
+    target: str  # "module:function", called as function(upload, model) -> str
+    models: dict[str, Pricing]
+    codecs: tuple[UploadFormat, ...]  # Accepted upload formats, preferred first
+    sample_rate: int  # Preferred rate for lossless uploads
+    streaming: bool = False
+    max_payload_bytes: int | None = None
+    max_duration_s: float | None = None
+    warm_up_target: str | None = None  # "module:function", called with the model
+    prompt: str = ""  # Sent with every request, so part of the cache key
+    _loaded: dict[str, Callable] = field(default_factory=dict, repr=False)
+
+    def _load(self, target: str) -> Callable:
+        if target not in self._loaded:
+            module_name, _, attr = target.partition(":")
+            self._loaded[target] = getattr(importlib.import_module(module_name), attr)
+        return self._loaded[target]
+
+    def prepare(
+        self, audio: Audio, upload_format: UploadFormat | None = None
+    ) -> Upload:
+        """Encode *audio* the way this provider wants it, checking size limits.
+
+        Lossy codecs are fixed-bitrate, so they keep the recording's rate (which
+        also lets the recorder's background encode be reused).
+        """
+        upload_format = upload_format or self.codecs[0]
+        if upload_format not in self.codecs:
+            raise ValueError(f"{self.name} doesn't accept {upload_format} uploads")
+        if self.max_duration_s and audio.duration_s > self.max_duration_s:
+            raise ValueError(
+                f"{self.name} takes at most {self.max_duration_s:g}s of audio,"
+                f" got {audio.duration_s:.1f}s"
+            )
+
+        sample_rate = self.sample_rate if upload_format in LOSSLESS_FORMATS else None
+        upload = audio.upload(upload_format, sample_rate)
+        if self.max_payload_bytes and len(upload.data) > self.max_payload_bytes:
+            raise ValueError(
+                f"{self.name} takes at most {self.max_payload_bytes:,} bytes,"
+                f" got {len(upload.data):,}"
+            )
+        return upload
+
+    def transcribe(self, upload: Upload, model: str) -> str:
+        return self._load(self.target)(upload, model)
+
+    def warm_up(self, model: str) -> None:
+        if self.warm_up_target:
+            self._load(self.warm_up_target)(model)
+
+
+PROVIDERS: dict[str, Provider] = {}
+
+
+def register(provider: Provider) -> Provider:
+    PROVIDERS[provider.name] = provider
+    return provider
+
+
+def for_model(model: str) -> Provider:
+    for provider in PROVIDERS.values():
+        if model in provider.models:
+            return provider
+    raise KeyError(f"No registered provider serves {model}")
+
+
+def pricing(model: str) -> Pricing:
+    return for_model(model).models[model]
+
+
+def choose(
+    must_stream: bool = False,
+    max_p95_s: float | None = None,
+    upload_format: UploadFormat | None = None,
+    audio_s: float | None = None,
+    candidates: list[str] | None = None,
+    tracker: LatencyTracker = latency_tracker,
+) -> str:
+    """Cheapest model that meets every requirement given.
+
+    max_p95_s needs recorded latencies (latency.py); models without enough history
+    don't qualify.
+    """
+    options = sorted(
+        (pricing.usd_per_hour, model, provider)
+        for provider in PROVIDERS.values()
+        for model, pricing in provider.models.items()
+        if candidates is None or model in candidates
+    )
+    for _, model, provider in options:
+        if must_stream and not provider.streaming:
+            continue
+        if upload_format and upload_format not in provider.codecs:
+            continue
+        if audio_s and provider.max_duration_s and audio_s > provider.max_duration_s:
+            continue
+        if max_p95_s is not None:
+            p95 = tracker.percentile(model, 95)
+            if p95 is None or p95 > max_p95_s:
+                continue
+        return model
+    raise LookupError("No registered model meets those requirements")
+
+
+# ---------------------------------------------------------------------------
+# Built-in providers. Backends live in stt.py (and soniox.py, local_stt.py).
+# ---------------------------------------------------------------------------
+register(
+    Provider(
+        name="openai",
+        target="stt:openai_stt",
+        warm_up_target="stt:warm_up_openai",
+        prompt=(
+            "Use unicode characters where appropriate, like 'CO₂' and '45°'."
+            " Use UK spelling, not US spelling."
+        ),
+        models={
+            "gpt-4o-mini-transcribe-2025-12-15": Pricing(
+                0.18,
+                "$0.18/hr",
+                "OpenAI estimated $0.003/min",
+                "https://platform.openai.com/docs/pricing/",
+            ),
+            "gpt-4o-transcribe": Pricing(
+                0.36,
+                "$0.36/hr",
+                "OpenAI estimated $0.006/min",
+                "https://platform.openai.com/docs/pricing/",
+            ),
+        },
+        codecs=("opus", "mp3", "flac", "wav"),
+        sample_rate=24_000,
+        streaming=True,
+        max_payload_bytes=25 * 1024 * 1024,
+    )
+)
+register(
+    Provider(
+        name="azure",
+        target="stt:microsoft_stt",
+        warm_up_target="stt:warm_up_azure",
+        models={
+            "mai-transcribe-1": Pricing(
+                0.36,
+                "~$0.36/hr",
+                "Azure says LLM Speech shares Fast Transcription pricing; public page hides exact figure",
+                "https://azure.microsoft.com/en-us/pricing/details/cognitive-services/speech-services/",
+            ),
+        },
+        codecs=("opus", "mp3", "flac", "wav"),
+        sample_rate=16_000,
+        max_payload_bytes=300 * 1024 * 1024,
+        max_duration_s=2 * 3600,
+    )
+)
+register(
+    Provider(
+        name="elevenlabs",
+        target="stt:elevenlabs_stt",
+        warm_up_target="stt:warm_up_elevenlabs",
+        models={
+            "scribe_v2": Pricing(
+                0.40,
+                "$0.40/hr",
+                "ElevenLabs additional-hour API rate",
+                "https://elevenlabs.io/pricing/api?price.section=speech_to_text",
+            ),
+        },
+        codecs=("opus", "mp3", "flac", "wav"),
+        sample_rate=16_000,
+        max_payload_bytes=3 * 1024**3,
+    )
+)
+register(
+    Provider(
+        name="soniox",
+        target="stt:soniox_stt",
+        warm_up_target="stt:warm_up_soniox",
+        models={
+            "stt-async-v4": Pricing(
+                0.10,
+                "~$0.10/hr",
+                "Soniox async pricing",
+                "https://soniox.com/pricing/",
+            ),
+        },
+        codecs=("opus", "mp3", "flac", "wav"),
+        sample_rate=16_000,
+    )
+)
+register(
+    Provider(
+        name="google",
+        target="stt:google_stt",
+        warm_up_target="stt:warm_up_google",
+        models={
+            "chirp_3": Pricing(
+                0.96,
+                "$0.96/hr",
+                "Google $0.016/min for standard v2 models incl. Chirp",
+                "https://cloud.google.com/speech-to-text/pricing?hl=en",
+            ),
+        },
+        # Auto-detect decoding is documented for FLAC, not Ogg/Opus
+        codecs=("flac", "wav"),
+        sample_rate=16_000,
+        # Synchronous recognize() limits
+        max_payload_bytes=10 * 1024 * 1024,
+        max_duration_s=60,
+    )
+)
+register(
+    Provider(
+        name="gemini",
+        target="stt:gemini_stt",
+        warm_up_target="stt:warm_up_gemini",
+        prompt="Generate a transcript of the speech. Use UK spelling, not US spelling.",
+        models={
+            "gemini-3-flash-preview": Pricing(
+                0.12,
+                "~$0.12/hr + output",
+                "Gemini API audio input at $1/1M tokens; audio is 32 tokens/s",
+                "https://ai.google.dev/gemini-api/docs/pricing",
+            ),
+        },
+        codecs=("opus", "mp3", "flac", "wav"),
+        sample_rate=16_000,
+        max_payload_bytes=20 * 1024 * 1024,  # Inline data limit
+    )
+)
+register(
+    Provider(
+        name="local",
+        target="local_stt:transcribe",
+        warm_up_target="local_stt:warm_up",
+        prompt="Use UK spelling, not US spelling.",
+        models={
+            "faster-whisper-small.en": Pricing(
+                0.0,
+                "$0 (local)",
+                "faster-whisper int8 on this machine's CPU; no network",
+                "https://github.com/SYSTRAN/faster-whisper",
+            ),
+            "faster-whisper-base.en": Pricing(
+                0.0,
+                "$0 (local)",
+                "faster-whisper int8 on this machine's CPU; faster, less accurate",
+                "https://github.com/SYSTRAN/faster-whisper",
+            ),
+        },
+        codecs=("wav",),
+        # The recording's rate, so prepare() passes the WAV through without ffmpeg;
+        # local_stt resamples to Whisper's 16 kHz itself
+        sample_rate=24_000,
+        streaming=True,
+    )
+)
@@ -0,0 +1,95 @@
+"""Batch microphone blocks into fewer, larger realtime `input_audio_buffer.append`s.
+
+PortAudio calls back every ~10 ms. Sending each block as its own message means
+hundreds of small JSON messages a minute, each copied into bytes, base64-encoded,
+run through the SDK's request transform and json.dumps. AudioBatcher instead
+appends blocks into a reusable bytearray and hands the sender one window_ms
+batch at a time; append_message builds the event JSON directly.
+"""
+
+import binascii
+import threading
+from timeit import default_timer
+from typing import Iterator
+
+APPEND_PREFIX = '{"type":"input_audio_buffer.append","audio":"'
+
+
+def append_message(pcm) -> str:
+    """The input_audio_buffer.append event for *pcm*, ready for send_raw()."""
+    # Base64 output needs no JSON escaping, so the event can be built as a string
+    return APPEND_PREFIX + binascii.b2a_base64(pcm, newline=False).decode() + '"}'
+
+
+class AudioBatcher:
+    """Coalesces audio callback blocks into window_ms batches for one sender thread.
+
+    Two bytearrays swap roles: the callback appends into one while the sender
+    encodes the other, so neither allocates per block once they've reached size.
+    """
+
+    def __init__(self, sample_rate: int, window_ms: float = 100, sample_width: int = 2):
+        self.bytes_per_s = sample_rate * sample_width
+        self.window_bytes = max(
+            sample_width, round(sample_rate * window_ms / 1000) * sample_width
+        )
+        self.messages = 0
+        self.max_depth_bytes = 0
+        self._filling = bytearray(2 * self.window_bytes)
+        self._sending = bytearray(2 * self.window_bytes)
+        self._length = 0
+        self._closed = False
+        self._ready = threading.Condition()
+        self._started_at: float | None = None
+
+    def write(self, block) -> None:
+        """Append a block of samples. Safe to call from the audio callback."""
+        data = memoryview(block).cast("B")
+        with self._ready:
+            end = self._length + len(data)
+            # Grows the buffer only if the sender has fallen more than a window behind
+            self._filling[self._length : end] = data
+            self._length = end
+            self.max_depth_bytes = max(self.max_depth_bytes, end)
+            if self._started_at is None:
+                self._started_at = default_timer()
+            if end >= self.window_bytes:
+                self._ready.notify()
+
+    def close(self) -> None:
+        """No more audio: the sender gets what's buffered, then iteration ends."""
+        with self._ready:
+            self._closed = True
+            self._ready.notify()
+
+    def __iter__(self) -> Iterator[memoryview]:
+        """Yield batches as they fill. Each view is only valid until the next one."""
+        while True:
+            with self._ready:
+                self._ready.wait_for(
+                    lambda: self._length >= self.window_bytes or self._closed
+                )
+                if not self._length:
+                    return
+                self._filling, self._sending = self._sending, self._filling
+                length, self._length = self._length, 0
+            self.messages += 1
+            # Released before the swap back, which may need to resize the buffer
+            with memoryview(self._sending)[:length] as batch:
+                yield batch
+
+    @property
+    def depth_ms(self) -> float:
+        """Audio captured but not yet handed to the sender."""
+        return self._length / self.bytes_per_s * 1000
+
+    @property
+    def max_depth_ms(self) -> float:
+        return self.max_depth_bytes / self.bytes_per_s * 1000
+
+    @property
+    def message_rate(self) -> float:
+        """Batches handed to the sender per second since the first block."""
+        if self._started_at is None:
+            return 0.0
+        return self.messages / max(default_timer() - self._started_at, 1e-9)
@@ -0,0 +1,195 @@
+"""Keep a realtime transcription session open between dictations.
+
+Opening a session costs a websocket + TLS handshake and a session.update before
+the server can transcribe anything, which used to land between the hotkey press
+and the first delta. WarmSessions connects ahead of time and, since a
+transcription session can commit any number of buffers, reuses the connection
+for the next dictation. Sessions the server closes (idle timeouts, errors) or
+that near the API's session length cap are replaced in the background.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from timeit import default_timer
+
+# The API caps how long a session lives; replace idle ones well before that
+MAX_AGE_S = 20 * 60
+
+
+class RealtimeSession:
+    """One connection. Its events are read on a background thread into `events`,
+    ending with None when the connection closes."""
+
+    def __init__(self, connection, connect_s: float, on_closed=None):
+        self.connection = connection
+        self.connect_s = connect_s
+        self.opened_at = default_timer()
+        self.events: queue.SimpleQueue = queue.SimpleQueue()
+        self.closed = threading.Event()
+        self.uses = 0
+        self._on_closed = on_closed
+
+    @property
+    def age_s(self) -> float:
+        return default_timer() - self.opened_at
+
+    def clear_events(self) -> None:
+        """Drop events that arrived while idle (session.created, session.updated)."""
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return
+            if event is None:
+                self.events.put(None)
+                return
+
+    def read_events(self) -> None:
+        try:
+            while True:
+                event = self.connection.recv()
+                self.events.put(event)
+                if event.type == "error" and event.error.code == "session_expired":
+                    self.connection.close()
+        except Exception:  # ConnectionClosed, or an event the SDK can't parse
+            pass
+        finally:
+            self.closed.set()
+            self.events.put(None)
+            if self._on_closed is not None:
+                self._on_closed(self)
+
+    def close(self) -> None:
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+
+
+class WarmSessions:
+    """Hands out configured realtime sessions, connecting ahead of time if keep_warm.
+
+    acquire() returns a ready session, waiting for one being connected if need be;
+    release() hands it back after the dictation's completed event.
+    """
+
+    def __init__(
+        self,
+        client,
+        session: dict,
+        keep_warm: bool = True,
+        max_age_s: float = MAX_AGE_S,
+    ):
+        self.client = client
+        self.session = session
+        self.keep_warm = keep_warm
+        self.max_age_s = max_age_s
+        self.connects = 0
+        self._lock = threading.Lock()
+        # The session the next dictation gets, once connected
+        self._next: Future | None = None
+        self._expiry: threading.Timer | None = None
+        self._closed = False
+        self._pool = ThreadPoolExecutor(1, thread_name_prefix="realtime-connect")
+        if keep_warm:
+            self._prepare()
+
+    def _connect(self) -> RealtimeSession:
+        started_at = default_timer()
+        connection = self.client.realtime.connect(
+            extra_query=dict(intent="transcription")
+        ).enter()
+        connection.session.update(session=self.session)
+        session = RealtimeSession(
+            connection, default_timer() - started_at, self._replace_idle
+        )
+        self.connects += 1
+        threading.Thread(target=session.read_events, daemon=True).start()
+        return session
+
+    def _prepare(self) -> None:
+        """Start connecting the next session in the background."""
+        with self._lock:
+            if self._closed:
+                return
+            self._next = self._pool.submit(self._connect)
+            self._next.add_done_callback(self._start_expiry)
+
+    def _park(self, session: RealtimeSession) -> None:
+        future: Future = Future()
+        future.set_result(session)
+        with self._lock:
+            self._next = future
+        self._start_expiry(future)
+
+    def _start_expiry(self, future: Future) -> None:
+        if future.exception() is not None:
+            return
+        session = future.result()
+        expiry = threading.Timer(
+            max(0.0, self.max_age_s - session.age_s), self._replace_idle, [session]
+        )
+        expiry.daemon = True
+        with self._lock:
+            if self._expiry is not None:
+                self._expiry.cancel()
+            self._expiry = expiry
+        expiry.start()
+
+    def _replace_idle(self, session: RealtimeSession) -> None:
+        """Replace *session* if it's waiting for the next dictation: the server
+        closed it, or it got too old."""
+        with self._lock:
+            future = self._next
+            if (
+                future is None
+                or not future.done()
+                or future.exception() is not None
+                or future.result() is not session
+            ):
+                return  # In use; release() will deal with it
+            self._next = None
+        session.close()
+        self._prepare()
+
+    def acquire(self) -> RealtimeSession:
+        with self._lock:
+            future, self._next = self._next, None
+            if self._expiry is not None:
+                self._expiry.cancel()
+                self._expiry = None
+        session = None
+        if future is not None:
+            try:
+                session = future.result()
+            except Exception:
+                pass  # Offline when it was prepared; try again now
+        if session is None or session.closed.is_set() or session.age_s > self.max_age_s:
+            if session is not None:
+                session.close()
+            session = self._connect()
+        session.clear_events()
+        session.uses += 1
+        return session
+
+    def release(self, session: RealtimeSession) -> None:
+        if not self.keep_warm:
+            session.close()
+        elif session.closed.is_set() or session.age_s > self.max_age_s:
+            session.close()
+            self._prepare()
+        else:
+            self._park(session)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            future, self._next = self._next, None
+            if self._expiry is not None:
+                self._expiry.cancel()
+        if future is not None:
+            future.add_done_callback(
+                lambda future: future.exception() or future.result().close()
+            )
+        self._pool.shutdown(wait=False)
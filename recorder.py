@@ -1,49 +1,174 @@
-import io
-import wave
+import threading
+import uuid
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Literal
 
-import numpy as np
 from sounddevice import InputStream
 
 import volume
+from audio import (
+    Audio,
+    CaptureBuffer,
+    MappedCaptureBuffer,
+    PrerollRing,
+    StreamingEncoder,
+    UploadFormat,
+    block_started_at,
+    save_wav,
+)
+from milestones import Milestones
+
+RECORDINGS_DIR = Path(".private") / "recordings"
+
+RecordingMode = Literal["memory", "mapped"]
 
 
 class Recorder:
-    def __init__(self):
-        self.frames = []
+    def __init__(
+        self,
+        upload_format: UploadFormat = "wav",
+        mode: RecordingMode = "memory",
+        always_open: bool = False,
+        preroll_s: float = 0.5,
+    ):
+        """upload_format other than wav is encoded in the background while recording.
+
+        mode="mapped" records into a memory-mapped file in .private/recordings/
+        instead of RAM, for very long recordings.
+
+        always_open keeps the input stream running between recordings, with the
+        last preroll_s of audio in a ring, so start(started_at=...) can begin the
+        recording at the hotkey press instead of once the stream has started.
+        """
+        self.upload_format = upload_format
+        self.mode = mode
+        self.on_audio = None
+        self.encoder = None
+        self.capturing = False
+        self.started_at: float | None = None
+        self.milestones: Milestones | None = None
+        self._capture_lock = threading.Lock()
         self.stream = InputStream(
             samplerate=24_000,  # Expected by OpenAI
             channels=1,  # Mono
             dtype="int16",  # 16-bit
-            callback=lambda indata, *_: self.frames.append(indata.copy()),
+            callback=self.process_audio_input,
         )
+        self.buffer = CaptureBuffer(int(self.stream.samplerate))
+        self.preroll = None
+        if always_open:
+            self.preroll = PrerollRing(self.sample_rate, preroll_s)
+            self.stream.start()
+
+        if mode == "mapped":
+            # Recordings from earlier runs that save_wav couldn't move
+            for path in RECORDINGS_DIR.glob("*.wav"):
+                path.unlink(missing_ok=True)
+
+    def process_audio_input(self, indata, frames, time_info, status):
+        if self.preroll is None:
+            self._capture(indata)
+            return
+        now = perf_counter()
+        # Held while capturing too, so stop() can't finish the buffer mid-write
+        with self._capture_lock:
+            if self.capturing:
+                self._capture(indata)
+            else:
+                self.preroll.write(indata, block_started_at(time_info, now))
+
+    def _capture(self, indata):
+        if self.milestones is not None:
+            self.milestones.mark("first_audio")
+            self.milestones = None  # Only needed once per recording
+        samples = self.buffer.write(indata)
+        if self.encoder is not None:
+            self.encoder.write(samples)
+        if self.on_audio is not None:
+            self.on_audio(samples)
 
-    def start(self):
-        self.frames = []
+    @property
+    def sample_rate(self) -> int:
+        return int(self.stream.samplerate)
+
+    def start(
+        self,
+        on_audio: Callable | None = None,
+        started_at: float | None = None,
+        milestones: Milestones | None = None,
+    ):
+        """on_audio(samples) is called from the audio callback with each new block.
+
+        started_at is the perf_counter() time of the hotkey press; with always_open,
+        the audio captured since then is recorded too. *milestones* gets ducked,
+        stream_started and first_audio marked.
+        """
+        self.on_audio = on_audio
+        self.milestones = milestones
+        # A fresh buffer each time: the last one belongs to the Audio it became
+        sample_rate = self.sample_rate
+        if self.mode == "mapped":
+            path = RECORDINGS_DIR / f"{uuid.uuid4().hex}.wav"
+            self.buffer = MappedCaptureBuffer(path, sample_rate)
+        else:
+            self.buffer = CaptureBuffer(sample_rate)
+        if self.upload_format != "wav":
+            try:
+                self.encoder = StreamingEncoder(sample_rate, self.upload_format)
+            except OSError as exc:
+                print(f"Can't encode {self.upload_format} while recording: {exc}")
+
+        if self.preroll is None:
+            volume.duck()
+            if milestones is not None:
+                milestones.mark("ducked")
+            self.stream.start()
+            self.started_at = perf_counter()
+            if milestones is not None:
+                milestones.mark("stream_started", self.started_at)
+            self.capturing = True
+            return
+
+        # Capture first: ducking can take a while, and the stream's already running
+        with self._capture_lock:
+            self.started_at = perf_counter() if started_at is None else started_at
+            preroll = self.preroll.since(self.started_at)
+            if len(preroll):
+                self._capture(preroll)
+            self.capturing = True
         volume.duck()
-        self.stream.start()
-
-    def stop(self):
-        self.stream.stop()
+        if milestones is not None:
+            milestones.mark("ducked")
+
+    def stop(self) -> Audio:
+        if self.preroll is None:
+            self.stream.stop()
+            self.capturing = False
+        else:
+            with self._capture_lock:
+                self.capturing = False
         volume.restore()
 
-        wav_bytes = io.BytesIO()
-
-        with wave.open(wav_bytes, "wb") as wave_file:
-            wave_file.setframerate(self.stream.samplerate)
-            wave_file.setnchannels(self.stream.channels)
-            wave_file.setsampwidth(self.stream.samplesize)
-            wave_file.writeframes(np.concatenate(self.frames, axis=0).tobytes())
+        audio = Audio(self.buffer.finish())
+        if self.mode == "mapped":
+            audio.path = self.buffer.path
+        if self.encoder is not None:
+            try:
+                audio.add_upload(self.encoder.finish())
+            except OSError as exc:
+                print(f"Background {self.upload_format} encode failed: {exc}")
+            self.encoder = None
 
-        return wav_bytes
+        return audio
 
     @property
     def recording(self):
-        return self.stream.active
+        return self.capturing
 
 
 if __name__ == "__main__":
     import time
-    from pathlib import Path
 
     rec = Recorder()
 
@@ -53,8 +178,6 @@ if __name__ == "__main__":
     time.sleep(2)
 
     print("Done")
-    wav_bytes = rec.stop()
+    audio = rec.stop()
 
-    private_dir = Path(".private")
-    private_dir.mkdir(exist_ok=True)
-    (private_dir / "last_recording.wav").write_bytes(wav_bytes.getbuffer())
+    save_wav(audio, Path(".private") / "last_recording.wav")
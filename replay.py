@@ -0,0 +1,370 @@
+"""Replay WAV files through Transcriber or TranscriberRealtime, headless.
+
+The pipelines run unchanged; only what touches the desktop is swapped out:
+- sounddevice: FakeInputStream / FakeRawInputStream play a FakeMicrophone, a
+  timeline of the WAVs at their scripted times (silence in between), at 1x or
+  --speed times real time, with real callback timing and time_info
+- kb: FakeHotkey feeds press and release at scripted times to kb's own combo
+  state machine and dispatcher thread (hotkeys.py)
+- border: a Border that does nothing
+- volume: ducking goes to a FakePulse, not the machine's speakers
+- output: the transcriber's sink is a FakeSink instead of keyboard.write
+The provider is a local stand-in from mock_servers.py (OpenAIMockServer, or
+RealtimeMockServer for --realtime), reached through OPENAI_BASE_URL.
+
+Each dictation presses the hotkey, speaks a WAV --lead-ms later, releases
+--tail-ms after it ends, and waits for the text to be typed. The run happens in a
+scratch directory, so its .private/log.jsonl holds just these dictations; the
+per-stage latencies are summarised from it (see milestones.py) and saved to --out.
+
+    python replay.py --dictations 100 --speed 4 speech1.wav speech2.wav
+    python replay.py --realtime --dictations 20
+    python replay.py --set pipelined_upload=true --set trim_silence=false
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tomllib
+import types
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+from hotkeys import Combo, ComboIndex
+
+SAMPLE_RATE = 24_000
+BLOCK_SIZE = 240  # 10 ms
+
+
+class FakeMicrophone:
+    """Clips of speech on a timeline, with replay time running at *speed*."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, speed: float = 1.0):
+        self.sample_rate = sample_rate
+        self.speed = speed
+        self.origin = perf_counter()
+        self.clips: list[tuple[int, np.ndarray]] = []
+        self._lock = threading.Lock()
+
+    def sample_at(self, wall_time: float) -> int:
+        """The timeline position being captured at perf_counter() *wall_time*."""
+        return int((wall_time - self.origin) * self.speed * self.sample_rate)
+
+    def wall_time(self, sample: int) -> float:
+        return self.origin + sample / self.sample_rate / self.speed
+
+    def add(self, start: int, samples: np.ndarray) -> None:
+        with self._lock:
+            self.clips.append((start, samples))
+
+    def read(self, start: int, n: int) -> np.ndarray:
+        block = np.zeros(n, np.int16)
+        with self._lock:
+            clips = list(self.clips)
+        for clip_start, samples in clips:
+            begin = max(start, clip_start)
+            end = min(start + n, clip_start + len(samples))
+            if begin < end:
+                block[begin - start : end - start] = samples[
+                    begin - clip_start : end - clip_start
+                ]
+        return block
+
+
+class FakeInputStream:
+    """sounddevice.InputStream, capturing from `microphone` instead of a device."""
+
+    microphone: FakeMicrophone  # Set by install_fakes()
+    raw = False
+
+    def __init__(
+        self,
+        samplerate: float,
+        channels: int = 1,
+        dtype: str = "int16",
+        callback=None,
+        blocksize: int = BLOCK_SIZE,
+        **kwargs,
+    ):
+        self.samplerate = float(samplerate)
+        self.channels = channels
+        self.dtype = dtype
+        self.callback = callback
+        self.blocksize = blocksize or BLOCK_SIZE
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.active:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def close(self) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        mic = self.microphone
+        position = mic.sample_at(perf_counter())
+        while True:
+            # A block is delivered once its last sample has been "captured"
+            wait = mic.wall_time(position + self.blocksize) - perf_counter()
+            if self._stopped.wait(max(0.0, wait)):
+                return
+            samples = mic.read(position, self.blocksize)
+            time_info = types.SimpleNamespace(
+                inputBufferAdcTime=mic.wall_time(position), currentTime=perf_counter()
+            )
+            indata = samples.tobytes() if self.raw else samples.reshape(-1, 1)
+            self.callback(indata, self.blocksize, time_info, None)
+            position += self.blocksize
+
+
+class FakeRawInputStream(FakeInputStream):
+    """sounddevice.RawInputStream: blocks arrive as bytes."""
+
+    raw = True
+
+
+class FakeHotkey(Combo):
+    """What kb.add_hotkey / add_hold_hotkey return, driven by press() and release()
+    instead of the Windows hook."""
+
+    VK = 0x91  # Scroll Lock
+
+    def __init__(self, combo: str, callback, release_callback=None):
+        super().__init__({self.VK}, callback, release_callback)
+        self.combo_string = combo
+        self.toggle = release_callback is None
+        self._index = ComboIndex()
+        self._index.add(self)
+
+    def press(self) -> None:
+        self._index.handle(self.VK, True, False)
+
+    def release(self) -> None:
+        self._index.handle(self.VK, False, True)
+
+    def close(self) -> None:
+        self._index.dispatcher.close()
+
+
+class NoopBorder:
+    def __init__(self, root=None):
+        pass
+
+    def show(self, color: str):
+        pass
+
+    def hide(self):
+        pass
+
+
+def install_fakes(microphone: FakeMicrophone) -> list[FakeHotkey]:
+    """Put fake sounddevice, kb and border modules in sys.modules, and point volume
+    at a FakePulse. Returns the list the fake kb adds hotkeys to."""
+    FakeInputStream.microphone = microphone
+    sounddevice = types.ModuleType("sounddevice")
+    sounddevice.InputStream = FakeInputStream
+    sounddevice.RawInputStream = FakeRawInputStream
+
+    hotkeys: list[FakeHotkey] = []
+    kb = types.ModuleType("kb")
+
+    def add_hotkey(combo, callback):
+        hotkeys.append(FakeHotkey(combo, callback))
+        return hotkeys[-1]
+
+    def add_hold_hotkey(combo, press_callback, release_callback):
+        hotkeys.append(FakeHotkey(combo, press_callback, release_callback))
+        return hotkeys[-1]
+
+    kb.add_hotkey = add_hotkey
+    kb.add_hold_hotkey = add_hold_hotkey
+    kb.remove_hotkey = lambda combo: None
+    kb.remove_all_hotkeys = hotkeys.clear
+
+    border = types.ModuleType("border")
+    border.Border = NoopBorder
+    sys.modules |= dict(sounddevice=sounddevice, kb=kb, border=border)
+
+    import volume
+
+    volume.use_backend(lambda: volume.PulseBackend(volume.FakePulse()))
+    return hotkeys
+
+
+def load_clips(paths: list[Path]) -> list[np.ndarray]:
+    from audio import Audio
+    from bench_utils import synthetic_speech
+
+    if not paths:
+        return [synthetic_speech(seconds, seed=i) for i, seconds in enumerate((3, 8))]
+    clips = []
+    for path in paths:
+        audio = Audio(path.read_bytes())
+        if audio.sample_rate != SAMPLE_RATE:
+            audio = Audio(audio.upload("wav", SAMPLE_RATE).data)
+        clips.append(np.frombuffer(audio.pcm, np.int16).copy())
+    return clips
+
+
+def start_server(args):
+    from mock_servers import OpenAIMockServer, RealtimeMockServer
+
+    if args.realtime:
+        server = RealtimeMockServer(
+            delta_delay_s=args.first_delta_ms / 1000,
+            connect_delay_s=2 * args.rtt_ms / 1000,
+        ).start()
+        base_url = server.url.replace("ws://", "http://", 1)
+    else:
+        server = OpenAIMockServer(
+            first_delta_s=args.first_delta_ms / 1000,
+            connect_delay_s=2 * args.rtt_ms / 1000,
+            request_delay_s=args.rtt_ms / 1000,
+        ).start()
+        base_url = f"{server.base_url}/v1"
+    # Before the transcriber's modules are imported: some read it once
+    os.environ |= dict(OPENAI_API_KEY="mock", OPENAI_BASE_URL=base_url)
+    return server
+
+
+def override(module, settings: list[str]) -> None:
+    """Apply --set name=value (TOML values) to the module's config globals."""
+    for setting in settings:
+        name, _, value = setting.partition("=")
+        if not hasattr(module, name):
+            raise SystemExit(f"{module.__name__} has no setting {name!r}")
+        setattr(module, name, tomllib.loads(f"value = {value}")["value"])
+
+
+def wait_until(wall_time: float) -> None:
+    time.sleep(max(0.0, wall_time - perf_counter()))
+
+
+def dictate(
+    hotkey: FakeHotkey, mic: FakeMicrophone, clip: np.ndarray, sink, args
+) -> bool:
+    """One dictation; False if the text wasn't typed within --timeout-s."""
+    finishes = sink.finishes
+    pressed_at = perf_counter()
+    speech_start = mic.sample_at(pressed_at) + int(args.lead_ms / 1000 * SAMPLE_RATE)
+    mic.add(speech_start, clip)
+    hotkey.press()
+    if hotkey.toggle:
+        hotkey.release()
+    release = speech_start + len(clip) + int(args.tail_ms / 1000 * SAMPLE_RATE)
+    wait_until(mic.wall_time(release))
+    if hotkey.toggle:
+        hotkey.press()
+    hotkey.release()
+
+    deadline = perf_counter() + args.timeout_s
+    while sink.finishes == finishes:
+        if perf_counter() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("wavs", nargs="*", type=Path, help="default: synthetic")
+    parser.add_argument("--realtime", action="store_true")
+    parser.add_argument("--dictations", type=int, default=10)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--lead-ms", type=float, default=200, help="press to speech")
+    parser.add_argument("--tail-ms", type=float, default=300, help="speech to release")
+    parser.add_argument("--gap-ms", type=float, default=500, help="between dictations")
+    parser.add_argument("--rtt-ms", type=float, default=30)
+    parser.add_argument("--first-delta-ms", type=float, default=300)
+    parser.add_argument("--sink-char-ms", type=float, default=0, help="typing cost")
+    parser.add_argument("--timeout-s", type=float, default=30)
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="override a config global of the transcriber module",
+    )
+    parser.add_argument("--out", type=Path, default=Path(".private") / "replay.json")
+    args = parser.parse_args()
+    out = args.out.resolve()
+
+    clips = load_clips(args.wavs)
+    server = start_server(args)
+    mic = FakeMicrophone(speed=args.speed)
+    hotkeys = install_fakes(mic)
+
+    import jsonl_log
+    import milestones
+    from output import FakeSink
+
+    module = importlib.import_module(
+        "transcriber_realtime" if args.realtime else "transcriber"
+    )
+    override(module, args.set)
+    sink = FakeSink(per_char_s=args.sink_char_ms / 1000)
+    module.make_sink = lambda method: sink
+
+    cwd = Path.cwd()
+    failed = 0
+    with tempfile.TemporaryDirectory(prefix="transcriber-replay-") as workdir:
+        os.chdir(workdir)
+        if args.realtime:
+            transcriber = module.TranscriberRealtime(None)
+        else:
+            transcriber = module.Transcriber(None)
+        hotkey = hotkeys[-1]
+        try:
+            time.sleep(0.5)  # Let warm-up finish, as it would before the first press
+            for i in range(args.dictations):
+                if not dictate(hotkey, mic, clips[i % len(clips)], sink, args):
+                    failed += 1
+                    print(f"Dictation {i} wasn't typed within {args.timeout_s:g}s")
+                time.sleep(args.gap_ms / 1000 / args.speed)
+            jsonl_log.get_log().flush()
+            records = list(jsonl_log.read_records(Path(".private") / "log.jsonl"))
+        finally:
+            if args.realtime:
+                transcriber.sessions.close()
+                if transcriber.stream is not None:
+                    transcriber.stream.close()
+            else:
+                transcriber.rec.stream.close()
+            os.chdir(cwd)
+    server.stop()
+
+    print(
+        f"{len(records)} of {args.dictations} dictations logged"
+        f" ({failed} timed out), {len(sink.text)} characters typed"
+    )
+    milestones.summarize(records)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(
+        json.dumps(dict(config=vars(args), records=records), indent=2, default=str)
+    )
+    print(f"Saved to {out}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
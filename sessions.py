@@ -0,0 +1,346 @@
+"""Process-wide HTTP connections and SDK clients for the providers in stt.py.
+
+Each origin gets a small pool of keep-alive connections, so only the first request
+to a provider pays DNS, TCP and TLS setup. SDK clients are created once and reused.
+"""
+
+import functools
+import http.client
+import io
+import json
+import select
+import socket
+import ssl
+import threading
+import uuid
+from typing import Iterable, Iterator
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+
+
+def _closed_by_server(conn: http.client.HTTPConnection) -> bool:
+    """Whether an idle keep-alive connection has been closed from the other end.
+
+    A readable socket isn't enough: a TLS 1.3 connection parked by warm_up() still
+    has the server's session tickets unread. Only EOF on the raw socket (peeked,
+    under any TLS) means the server has closed it.
+    """
+    if conn.sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+        if not readable:
+            return False
+        # socket.socket.recv, as SSLSocket.recv doesn't take flags
+        return socket.socket.recv(conn.sock, 1, socket.MSG_PEEK) == b""
+    except BlockingIOError:
+        return False
+    except (OSError, ValueError):
+        return True
+
+
+class HTTPSession:
+    """A pool of keep-alive connections to one origin (scheme + host + port)."""
+
+    def __init__(
+        self,
+        base_url: str,
+        max_idle: int = 4,
+        timeout: float = 120,
+        context: ssl.SSLContext | None = None,
+    ):
+        parts = urlsplit(base_url)
+        self.base_url = base_url.rstrip("/")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.context = context
+        self.connections_opened = 0
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        self.connections_opened += 1
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout, context=self.context
+            )
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn = self._idle.pop()
+            if not _closed_by_server(conn):
+                return conn
+            conn.close()
+        return self._new_connection()
+
+    @staticmethod
+    def _set_timeout(conn: http.client.HTTPConnection, timeout: float) -> None:
+        conn.timeout = timeout  # For connecting, if it isn't yet
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def warm_up(self) -> None:
+        """Open a connection (TCP + TLS) now and park it in the pool."""
+        conn = self._acquire()
+        try:
+            if conn.sock is None:
+                conn.connect()
+        except OSError:
+            conn.close()
+            raise
+        self._release(conn)
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body=None,
+        headers: dict | None = None,
+        timeout: float | None = None,
+    ) -> bytes:
+        """Send a request and return the response body. Raises HTTPError on 4xx/5xx.
+
+        timeout, if given, replaces the session's for this request's socket
+        operations, and raises TimeoutError when one takes longer.
+        """
+        url = self.base_path + path
+        for attempt in range(2):
+            conn = self._acquire()
+            reused = conn.sock is not None
+            if timeout is not None:
+                self._set_timeout(conn, timeout)
+            try:
+                conn.request(method, url, body=body, headers=headers or {})
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, ConnectionError):
+                conn.close()
+                # The server dropped an idle keep-alive connection; retry once on a fresh one
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            if response.will_close:
+                conn.close()
+            else:
+                if timeout is not None:
+                    self._set_timeout(conn, self.timeout)
+                self._release(conn)
+
+            if response.status >= 400:
+                raise HTTPError(
+                    self.base_url + path,
+                    response.status,
+                    response.reason,
+                    response.headers,
+                    io.BytesIO(data),
+                )
+            return data
+
+    def stream(
+        self,
+        method: str,
+        path: str,
+        body=None,
+        headers: dict | None = None,
+    ) -> Iterator[bytes]:
+        """Send a request and yield the response body line by line (e.g. server-sent
+        events). Raises HTTPError on 4xx/5xx.
+
+        Not retried on a stale connection: a streamed body can't be sent twice.
+        Pooled connections the server has closed are skipped before sending, but
+        one can still close in the moment before, so keep a fallback.
+        """
+        url = self.base_path + path
+        conn = self._acquire()
+        try:
+            conn.request(method, url, body=body, headers=headers or {})
+            response = conn.getresponse()
+            if response.status >= 400:
+                raise HTTPError(
+                    self.base_url + path,
+                    response.status,
+                    response.reason,
+                    response.headers,
+                    io.BytesIO(response.read()),
+                )
+            while line := response.readline():
+                yield line
+        except BaseException:
+            conn.close()
+            raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+
+    def request_json(
+        self,
+        method: str,
+        path: str,
+        body=None,
+        headers: dict | None = None,
+        timeout: float | None = None,
+    ):
+        data = self.request(method, path, body=body, headers=headers, timeout=timeout)
+        return json.loads(data) if data else None
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class MultipartBody:
+    """A multipart/form-data body that is sent part by part, never joined.
+
+    File data is kept as the caller's buffer (e.g. a memoryview of the recording)
+    and handed to the socket as-is. Pass the instance as `body=` along with
+    `headers()`, which include Content-Length so http.client doesn't chunk it.
+    Iterating restarts from the beginning, so a retried request resends it all.
+
+    A file added with `add_file_stream()` is sent as its chunks arrive, before its
+    length is known. The body then has no Content-Length, so http.client uses
+    chunked transfer encoding, and it can only be sent once.
+    """
+
+    def __init__(self):
+        self.boundary = f"----transcriber-{uuid.uuid4().hex}"
+        self._parts: list[bytes | memoryview | Iterable[bytes | memoryview]] = []
+
+    def add_field(self, name: str, value: str | bytes) -> "MultipartBody":
+        if isinstance(value, str):
+            value = value.encode()
+        self._parts += [
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode(),
+            value,
+            b"\r\n",
+        ]
+        return self
+
+    def add_file(
+        self, name: str, filename: str, content_type: str, data: bytes | memoryview
+    ) -> "MultipartBody":
+        self._parts += [
+            (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f"Content-Type: {content_type}\r\n\r\n"
+            ).encode(),
+            memoryview(data).cast("B"),
+            b"\r\n",
+        ]
+        return self
+
+    def add_file_stream(
+        self,
+        name: str,
+        filename: str,
+        content_type: str,
+        chunks: Iterable[bytes | memoryview],
+    ) -> "MultipartBody":
+        self._parts += [
+            (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f"Content-Type: {content_type}\r\n\r\n"
+            ).encode(),
+            chunks,
+            b"\r\n",
+        ]
+        return self
+
+    @property
+    def _closing(self) -> bytes:
+        return f"--{self.boundary}--\r\n".encode()
+
+    @property
+    def content_length(self) -> int | None:
+        """None if a file is streamed."""
+        if not all(isinstance(part, (bytes, memoryview)) for part in self._parts):
+            return None
+        return sum(len(part) for part in self._parts) + len(self._closing)
+
+    def headers(self) -> dict[str, str]:
+        headers = {"Content-Type": f"multipart/form-data; boundary={self.boundary}"}
+        if (content_length := self.content_length) is not None:
+            headers["Content-Length"] = str(content_length)
+        return headers
+
+    def __iter__(self):
+        for part in self._parts:
+            if isinstance(part, (bytes, memoryview)):
+                yield part
+            else:
+                yield from part
+        yield self._closing
+
+
+_sessions: dict[str, HTTPSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(base_url: str, **kwargs) -> HTTPSession:
+    """Return the shared session for *base_url*, creating it on first use.
+
+    kwargs are only used when the session is created (e.g. a custom SSL context).
+    """
+    key = base_url.rstrip("/")
+    with _sessions_lock:
+        if key not in _sessions:
+            _sessions[key] = HTTPSession(key, **kwargs)
+        return _sessions[key]
+
+
+def close_all() -> None:
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+# ---------------------------------------------------------------------------
+# SDK clients. These manage their own connection pools (httpx / gRPC), so we just
+# make sure there is only one of each per process.
+# ---------------------------------------------------------------------------
+@functools.cache
+def openai_client():
+    from openai import OpenAI
+
+    return OpenAI()
+
+
+@functools.cache
+def google_speech_client(api_endpoint: str):
+    from google.api_core.client_options import ClientOptions
+    from google.cloud.speech_v2 import SpeechClient
+
+    return SpeechClient(client_options=ClientOptions(api_endpoint=api_endpoint))
+
+
+@functools.cache
+def genai_client():
+    from google import genai
+
+    return genai.Client()
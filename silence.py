@@ -0,0 +1,130 @@
+"""Trim silence from the edges of a recording and shorten long pauses inside it.
+
+Push-to-talk recordings start and end with hotkey reaction time, and long pauses
+mid-thought are uploaded, billed and processed like speech. This runs between
+Recorder.stop and the upload. Everything is vectorized over 20 ms frames, so a
+minute of audio takes under 10 ms.
+
+A frame is speech if its RMS level (dBFS) is above threshold_db, and at least
+noise_margin_db above the recording's noise floor (its 10th percentile frame), so
+a noisy mic doesn't count its hiss as speech. Speech is padded
+by edge_padding_s on both sides so word onsets and tails survive. Silence before
+the first and after the last speech is dropped; pauses longer than max_pause_s
+are cut down to keep_pause_s, half from each end so the splice lands mid-pause.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from audio import Audio, UploadFormat, wav_from_frames
+
+
+@dataclass(frozen=True)
+class SilenceSettings:
+    threshold_db: float = -45.0
+    noise_margin_db: float = 10.0
+    edge_padding_s: float = 0.15
+    max_pause_s: float = 0.6
+    keep_pause_s: float = 0.3
+    # Keep the original (and its background-encoded upload) unless this much goes
+    min_removed_s: float = 0.25
+    # ... or this much, when trimming would throw away an upload that's already
+    # encoded, since the trimmed copy then has to be encoded after the release
+    min_removed_encoded_s: float = 3.0
+    frame_s: float = 0.02
+
+    @classmethod
+    def from_config(cls, config: dict) -> "SilenceSettings":
+        return cls(
+            threshold_db=config["silence_threshold_db"],
+            noise_margin_db=config["silence_noise_margin_db"],
+            edge_padding_s=config["silence_edge_padding_s"],
+            max_pause_s=config["silence_max_pause_s"],
+            keep_pause_s=config["silence_keep_pause_s"],
+            min_removed_encoded_s=config["silence_min_removed_encoded_s"],
+        )
+
+
+def frame_levels_db(samples: np.ndarray, frame_len: int) -> np.ndarray:
+    """RMS level in dBFS of each whole frame of int16 samples."""
+    n_frames = len(samples) // frame_len
+    frames = samples[: n_frames * frame_len].reshape(n_frames, frame_len)
+    power = np.einsum("ij,ij->i", frames, frames, dtype=np.float64) / frame_len
+    return 10 * np.log10(power / 32768.0**2 + 1e-12)
+
+
+def _runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Start and end (exclusive) indexes of each run of True in mask."""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def keep_mask(
+    samples: np.ndarray, sample_rate: int, settings: SilenceSettings
+) -> np.ndarray | None:
+    """Per-frame mask of what to keep, or None if no speech was found."""
+    frame_len = max(1, int(settings.frame_s * sample_rate))
+    levels = frame_levels_db(samples, frame_len)
+    if not len(levels):
+        return None
+    noise_floor = np.percentile(levels, 10)
+    speech = levels > max(settings.threshold_db, noise_floor + settings.noise_margin_db)
+    if not speech.any():
+        return None
+
+    pad = int(round(settings.edge_padding_s / settings.frame_s))
+    if pad:
+        # "full" and slice, as "same" is as long as the kernel when that's longer
+        padded = np.convolve(speech, np.ones(2 * pad + 1, bool), mode="full")
+        speech = padded[pad : pad + len(speech)] > 0
+
+    keep = speech.copy()
+    starts, ends = _runs(~speech)
+    internal = (starts > 0) & (ends < len(speech))
+    max_pause = int(round(settings.max_pause_s / settings.frame_s))
+    long_pauses = internal & (ends - starts > max_pause)
+
+    # Keep keep_pause_s of each long pause, split between its two ends
+    head = int(round(settings.keep_pause_s / settings.frame_s)) // 2
+    tail = int(round(settings.keep_pause_s / settings.frame_s)) - head
+    short_pauses = internal & ~long_pauses
+    for start, end in zip(starts[short_pauses], ends[short_pauses]):
+        keep[start:end] = True
+    for start, end in zip(starts[long_pauses], ends[long_pauses]):
+        keep[start : start + head] = True
+        keep[end - tail : end] = True
+    return keep
+
+
+def compact_silence(
+    audio: Audio,
+    settings: SilenceSettings = SilenceSettings(),
+    upload_format: UploadFormat | None = None,
+) -> tuple[Audio, float]:
+    """Return (audio without the excess silence, seconds removed).
+
+    Returns the original audio unchanged if there's no speech, or if less than
+    settings.min_removed_s would go (min_removed_encoded_s if the audio already
+    has an upload_format upload).
+    """
+    samples = np.frombuffer(audio.pcm, np.int16)
+    keep = keep_mask(samples, audio.sample_rate, settings)
+    if keep is None:
+        return audio, 0.0
+
+    frame_len = max(1, int(settings.frame_s * audio.sample_rate))
+    # The partial frame at the end goes with the last whole frame
+    sample_keep = np.repeat(keep, frame_len)
+    sample_keep = np.concatenate(
+        (sample_keep, np.full(len(samples) - len(sample_keep), keep[-1]))
+    )
+    removed_s = (len(samples) - np.count_nonzero(sample_keep)) / audio.sample_rate
+    min_removed_s = settings.min_removed_s
+    if upload_format not in (None, "wav") and audio.has_upload(upload_format):
+        min_removed_s = max(min_removed_s, settings.min_removed_encoded_s)
+    if removed_s < min_removed_s:
+        return audio, 0.0
+
+    kept = samples[sample_keep]
+    return Audio(wav_from_frames([kept[:, None]], audio.sample_rate)), removed_s
@@ -0,0 +1,123 @@
+"""Soniox async transcription jobs: upload, create, poll, fetch, then clean up.
+
+Polling starts after a few tens of milliseconds and backs off, with the cap scaled
+to the audio length, so a finished job is noticed quickly without hammering the
+API on long recordings. Deleting the uploaded file and the transcription happens
+on a background thread after the text has been returned.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Iterable, Iterator
+
+import sessions
+from audio import Upload
+
+SONIOX_URL = os.environ.get("SONIOX_BASE_URL", "https://api.soniox.com")
+
+
+def poll_intervals(audio_s: float) -> Iterator[float]:
+    """Sleep durations between status checks for a job on *audio_s* of audio."""
+    interval = 0.03
+    max_interval = min(0.5, max(0.1, audio_s / 120))
+    while True:
+        yield interval
+        interval = min(max_interval, interval * 1.4)
+
+
+def _delete_all(session: sessions.HTTPSession, auth: dict, paths: list[str]):
+    for path in paths:
+        try:
+            session.request("DELETE", path, headers=auth)
+        except Exception as exc:
+            print(f"Soniox cleanup failed for {path}: {exc}")
+
+
+def transcribe(
+    upload: Upload,
+    model: str,
+    api_key: str,
+    timeout_s: float = 60,
+    intervals: Iterable[float] | None = None,
+    base_url: str = SONIOX_URL,
+) -> str:
+    """Run one transcription job and return its text.
+
+    Raises TimeoutError if the whole call (upload, job and transcript) takes over
+    *timeout_s*, or *intervals* runs out before the job completes, and RuntimeError
+    if Soniox reports an error. Uploaded files and transcriptions are deleted in the
+    background either way.
+    """
+    deadline = time.monotonic() + timeout_s
+    session = sessions.get_session(base_url)
+    auth = {"Authorization": f"Bearer {api_key}"}
+    cleanup_paths = []
+
+    def remaining_s() -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Soniox transcription not done after {timeout_s}s")
+        return remaining
+
+    try:
+        upload_body = sessions.MultipartBody().add_file(
+            "file", upload.filename, upload.mime_type, upload.data
+        )
+        file_id = session.request_json(
+            "POST",
+            "/v1/files",
+            body=upload_body,
+            headers=auth | upload_body.headers(),
+            timeout=remaining_s(),
+        )["id"]
+        cleanup_paths.append(f"/v1/files/{file_id}")
+
+        transcription_id = session.request_json(
+            "POST",
+            "/v1/transcriptions",
+            body=json.dumps(
+                dict(
+                    model=model,
+                    file_id=file_id,
+                    language_hints=["en"],
+                )
+            ).encode(),
+            headers=auth | {"Content-Type": "application/json"},
+            timeout=remaining_s(),
+        )["id"]
+        # Transcriptions must be deleted before the file they reference
+        cleanup_paths.insert(0, f"/v1/transcriptions/{transcription_id}")
+
+        for interval in intervals or poll_intervals(upload.duration_s):
+            payload = session.request_json(
+                "GET",
+                f"/v1/transcriptions/{transcription_id}",
+                headers=auth,
+                timeout=remaining_s(),
+            )
+            if payload["status"] == "completed":
+                break
+            if payload["status"] == "error":
+                raise RuntimeError(payload["error_message"])
+            time.sleep(min(interval, remaining_s()))
+        else:
+            raise TimeoutError(
+                f"Soniox transcription {transcription_id} not done when its poll"
+                " intervals ran out"
+            )
+
+        return session.request_json(
+            "GET",
+            f"/v1/transcriptions/{transcription_id}/transcript",
+            headers=auth,
+            timeout=remaining_s(),
+        )["text"]
+    finally:
+        if cleanup_paths:
+            threading.Thread(
+                target=_delete_all,
+                args=(session, auth, cleanup_paths),
+                daemon=True,
+            ).start()
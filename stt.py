@@ -1,13 +1,19 @@
 import io
 import json
 import os
-import time
-import uuid
-from typing import Literal
-from urllib import request
+import threading
+from timeit import default_timer
+from typing import Iterable, Literal
 
 from dotenv import load_dotenv
 
+import providers
+import sessions
+import soniox
+import stt_cache
+from audio import Audio, Upload, UploadFormat, ffmpeg_path
+from latency import latency_tracker
+
 load_dotenv()
 
 Model = Literal[
@@ -18,32 +24,37 @@ Model = Literal[
     "stt-async-v4",
     "chirp_3",
     "gemini-3-flash-preview",
+    "faster-whisper-small.en",
+    "faster-whisper-base.en",
 ]
 
+# Overridable, like OPENAI_BASE_URL, to point at a local stand-in (bench_providers.py)
+ELEVENLABS_URL = os.environ.get("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io")
+GOOGLE_SPEECH_ENDPOINT = "asia-northeast1-speech.googleapis.com"
+LANGUAGE = "en"
+
+transcription_cache = stt_cache.TranscriptionCache()
+
 
 def openai_stt(
-    wav_bytes: io.BytesIO,
+    upload: Upload,
     model: Literal["gpt-4o-mini-transcribe-2025-12-15", "gpt-4o-transcribe"],
 ) -> str:
-    from openai import OpenAI
-
-    wav_bytes.seek(0)
-    oai = OpenAI()
-    text = oai.audio.transcriptions.create(
+    # The SDKs only take bytes, so the OpenAI/Google/Gemini paths make one copy here
+    text = sessions.openai_client().audio.transcriptions.create(
         model=model,
-        file=("audio.wav", wav_bytes),
-        language="en",
+        file=(upload.filename, bytes(upload.data), upload.mime_type),
+        language=LANGUAGE,
         response_format="text",
-        prompt="Use unicode characters where appropriate, like 'CO₂' and '45°'. Use UK spelling, not US spelling.",
+        prompt=providers.for_model(model).prompt,
     )
     return text
 
 
-def microsoft_stt(wav_bytes: io.BytesIO, model: Literal["mai-transcribe-1"]) -> str:
+def microsoft_stt(upload: Upload, model: Literal["mai-transcribe-1"]) -> str:
     api_key = os.environ["AZURE_SPEECH_API_KEY"]
     endpoint = os.environ["AZURE_SPEECH_ENDPOINT"].rstrip("/")
 
-    boundary = f"----transcriber-{uuid.uuid4().hex}"
     definition = json.dumps(
         dict(
             enhancedMode=dict(
@@ -53,153 +64,50 @@ def microsoft_stt(wav_bytes: io.BytesIO, model: Literal["mai-transcribe-1"]) ->
             ),
         )
     )
-    audio_bytes = wav_bytes.getvalue()
-    parts = [
-        f"--{boundary}\r\n".encode(),
-        b'Content-Disposition: form-data; name="audio"; filename="audio.wav"\r\n',
-        b"Content-Type: audio/wav\r\n\r\n",
-        audio_bytes,
-        b"\r\n",
-        f"--{boundary}\r\n".encode(),
-        b'Content-Disposition: form-data; name="definition"\r\n\r\n',
-        definition.encode(),
-        b"\r\n",
-        f"--{boundary}--\r\n".encode(),
-    ]
-    body = b"".join(parts)
-
-    req = request.Request(
-        url=f"{endpoint}/speechtotext/transcriptions:transcribe?api-version=2025-10-15",
-        data=body,
-        headers={
-            "Content-Type": f"multipart/form-data; boundary={boundary}",
-            "Ocp-Apim-Subscription-Key": api_key,
-        },
-        method="POST",
+    body = (
+        sessions.MultipartBody()
+        .add_file("audio", upload.filename, upload.mime_type, upload.data)
+        .add_field("definition", definition)
     )
 
-    with request.urlopen(req) as response:
-        payload = json.loads(response.read())
+    payload = sessions.get_session(endpoint).request_json(
+        "POST",
+        "/speechtotext/transcriptions:transcribe?api-version=2025-10-15",
+        body=body,
+        headers=body.headers() | {"Ocp-Apim-Subscription-Key": api_key},
+    )
 
     return payload["combinedPhrases"][0]["text"]
 
 
-def elevenlabs_stt(wav_bytes: io.BytesIO, model: Literal["scribe_v2"]) -> str:
+def elevenlabs_stt(upload: Upload, model: Literal["scribe_v2"]) -> str:
     api_key = os.environ["ELEVENLABS_API_KEY"]
 
-    boundary = f"----transcriber-{uuid.uuid4().hex}"
-    audio_bytes = wav_bytes.getvalue()
-    parts = [
-        f"--{boundary}\r\n".encode(),
-        b'Content-Disposition: form-data; name="file"; filename="audio.wav"\r\n',
-        b"Content-Type: audio/wav\r\n\r\n",
-        audio_bytes,
-        b"\r\n",
-        f"--{boundary}\r\n".encode(),
-        b'Content-Disposition: form-data; name="model_id"\r\n\r\n',
-        model.encode(),
-        b"\r\n",
-        f"--{boundary}\r\n".encode(),
-        b'Content-Disposition: form-data; name="language_code"\r\n\r\n',
-        b"en",
-        b"\r\n",
-        f"--{boundary}--\r\n".encode(),
-    ]
-    body = b"".join(parts)
-
-    req = request.Request(
-        url="https://api.elevenlabs.io/v1/speech-to-text",
-        data=body,
-        headers={
-            "Content-Type": f"multipart/form-data; boundary={boundary}",
-            "xi-api-key": api_key,
-        },
-        method="POST",
+    body = (
+        sessions.MultipartBody()
+        .add_file("file", upload.filename, upload.mime_type, upload.data)
+        .add_field("model_id", model)
+        .add_field("language_code", LANGUAGE)
     )
 
-    with request.urlopen(req) as response:
-        payload = json.loads(response.read())
+    payload = sessions.get_session(ELEVENLABS_URL).request_json(
+        "POST",
+        "/v1/speech-to-text",
+        body=body,
+        headers=body.headers() | {"xi-api-key": api_key},
+    )
 
     return payload["text"]
 
 
-def soniox_stt(wav_bytes: io.BytesIO, model: Literal["stt-async-v4"]) -> str:
-    api_key = os.environ["SONIOX_API_KEY"]
-    boundary = f"----transcriber-{uuid.uuid4().hex}"
-    audio_bytes = wav_bytes.getvalue()
-    upload_body = b"".join(
-        [
-            f"--{boundary}\r\n".encode(),
-            b'Content-Disposition: form-data; name="file"; filename="audio.wav"\r\n',
-            b"Content-Type: audio/wav\r\n\r\n",
-            audio_bytes,
-            b"\r\n",
-            f"--{boundary}--\r\n".encode(),
-        ]
-    )
+def soniox_stt(upload: Upload, model: Literal["stt-async-v4"]) -> str:
+    return soniox.transcribe(upload, model, api_key=os.environ["SONIOX_API_KEY"])
 
-    upload_req = request.Request(
-        url="https://api.soniox.com/v1/files",
-        data=upload_body,
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": f"multipart/form-data; boundary={boundary}",
-        },
-        method="POST",
-    )
-    with request.urlopen(upload_req) as response:
-        file_id = json.loads(response.read())["id"]
-
-    transcription_req = request.Request(
-        url="https://api.soniox.com/v1/transcriptions",
-        data=json.dumps(
-            dict(
-                model=model,
-                file_id=file_id,
-                language_hints=["en"],
-            )
-        ).encode(),
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        },
-        method="POST",
-    )
-    with request.urlopen(transcription_req) as response:
-        transcription_id = json.loads(response.read())["id"]
 
-    while True:
-        status_req = request.Request(
-            url=f"https://api.soniox.com/v1/transcriptions/{transcription_id}",
-            headers={"Authorization": f"Bearer {api_key}"},
-        )
-        with request.urlopen(status_req) as response:
-            payload = json.loads(response.read())
-
-        if payload["status"] == "completed":
-            break
-        if payload["status"] == "error":
-            raise RuntimeError(payload["error_message"])
-        time.sleep(1)
-
-    transcript_req = request.Request(
-        url=f"https://api.soniox.com/v1/transcriptions/{transcription_id}/transcript",
-        headers={"Authorization": f"Bearer {api_key}"},
-    )
-    with request.urlopen(transcript_req) as response:
-        return json.loads(response.read())["text"]
-
-
-def google_stt(wav_bytes: io.BytesIO, model: Literal["chirp_3"]) -> str:
-    from google.api_core.client_options import ClientOptions
-    from google.cloud.speech_v2 import SpeechClient
+def google_stt(upload: Upload, model: Literal["chirp_3"]) -> str:
     from google.cloud.speech_v2.types import cloud_speech
 
-    client = SpeechClient(
-        client_options=ClientOptions(
-            api_endpoint="asia-northeast1-speech.googleapis.com"
-        ),
-    )
+    client = sessions.google_speech_client(GOOGLE_SPEECH_ENDPOINT)
     resp = client.recognize(
         cloud_speech.RecognizeRequest(
             recognizer="projects/transcriber-707/locations/asia-northeast1/recognizers/_",
@@ -208,46 +116,169 @@ def google_stt(wav_bytes: io.BytesIO, model: Literal["chirp_3"]) -> str:
                 language_codes=["en-US"],
                 auto_decoding_config=cloud_speech.AutoDetectDecodingConfig(),
             ),
-            content=wav_bytes.getvalue(),
+            content=bytes(upload.data),
         )
     )
 
     return resp.results[0].alternatives[0].transcript
 
 
-def gemini_stt(wav_bytes: io.BytesIO, model: Literal["gemini-3-flash-preview"]) -> str:
-    from google import genai
+def gemini_stt(upload: Upload, model: Literal["gemini-3-flash-preview"]) -> str:
     from google.genai import types
 
-    client = genai.Client()
-    response = client.models.generate_content(
+    response = sessions.genai_client().models.generate_content(
         model=model,
         contents=[
-            "Generate a transcript of the speech. Use UK spelling, not US spelling.",
+            providers.for_model(model).prompt,
             types.Part.from_bytes(
-                data=wav_bytes.getvalue(),
-                mime_type="audio/wav",
+                data=bytes(upload.data),
+                mime_type=upload.mime_type,
             ),
         ],
     )
     return response.text
 
 
+def default_upload_format(model: Model) -> UploadFormat:
+    """The smallest format the model's provider accepts (see providers.py), or WAV
+    if there's no ffmpeg to encode the others."""
+    codecs = providers.for_model(model).codecs
+    if ffmpeg_path() is None and "wav" in codecs:
+        return "wav"
+    return codecs[0]
+
+
+def cache_key(audio: Audio, model: Model, upload_format: UploadFormat) -> str:
+    prompt = providers.for_model(model).prompt
+    return stt_cache.make_key(audio.digest, model, upload_format, prompt, LANGUAGE)
+
+
+def speech_to_text_result(
+    audio: Audio | io.BytesIO,
+    model: Model = "gpt-4o-mini-transcribe-2025-12-15",
+    upload_format: UploadFormat | Literal["auto"] = "auto",
+    use_cache: bool = True,
+) -> dict:
+    """Like speech_to_text, but returns dict(text, response_time_s, cached).
+
+    For a cache hit, response_time_s is how long the provider took originally.
+    """
+    if isinstance(audio, io.BytesIO):
+        audio = Audio.from_wav_io(audio)
+    if upload_format == "auto":
+        upload_format = default_upload_format(model)
+
+    if use_cache:
+        key = cache_key(audio, model, upload_format)
+        if (entry := transcription_cache.get(key)) is not None:
+            return entry | dict(cached=True)
+
+    provider = providers.for_model(model)
+    # Encoded first, so the time is the provider's alone, not ffmpeg's (or another
+    # thread's encode of the same format)
+    upload = provider.prepare(audio, upload_format)
+    started_at = default_timer()
+    text = provider.transcribe(upload, model)
+
+    response_time_s = default_timer() - started_at
+    latency_tracker.record(model, response_time_s)
+    entry = dict(
+        text=text.strip().replace("\n", "⏎"),
+        response_time_s=round(response_time_s, 2),
+    )
+    if use_cache:
+        transcription_cache.put(key, entry)
+    return entry | dict(cached=False)
+
+
 def speech_to_text(
-    wav_bytes: io.BytesIO,
+    audio: Audio | io.BytesIO,
     model: Model = "gpt-4o-mini-transcribe-2025-12-15",
+    upload_format: UploadFormat | Literal["auto"] = "auto",
+    use_cache: bool = True,
+    hedge_with: Model | None = None,
+    chunk_s: float | None = None,
 ) -> str:
-    if model.startswith("gpt"):
-        text = openai_stt(wav_bytes, model)
-    elif model.startswith("mai-"):
-        text = microsoft_stt(wav_bytes, model)
-    elif model.startswith("scribe"):
-        text = elevenlabs_stt(wav_bytes, model)
-    elif model.startswith("stt-async"):
-        text = soniox_stt(wav_bytes, model)
-    elif model.startswith("gemini"):
-        text = gemini_stt(wav_bytes, model)
-    else:
-        text = google_stt(wav_bytes, model)
+    """Transcribe *audio* with *model*.
+
+    upload_format "auto" picks the model's preferred codec from providers.py.
+    Results are cached on disk by audio, model and prompt; use_cache=False bypasses
+    the cache for both reads and writes.
+    hedge_with also sends to that model if *model* is slower than usual (see hedge.py).
+    chunk_s splits audio over 1.5 chunks long into parallel requests (see
+    long_audio.py). Audio over the provider's duration limit is always split.
+    """
+    if isinstance(audio, io.BytesIO):
+        audio = Audio.from_wav_io(audio)
+
+    max_duration_s = providers.for_model(model).max_duration_s
+    if chunk_s is not None or (max_duration_s and audio.duration_s > max_duration_s):
+        import long_audio
+
+        return long_audio.transcribe(
+            audio,
+            model,
+            chunk_s=chunk_s or long_audio.DEFAULT_CHUNK_S,
+            max_duration_s=max_duration_s,
+            transcribe_chunk=lambda audio, model: speech_to_text(
+                audio, model, upload_format, use_cache, hedge_with
+            ),
+        )
+
+    if hedge_with is not None:
+        from hedge import hedged_speech_to_text
+
+        return hedged_speech_to_text(
+            audio,
+            model,
+            hedge_with,
+            transcribe=lambda audio, model: speech_to_text_result(
+                audio, model, upload_format, use_cache
+            ),
+        )["text"]
+
+    return speech_to_text_result(audio, model, upload_format, use_cache)["text"]
+
+
+def warm_up_openai(model: Model) -> None:
+    sessions.openai_client().models.retrieve(model)
+
+
+def warm_up_azure(model: Model) -> None:
+    endpoint = os.environ["AZURE_SPEECH_ENDPOINT"].rstrip("/")
+    sessions.get_session(endpoint).warm_up()
+
 
-    return text.strip().replace("\n", "⏎")
+def warm_up_elevenlabs(model: Model) -> None:
+    sessions.get_session(ELEVENLABS_URL).warm_up()
+
+
+def warm_up_soniox(model: Model) -> None:
+    sessions.get_session(soniox.SONIOX_URL).warm_up()
+
+
+def warm_up_google(model: Model) -> None:
+    sessions.google_speech_client(GOOGLE_SPEECH_ENDPOINT)
+
+
+def warm_up_gemini(model: Model) -> None:
+    sessions.genai_client().models.get(model=model)
+
+
+def warm_up(models: Iterable[Model], background: bool = True) -> None:
+    """Import SDKs and open provider connections ahead of the first dictation.
+
+    Best effort: failures are printed and otherwise ignored.
+    """
+
+    def run():
+        for model in models:
+            try:
+                providers.for_model(model).warm_up(model)
+            except Exception as exc:
+                print(f"Warm-up failed for {model}: {exc}")
+
+    if background:
+        threading.Thread(target=run, daemon=True).start()
+    else:
+        run()
@@ -0,0 +1,156 @@
+"""On-disk cache of transcriptions, keyed by a hash of everything that affects the text.
+
+Entries are small JSON files under .private/stt_cache/. A file's mtime is its last
+use, so eviction is LRU: entries unused for `max_age_s` go first, then the least
+recently used until the cache fits in `max_bytes`, checked every `evict_every` puts.
+The `memory_entries` most recently used entries are also kept in memory, so a
+repeat lookup is a dict hit; they expire after `max_age_s` unused too.
+
+    python stt_cache.py          # Show size
+    python stt_cache.py --clear  # Delete everything
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+CACHE_DIR = Path(".private") / "stt_cache"
+
+
+def make_key(audio_digest: str, *parts: str) -> str:
+    """Hash of the audio digest and every other input (model, prompt, language...)."""
+    return hashlib.sha256("\0".join([audio_digest, *parts]).encode()).hexdigest()
+
+
+class TranscriptionCache:
+    def __init__(
+        self,
+        directory: Path = CACHE_DIR,
+        max_bytes: int = 20_000_000,
+        max_age_s: float = 30 * 24 * 3600,
+        memory_entries: int = 256,
+        evict_every: int = 50,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.memory_entries = memory_entries
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        # key -> (entry, last used), least recently used first
+        self._memory: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _remember(self, key: str, entry: dict) -> None:
+        """Call with the lock held."""
+        self._memory[key] = (entry, time.time())
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> dict | None:
+        entry = None
+        with self._lock:
+            if key in self._memory:
+                entry, used_at = self._memory[key]
+                if time.time() - used_at > self.max_age_s:
+                    entry = None  # Expired like the file, which the check below removes
+                    del self._memory[key]
+        path = self._path(key)
+
+        if entry is None:
+            try:
+                if time.time() - path.stat().st_mtime > self.max_age_s:
+                    path.unlink(missing_ok=True)
+                else:
+                    entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                pass
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, entry)
+
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        with self._lock:
+            self._remember(key, entry)
+            self._puts += 1
+            due = self._puts % self.evict_every == 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(entry), encoding="utf-8")
+        os.replace(tmp_path, path)  # Atomic, so readers never see half a file
+        if due:  # Globbing the directory on every put would cost more than the put
+            self.evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Evicted by another thread
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self) -> None:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        oldest_allowed = time.time() - self.max_age_s
+
+        for mtime, size, path in entries:
+            if mtime >= oldest_allowed and total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self._memory.pop(path.stem, None)
+
+    def clear(self) -> None:
+        for _, _, path in self._entries():
+            path.unlink(missing_ok=True)
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> dict:
+        entries = self._entries() if self.directory.exists() else []
+        lookups = self.hits + self.misses
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=round(self.hits / lookups, 3) if lookups else None,
+            entries=len(entries),
+            bytes=sum(size for _, size, _ in entries),
+        )
+
+
+if __name__ == "__main__":
+    import sys
+
+    cache = TranscriptionCache()
+    if "--clear" in sys.argv:
+        cache.clear()
+        print(f"Cleared {CACHE_DIR}")
+    else:
+        cache.evict()
+        print(cache.stats())
@@ -0,0 +1,118 @@
+import threading
+
+from hotkeys import Combo, ComboIndex, Dispatcher
+
+CTRL, ALT, Q = 0x11, 0x12, 0x51
+
+
+class Submitted:
+    """Stands in for a Dispatcher: keeps the callbacks instead of running them."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def submit(self, callback):
+        self.callbacks.append(callback)
+
+
+def press(combo_or_index, *vks):
+    return [combo_or_index.handle(vk, True, False) for vk in vks]
+
+
+def release(combo_or_index, *vks):
+    return [combo_or_index.handle(vk, False, True) for vk in vks]
+
+
+def on_press():
+    pass
+
+
+def on_release():
+    pass
+
+
+def test_hold_calls_back_on_full_press_and_first_release():
+    combo = Combo({CTRL, Q}, on_press, on_release)
+    assert press(combo, CTRL) == [(False, None)]
+    # The key completing the combo is swallowed, and so are its repeats
+    assert press(combo, Q, Q) == [(True, on_press), (True, None)]
+    assert combo.triggered_at is not None
+    assert release(combo, Q) == [(False, on_release)]
+    assert release(combo, CTRL) == [(False, None)]
+
+
+def test_hold_starts_over_after_a_release():
+    combo = Combo({CTRL, Q}, on_press, on_release)
+    press(combo, CTRL, Q)
+    release(combo, CTRL)
+    # Q's repeat counts as pressing it again, completing the combo
+    assert press(combo, CTRL, Q) == [(False, None), (True, on_press)]
+
+
+def test_toggle_calls_back_once_everything_is_released():
+    combo = Combo({CTRL, Q}, on_press)
+    assert press(combo, CTRL, Q) == [(False, None), (True, None)]
+    assert release(combo, Q) == [(False, None)]
+    assert release(combo, CTRL) == [(False, on_press)]
+    # Ctrl alone afterwards isn't swallowed
+    assert press(combo, CTRL) == [(False, None)]
+
+
+def test_toggle_ignores_a_partial_combo():
+    combo = Combo({CTRL, Q}, on_press)
+    press(combo, CTRL)
+    assert release(combo, CTRL) == [(False, None)]
+
+
+def test_index_only_reaches_combos_using_the_key():
+    submitted = Submitted()
+    index = ComboIndex(submitted)
+    hold = Combo({CTRL, Q}, on_press, on_release)
+    toggle = Combo({ALT}, on_press)
+    index.add(hold)
+    index.add(toggle)
+    assert len(index) == 2
+
+    assert press(index, 0x41) == [False]  # No combo uses A
+    assert press(index, CTRL, Q) == [False, True]
+    assert submitted.callbacks == [on_press]
+
+    index.remove(hold)
+    assert len(index) == 1
+    assert press(index, Q) == [False]
+    assert press(index, ALT) + release(index, ALT) == [True, False]
+    assert submitted.callbacks == [on_press, on_press]
+
+    index.remove(toggle)
+    assert len(index) == 0
+    assert press(index, ALT) == [False]
+
+
+def test_index_shares_a_key_between_combos():
+    submitted = Submitted()
+    index = ComboIndex(submitted)
+    ctrl_q = Combo({CTRL, Q}, on_press, on_release)
+    ctrl_alt = Combo({CTRL, ALT}, on_press, on_release)
+    index.add(ctrl_q)
+    index.add(ctrl_alt)
+    press(index, CTRL, ALT)
+    release(index, ALT)
+    assert submitted.callbacks == [on_press, on_release]
+    index.remove(ctrl_alt)
+    press(index, Q)
+    assert submitted.callbacks == [on_press, on_release, on_press]
+
+
+def test_dispatcher_runs_callbacks_in_order_on_one_thread():
+    dispatcher = Dispatcher(delay_s=0.01)
+    calls = []
+    for i in range(20):
+        dispatcher.submit(lambda i=i: calls.append((i, threading.get_ident())))
+    dispatcher.submit(lambda: 1 / 0)  # Printed, and the next still runs
+    dispatcher.submit(lambda: calls.append(("last", threading.get_ident())))
+    dispatcher.close()
+
+    assert [i for i, _ in calls] == [*range(20), "last"]
+    assert len({thread for _, thread in calls}) == 1
+    assert threading.get_ident() not in {thread for _, thread in calls}
+    assert dispatcher.dispatched == 22
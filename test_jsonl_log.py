@@ -0,0 +1,13 @@
+from jsonl_log import JsonlLog, read_records
+
+
+def test_rotations_in_the_same_second_prune_the_oldest(tmp_path):
+    log = JsonlLog(tmp_path / "log.jsonl", max_records=1, keep=3)
+    for i in range(5):
+        log.log(dict(i=i))
+    log.flush()
+    log.close()
+
+    segments = log.segments()
+    assert len(segments) == 3
+    assert [r["i"] for r in read_records(log.path, segments=True)] == [2, 3, 4]
@@ -0,0 +1,37 @@
+import pytest
+
+from long_audio import stitch
+
+
+@pytest.mark.parametrize(
+    "texts, stitched",
+    [
+        (
+            ["The quick brown fox jumps over", "fox jumps over the lazy dog."],
+            "The quick brown fox jumps over the lazy dog.",
+        ),
+        # Matched case-insensitively, keeping the left chunk's
+        (["I said the", "The cat sat."], "I said the cat sat."),
+        # Punctuation after the seam comes from the right chunk
+        (["one two three.", "Three, four five."], "one two three, four five."),
+    ],
+)
+def test_words_repeated_at_the_seam_are_kept_once(texts, stitched):
+    assert stitch(texts) == stitched
+
+
+def test_chunks_without_overlap_are_joined_with_a_space():
+    assert stitch(["Hello there.", "General Kenobi."]) == "Hello there. General Kenobi."
+
+
+@pytest.mark.parametrize(
+    "texts, stitched",
+    [
+        (["", "Hello."], "Hello."),
+        (["Hello there.", "", "  ", "Bye."], "Hello there. Bye."),
+        (["Hello.", ""], "Hello."),
+        ([], ""),
+    ],
+)
+def test_empty_chunks_are_skipped(texts, stitched):
+    assert stitch(texts) == stitched
@@ -0,0 +1,41 @@
+import socket
+import threading
+import time
+
+from mock_servers import EchoHandler, MockServer
+from sessions import HTTPSession
+
+
+def test_warmed_up_tls_connection_is_reused():
+    with MockServer(EchoHandler, tls=True) as server:
+        session = HTTPSession(server.base_url, context=server.client_context)
+        session.warm_up()
+        for _ in range(2):
+            assert session.request_json("POST", "/echo", body=b"hello") == dict(
+                ok=True, bytes=5
+            )
+        session.close()
+    assert session.connections_opened == 1
+
+
+def test_connection_closed_by_server_is_not_reused():
+    # Answers one request per connection, then closes it without saying so
+    listener = socket.create_server(("127.0.0.1", 0))
+    response = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok"
+
+    def serve():
+        for _ in range(2):
+            conn, _ = listener.accept()
+            with conn:
+                conn.recv(65_536)
+                conn.sendall(response)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    session = HTTPSession(f"http://127.0.0.1:{listener.getsockname()[1]}")
+    assert session.request("GET", "/") == b"ok"
+    time.sleep(0.05)  # Let the server's FIN arrive
+    assert session.request("GET", "/") == b"ok"
+    assert session.connections_opened == 2
+    thread.join(timeout=5)
+    listener.close()
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from audio import Audio, Upload
+from bench_utils import synthetic_speech, to_wav
+from silence import SilenceSettings, compact_silence, frame_levels_db, keep_mask
+
+SAMPLE_RATE = 24_000
+
+
+def burst_clip(seconds: float, burst_at_s: float = 0.04) -> np.ndarray:
+    """Quiet noise with a 20 ms tone burst: a quick tap of the hotkey."""
+    rng = np.random.default_rng(0)
+    samples = (30 * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.int16)
+    start = int(burst_at_s * SAMPLE_RATE)
+    t = np.arange(int(0.02 * SAMPLE_RATE)) / SAMPLE_RATE
+    samples[start : start + len(t)] = (8000 * np.sin(2 * np.pi * 220 * t)).astype(
+        np.int16
+    )
+    return samples
+
+
+@pytest.mark.parametrize("seconds", [0.1, 0.2, 0.28, 0.34])
+def test_clips_shorter_than_the_padding_kernel(seconds):
+    samples = burst_clip(seconds)
+    settings = SilenceSettings()
+    frame_len = int(settings.frame_s * SAMPLE_RATE)
+
+    keep = keep_mask(samples, SAMPLE_RATE, settings)
+    assert keep is not None
+    assert len(keep) == len(frame_levels_db(samples, frame_len))
+
+    audio = Audio(to_wav(samples))
+    trimmed, removed_s = compact_silence(audio, settings)
+    assert removed_s >= 0
+    assert trimmed.duration_s <= audio.duration_s
+
+
+def test_padding_extends_speech_both_ways():
+    samples = burst_clip(1.0, burst_at_s=0.5)
+    keep = keep_mask(samples, SAMPLE_RATE, SilenceSettings(edge_padding_s=0.1))
+    kept = np.flatnonzero(keep)
+    # Burst in frame 25, padded by 5 frames each side
+    assert (kept[0], kept[-1]) == (20, 30)
+
+
+def test_long_recording_is_trimmed():
+    audio = Audio(to_wav(synthetic_speech(20)))
+    trimmed, removed_s = compact_silence(audio)
+    assert removed_s > 0
+    assert trimmed.duration_s == pytest.approx(audio.duration_s - removed_s, abs=0.02)
+
+
+def test_background_encoded_upload_is_kept_unless_trimming_saves_more():
+    audio = Audio(to_wav(synthetic_speech(20)))
+    _, removed_s = compact_silence(audio)
+    assert 0.25 < removed_s < 3.0
+    audio.add_upload(Upload(b"opus", "opus", audio.duration_s))
+
+    assert compact_silence(audio, upload_format="opus") == (audio, 0.0)
+    settings = SilenceSettings(min_removed_encoded_s=1.0)
+    trimmed, removed_s = compact_silence(audio, settings, upload_format="opus")
+    assert trimmed is not audio and removed_s > 1.0
@@ -0,0 +1,37 @@
+from timeit import default_timer
+
+import pytest
+
+import soniox
+from audio import Upload
+from mock_servers import SonioxMockServer
+
+
+def transcribe(server: SonioxMockServer, **kwargs) -> str:
+    return soniox.transcribe(
+        Upload(bytes(48_000), "wav", 1.0),
+        "stt-async-v4",
+        api_key="test",
+        base_url=server.base_url,
+        **kwargs,
+    )
+
+
+def test_transcribes():
+    with SonioxMockServer(processing_delay_s=0.1) as server:
+        assert transcribe(server) == server.text
+
+
+def test_running_out_of_intervals_is_a_timeout():
+    with SonioxMockServer(processing_delay_s=60) as server:
+        with pytest.raises(TimeoutError, match="intervals ran out"):
+            transcribe(server, intervals=[0.01, 0.01])
+        assert server.status_polls == 2
+
+
+def test_deadline_covers_the_upload():
+    with SonioxMockServer(request_delay_s=2) as server:
+        started_at = default_timer()
+        with pytest.raises(TimeoutError):
+            transcribe(server, timeout_s=0.3)
+        assert default_timer() - started_at < 1
@@ -0,0 +1,26 @@
+"""Token-level diffs between transcripts."""
+
+import re
+from difflib import SequenceMatcher
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]|\s+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text)
+
+
+def changed_indexes(
+    root_tokens: list[str], other_tokens: list[str]
+) -> tuple[set[int], set[int]]:
+    matcher = SequenceMatcher(a=root_tokens, b=other_tokens)
+    root_changes = set()
+    other_changes = set()
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        root_changes.update(range(i1, i2))
+        other_changes.update(range(j1, j2))
+
+    return root_changes, other_changes
@@ -1,15 +1,24 @@
 # %%
 import gc
-import json
+import threading
 import tkinter as tk
 import tomllib
 from pathlib import Path
 
+import jsonl_log
 import kb
+import local_stt
+import long_audio
+import providers
+from audio import Audio, save_wav
+from milestones import Milestones
 from recorder import Recorder
 from border import Border
-import keyboard
-from openai import OpenAI
+from pipelined_upload import PipelinedTranscription
+from output import OutputWriter, make_sink
+import sessions
+import stt
+from silence import SilenceSettings, compact_silence
 from utils import stopwatch
 
 from dotenv import load_dotenv
@@ -20,6 +29,21 @@ config = tomllib.loads(Path(__file__).with_name("config.toml").read_text())
 hotkey = config["hotkey"]
 model = config["batch_model"]
 push_to_talk = config["push_to_talk"]
+warm_up = config["warm_up"]
+upload_format = config["upload_format"]
+if upload_format == "auto":
+    upload_format = stt.default_upload_format(model)
+# Transcribed on this machine (local_stt.py): nothing to upload, pipeline or chunk
+local_model = providers.for_model(model).name == "local"
+recording_mode = config["recording_mode"]
+# Trimming makes a trimmed copy in RAM, which mapped recordings are meant to avoid
+trim_silence = config["trim_silence"] and recording_mode != "mapped"
+silence_settings = SilenceSettings.from_config(config)
+long_audio_chunk_s = config["long_audio_chunk_s"]
+pipelined_upload = config["pipelined_upload"]
+always_open_stream = config["always_open_stream"]
+preroll_s = config["preroll_ms"] / 1000
+output_method = config["output_method"]
 TRANSCRIPTION_PROMPT = """\
 Use unicode characters where appropriate, like 'CO₂' and '45°'.
 User is an AI Engineer who uses Python and JavaScript, among other languages. 
@@ -27,90 +51,192 @@ Use UK spelling, not US spelling."""
 
 PRIVATE_DIR = Path(".private")
 LAST_RECORDING_PATH = PRIVATE_DIR / "last_recording.wav"
-LOG_PATH = PRIVATE_DIR / "log.jsonl"
 
 
 class Transcriber:
     def __init__(self, root: tk.Tk):
         self.border = Border(root)
-        self.rec = Recorder()
+        # A pipelined upload sends WAV, so no need to encode in the background
+        self.rec = Recorder(
+            "wav" if pipelined_upload else upload_format,
+            recording_mode,
+            always_open_stream,
+            preroll_s,
+        )
+        self.pipeline = None
+        self.output = OutputWriter(make_sink(output_method))
+        self.milestones = Milestones()
+
+        if warm_up:
+            stt.warm_up([model])
 
         if push_to_talk:
-            kb.add_hold_hotkey(hotkey, self.start, self.stop_and_transcribe)
+            self.hotkey = kb.add_hold_hotkey(
+                hotkey, self.start, self.stop_and_transcribe
+            )
         else:
-            kb.add_hotkey(hotkey, self.toggle_recording)
+            self.hotkey = kb.add_hotkey(hotkey, self.toggle_recording)
 
     def start(self):
         if self.rec.recording:
             return
 
+        self.milestones = Milestones()
+        self.milestones.mark("hotkey_down", self.hotkey.triggered_at)
+        self.milestones.mark("callback")
         self.border.show("#F8312F")
 
-        self.rec.start()
+        if pipelined_upload and not local_model:
+            self.pipeline = PipelinedTranscription(
+                model, self.rec.sample_rate, TRANSCRIPTION_PROMPT
+            )
+        self.rec.start(
+            on_audio=self.pipeline.write if self.pipeline else None,
+            started_at=self.hotkey.triggered_at,
+            milestones=self.milestones,
+        )
 
     def stop(self):
         if not self.rec.recording:
             return None
 
-        wav_bytes = self.rec.stop()
+        self.milestones.mark("hotkey_up", self.hotkey.triggered_at)
+        audio = self.rec.stop()
         gc.collect()  # If GC happens during keyboard() methods, it errors, so we force one now (~15ms)
 
         self.border.hide()
-        return wav_bytes
+        return audio
 
     def stop_and_transcribe(self):
-        wav_bytes = self.stop()
-        if wav_bytes is not None:
-            self.transcribe(wav_bytes)
-
-    def transcribe(self, wav_bytes):
+        # This dictation's: the next press replaces self.milestones and self.pipeline
+        milestones, pipeline = self.milestones, self.pipeline
+        self.pipeline = None
+        audio = self.stop()
+        if audio is not None:
+            # Off kb's dispatcher thread, so the next hotkey press isn't held up
+            threading.Thread(
+                target=self.transcribe, args=(audio, milestones, pipeline)
+            ).start()
+
+    def transcribe(
+        self,
+        audio: Audio,
+        milestones: Milestones,
+        pipeline: PipelinedTranscription | None = None,
+    ):
         PRIVATE_DIR.mkdir(exist_ok=True)
         self.border.show("#FFB02E")
 
         # TODO: Hide the orange border in a finally block so API/keyboard errors
         # cannot leave it stuck on screen.
         with stopwatch("Transcription", log=False) as sw:
-            wav_bytes.seek(0)
-            stream = OpenAI().audio.transcriptions.create(
-                model=model,
-                file=("audio.wav", wav_bytes),
-                language="en",
-                response_format="text",
-                prompt=TRANSCRIPTION_PROMPT,
-                stream=True,
-            )
-
-            text = ""
-            for event in stream:
-                if event.type == "transcript.text.delta":
-                    delta = event.delta.replace("\n", "⏎")
-                    keyboard.write(delta)
-                    text += delta
-                elif event.type == "transcript.text.done":
-                    text = event.text.strip().replace("\n", "⏎")
+            silence_removed_s, chunked, text = 0.0, False, None
+            if pipeline is not None:
+                try:
+                    # Uploaded while recording, so only the tail was left to send
+                    text = self.type_deltas(pipeline.finish(), milestones)
+                    milestones.mark("upload_done", pipeline.upload_done_at)
+                    sent_format, upload_bytes = "wav", pipeline.bytes_sent
+                except Exception as exc:
+                    # Once some is typed, sending it all again would repeat that
+                    if "first_delta" in milestones.times:
+                        raise
+                    # The whole recording's here, so the dictation needn't be lost
+                    print(f"Pipelined upload failed, sending the recording: {exc!r}")
+                    pipeline = None
+            if text is None:
+                trimmed = audio
+                if trim_silence:
+                    trimmed, silence_removed_s = compact_silence(
+                        audio, silence_settings, upload_format
+                    )
+                chunked = (
+                    not local_model
+                    and long_audio_chunk_s > 0
+                    and long_audio.should_split(trimmed.duration_s, long_audio_chunk_s)
+                )
+                if chunked:
+                    # Typed in one go once the slowest chunk is back
+                    text = long_audio.transcribe(
+                        trimmed,
+                        model,
+                        long_audio_chunk_s,
+                        transcribe_chunk=self.transcribe_chunk,
+                    )
+                    milestones.mark("first_delta")
+                    milestones.mark("last_delta")
+                    self.output.write(text)
+                    sent_format, upload_bytes = upload_format, None
+                elif local_model:
+                    # Nothing to send: upload_done is when the model gets the audio
+                    milestones.mark("upload_done")
+                    # Whisper's own VAD, unless the silence was trimmed here
+                    events = local_stt.events(
+                        trimmed.upload("wav"), model, vad_filter=not trim_silence
+                    )
+                    text = self.type_deltas(events, milestones)
+                    sent_format, upload_bytes = "wav", None
+                else:
+                    upload = trimmed.upload(upload_format)
+                    # Instant if the recorder's background encode could be used
+                    milestones.mark("encoded")
+                    stream = sessions.openai_client().audio.transcriptions.create(
+                        model=model,
+                        file=(upload.filename, bytes(upload.data), upload.mime_type),
+                        language="en",
+                        response_format="text",
+                        prompt=TRANSCRIPTION_PROMPT,
+                        stream=True,
+                    )
+                    # The response has started, so the upload's done
+                    milestones.mark("upload_done")
+                    text = self.type_deltas(stream, milestones)
+                    sent_format, upload_bytes = upload.format, len(upload.data)
+            self.output.flush()
+            milestones.mark("typed")
 
         self.border.hide()
 
-        n_frames = sum(len(x) for x in self.rec.frames)
-        log_line = json.dumps(
+        jsonl_log.log(
             dict(
-                audio_length_s=n_frames / self.rec.stream.samplerate,
+                audio_length_s=audio.duration_s,
+                silence_removed_s=round(silence_removed_s, 2),
+                pipelined=pipeline is not None,
+                chunked=chunked,
+                upload_format=sent_format,
+                upload_bytes=upload_bytes,
                 transcribe_time_ms=int(sw.get_time_ms()),
+                milestones_ms=milestones.as_ms(),
                 text=text,
             )
         )
-
-        # Log the text
-        if not LOG_PATH.exists():
-            LOG_PATH.write_text(log_line)
-        else:
-            log_lines = LOG_PATH.read_text().splitlines()[-499:]  # Truncate
-            log_lines.append(log_line)
-            LOG_PATH.write_text("\n".join(log_lines))
-
-        # Log the last recording
-        with open(LAST_RECORDING_PATH, "wb") as f:
-            f.write(wav_bytes.getbuffer())
+        # Keep the last recording, untrimmed so bench_silence.py can compare. On the
+        # log's thread, so the next hotkey press needn't wait for the write.
+        jsonl_log.run(save_wav, audio, LAST_RECORDING_PATH)
+
+    def type_deltas(self, stream, milestones: Milestones) -> str:
+        text = ""
+        for event in stream:
+            if event.type == "transcript.text.delta":
+                milestones.mark("first_delta")
+                milestones.mark_latest("last_delta")
+                delta = event.delta.replace("\n", "⏎")
+                self.output.write(delta)
+                text += delta
+            elif event.type == "transcript.text.done":
+                text = event.text.strip().replace("\n", "⏎")
+        return text
+
+    def transcribe_chunk(self, audio: Audio, model: str) -> str:
+        upload = audio.upload(upload_format)
+        text = sessions.openai_client().audio.transcriptions.create(
+            model=model,
+            file=(upload.filename, bytes(upload.data), upload.mime_type),
+            language="en",
+            response_format="text",
+            prompt=TRANSCRIPTION_PROMPT,
+        )
+        return text.strip().replace("\n", "⏎")
 
     def toggle_recording(self):
         if not self.rec.recording:
@@ -119,10 +245,11 @@ class Transcriber:
             self.stop_and_transcribe()
 
 
-root = tk.Tk()
-transcriber = Transcriber(root)
+if __name__ == "__main__":
+    root = tk.Tk()
+    transcriber = Transcriber(root)
 
-try:
-    root.mainloop()
-finally:
-    kb.remove_all_hotkeys()
+    try:
+        root.mainloop()
+    finally:
+        kb.remove_all_hotkeys()
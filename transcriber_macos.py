@@ -3,6 +3,7 @@ from openai import OpenAI
 from pynput.keyboard import GlobalHotKeys
 from pynput import keyboard as kb
 from recorder import Recorder
+from silence import compact_silence
 
 
 # Similar logic to transcriber.py, but pynput is less buggy on macOS.
@@ -30,14 +31,14 @@ class Transcriber:
     def stop(self):
         self.controller.tap(kb.Key.backspace)
 
-        wav_bytes = self.rec.stop()
-        return wav_bytes
+        audio, _ = compact_silence(self.rec.stop())
+        return audio
 
-    def transcribe(self, wav_bytes):
+    def transcribe(self, audio):
         self.controller.type("⌛")
         text = self.oai.audio.transcriptions.create(
             model="gpt-4o-transcribe",
-            file=("audio.wav", wav_bytes),
+            file=("audio.wav", bytes(audio.wav)),
             language="en",
             response_format="text",
             prompt="Use unicode characters where appropriate, like 'CO₂' and '45°'.",
@@ -50,8 +51,9 @@ class Transcriber:
         if not self.rec.recording:
             self.start()
         else:
-            wav_bytes = self.stop()
-            self.transcribe(wav_bytes)
+            audio = self.stop()
+            self.transcribe(audio)
+
 
 transcriber = Transcriber()
 transcriber.run()
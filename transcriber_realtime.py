@@ -1,141 +1,225 @@
 # Realtime transcription flow:
 # 1. The configured hotkey starts recording, either while held or until pressed again.
-# 2. Recording starts immediately; OpenAI realtime setup happens in the sender thread.
-# 3. Microphone chunks are appended to the realtime input buffer as they arrive.
-# 4. Transcription deltas are written to the active window while speech is still being captured.
+# 2. Recording starts immediately; the realtime session is already open (warm_up), or
+#    is opened in the sender thread.
+# 3. Microphone chunks are batched into realtime_batch_ms appends to the input buffer.
+# 4. Transcription deltas are typed into the active window, by a writer thread so typing
+#    never holds up receiving, while speech is still being captured.
 # 5. Stopping recording closes the microphone stream, commits the buffer, and waits for the final completed event.
 
-import base64
-import queue
 import threading
 import tkinter as tk
 import tomllib
 from pathlib import Path
+from timeit import default_timer
 
-import keyboard
 from dotenv import load_dotenv
 from openai import OpenAI
 from sounddevice import RawInputStream
 
+import jsonl_log
 import kb
 import volume
+from audio import PrerollRing, block_started_at
 from border import Border
+from milestones import Milestones
+from output import OutputWriter, make_sink
+from realtime_audio import AudioBatcher, append_message
+from realtime_session import WarmSessions
 
 
 config = tomllib.loads(Path(__file__).with_name("config.toml").read_text())
 model = config["realtime_model"]
 hotkey = config["hotkey"]
 push_to_talk = config["push_to_talk"]
+batch_ms = config["realtime_batch_ms"]
+warm_up = config["warm_up"]
+always_open_stream = config["always_open_stream"]
+preroll_s = config["preroll_ms"] / 1000
+output_method = config["output_method"]
+
+SESSION = dict(
+    type="transcription",
+    audio=dict(
+        input=dict(
+            format=dict(type="audio/pcm", rate=24_000),
+            transcription=dict(
+                model=model,
+                language="en",
+                delay="xhigh",  # "minimal", "low", "medium", "high", "xhigh"
+            ),
+            turn_detection=None,
+        )
+    ),
+)
 
 
 class TranscriberRealtime:
     def __init__(self, root: tk.Tk):
         self.border = Border(root)
         self.client = OpenAI()
-        self.audio_queue = queue.Queue()
+        self.sessions = WarmSessions(self.client, SESSION, keep_warm=warm_up)
+        self.batcher = AudioBatcher(24_000, batch_ms)
         self.completed = threading.Event()
-        self.connection = None
+        self.output = OutputWriter(make_sink(output_method))
+        self.session = None
+        self.milestones = Milestones()
+        self.text = ""
         self.stream = None
         self.sender_thread = None
         self.receiver_thread = None
         self.recording = False
         self.recording_lock = threading.Lock()
+        # Whether the callback sends audio or keeps it as pre-roll (always_open_stream)
+        self.capturing = False
+        self.capture_lock = threading.Lock()
         self.wrote_text = False
 
+        self.preroll = None
+        if always_open_stream:
+            self.preroll = PrerollRing(24_000, preroll_s)
+            self.stream = self.open_stream()
+
         if push_to_talk:
-            kb.add_hold_hotkey(hotkey, self.start, self.stop)
+            self.hotkey = kb.add_hold_hotkey(hotkey, self.start, self.stop)
         else:
-            kb.add_hotkey(hotkey, self.toggle_recording)
+            self.hotkey = kb.add_hotkey(hotkey, self.toggle_recording)
+
+    def open_stream(self) -> RawInputStream:
+        stream = RawInputStream(
+            samplerate=24_000,
+            channels=1,
+            dtype="int16",
+            callback=self.process_audio_input,
+        )
+        stream.start()
+        return stream
 
     def start(self):
         with self.recording_lock:
             if self.recording:
                 return
 
-            self.audio_queue = queue.Queue()
+            self.milestones = Milestones()
+            self.milestones.mark("hotkey_down", self.hotkey.triggered_at)
+            self.milestones.mark("callback")
+            pressed_at = self.milestones.times["hotkey_down"]
+            self.text = ""
+            self.batcher = AudioBatcher(24_000, batch_ms)
             self.completed.clear()
             self.wrote_text = False
             self.recording = True
 
+            if self.preroll is not None:
+                # The stream's running: capture from the press before anything slow
+                with self.capture_lock:
+                    self.batcher.write(self.preroll.since(pressed_at))
+                    self.capturing = True
+                    self.milestones.mark("first_audio")
+
             self.border.show("#F8312F")
             volume.duck()
+            self.milestones.mark("ducked")
 
             self.sender_thread = threading.Thread(target=self.send_audio)
             self.sender_thread.start()
 
-            self.stream = RawInputStream(
-                samplerate=24_000,
-                channels=1,
-                dtype="int16",
-                callback=self.process_audio_input,
-            )
-            self.stream.start()
+            if self.preroll is None:
+                self.capturing = True
+                self.stream = self.open_stream()
+                self.milestones.mark("stream_started")
 
     def stop(self):
         with self.recording_lock:
             if not self.recording:
                 return
 
+            self.milestones.mark("hotkey_up", self.hotkey.triggered_at)
             self.recording = False
-            self.stream.close()
+            if self.preroll is None:
+                self.stream.close()
+                self.capturing = False
+            else:
+                with self.capture_lock:
+                    self.capturing = False
             volume.restore()
             self.border.hide()
-            self.audio_queue.put(None)
-
-    def process_audio_input(self, indata, *_):
-        self.audio_queue.put(bytes(indata))
+            self.batcher.close()
+
+    def process_audio_input(self, indata, frames, time_info, status):
+        if self.preroll is None:
+            self.milestones.mark("first_audio")
+            self.batcher.write(indata)
+            return
+        now = default_timer()
+        with self.capture_lock:
+            if self.capturing:
+                self.milestones.mark("first_audio")
+                self.batcher.write(indata)
+            else:
+                self.preroll.write(indata, block_started_at(time_info, now))
 
     def send_audio(self):
-        with self.client.realtime.connect(
-            extra_query=dict(intent="transcription")
-        ) as self.connection:
-            self.receiver_thread = threading.Thread(target=self.receive_events)
-            self.receiver_thread.start()
-
-            self.connection.session.update(
-                session=dict(
-                    type="transcription",
-                    audio=dict(
-                        input=dict(
-                            format=dict(type="audio/pcm", rate=24_000),
-                            transcription=dict(
-                                model=model,
-                                language="en",
-                                delay="xhigh",  # "minimal", "low", "medium", "high", "xhigh"
-                            ),
-                            turn_detection=None,
-                        )
-                    ),
-                )
+        self.session = session = self.sessions.acquire()
+        self.milestones.mark("session_ready")
+        self.receiver_thread = threading.Thread(target=self.receive_events)
+        self.receiver_thread.start()
+
+        for batch in self.batcher:
+            session.connection.send_raw(append_message(batch))
+
+        session.connection.input_audio_buffer.commit()
+        self.milestones.mark("upload_done")
+        # Set by the receiver on completion, an error event or the connection closing
+        self.completed.wait()
+        self.receiver_thread.join()
+        self.sessions.release(session)
+        self.output.flush()
+        self.milestones.mark("typed")
+
+        milestones_ms = self.milestones.as_ms()
+        warm = session.opened_at <= self.milestones.times["hotkey_down"]
+        first_delta_ms = milestones_ms.get("first_delta")
+        print(
+            f"Session ready {milestones_ms['session_ready']:.0f} ms after press"
+            f" ({'warm' if warm else 'cold'}, connect took"
+            f" {session.connect_s * 1000:.0f} ms), first delta"
+            f" {'none' if first_delta_ms is None else f'{first_delta_ms:.0f} ms'}"
+        )
+        jsonl_log.log(
+            dict(
+                realtime=True,
+                model=model,
+                session_warm=warm,
+                connect_ms=round(session.connect_s * 1000),
+                milestones_ms=milestones_ms,
+                text=self.text,
             )
-
-            while True:
-                audio_chunk = self.audio_queue.get()
-                if audio_chunk is None:
-                    break
-                self.connection.input_audio_buffer.append(
-                    audio=base64.b64encode(audio_chunk).decode("ascii")
-                )
-
-            self.connection.input_audio_buffer.commit()
-            # TODO: Handle realtime error/failure events so this wait cannot hang
-            # forever when the API rejects a session or transcription config.
-            self.completed.wait()
-            self.connection.close()
-            self.receiver_thread.join()
+        )
 
     def receive_events(self):
-        for event in self.connection:
-            if event.type == "conversation.item.input_audio_transcription.delta":
-                text = event.delta
-                if not self.wrote_text:
-                    self.wrote_text = True
-                    text = text.lstrip()
-
-                keyboard.write(text)
-            elif event.type == "conversation.item.input_audio_transcription.completed":
-                self.completed.set()
-                break
+        try:
+            for event in iter(self.session.events.get, None):
+                if event.type == "conversation.item.input_audio_transcription.delta":
+                    self.milestones.mark("first_delta")
+                    self.milestones.mark_latest("last_delta")
+                    text = event.delta
+                    if not self.wrote_text:
+                        self.wrote_text = True
+                        text = text.lstrip()
+
+                    self.output.write(text)
+                    self.text += text
+                elif (
+                    event.type
+                    == "conversation.item.input_audio_transcription.completed"
+                ):
+                    break
+                elif event.type == "error":
+                    print(f"Realtime error: {event.error.message}")
+                    break
+        finally:
+            self.completed.set()
 
     def toggle_recording(self):
         if self.recording:
@@ -146,10 +230,14 @@ class TranscriberRealtime:
 
 load_dotenv()
 
-root = tk.Tk()
-transcriber = TranscriberRealtime(root)
-
-try:
-    root.mainloop()
-finally:
-    kb.remove_all_hotkeys()
+if __name__ == "__main__":
+    root = tk.Tk()
+    transcriber = TranscriberRealtime(root)
+
+    try:
+        root.mainloop()
+    finally:
+        kb.remove_all_hotkeys()
+        transcriber.sessions.close()
+        if transcriber.stream is not None:
+            transcriber.stream.close()
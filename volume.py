@@ -1,109 +1,310 @@
+"""Duck the speakers while recording, from a background thread.
+
+duck() and restore() only queue the change, so the hotkey thread never waits on
+the OS: VolumeController applies them in order on its own thread, through a
+backend made on that thread and kept for the life of the process. With
+volume_ramp_ms in config.toml the level slides to its target instead of jumping.
+
+Backends:
+- WindowsBackend: COM initialised once, and the speakers' IAudioEndpointVolume
+  looked up once, again only if a call on it fails (pycaw)
+- MacBackend: `osascript`, 100s of ms a call, but off the hotkey thread now
+- PulseBackend: one long-lived PulseAudio connection (also PipeWire, through
+  pipewire-pulse), via pulsectl; pass it a FakePulse to run without a server
+- NullBackend: does nothing, where none of those is available
+"""
+
+import atexit
+import itertools
+import queue
 import sys
+import threading
 import time
-from typing import Optional
+import tomllib
+from pathlib import Path
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Callable, Protocol
 
-# ---------------------------------------------------------------------------
-# Windows backend (COM/pycaw)
-# ---------------------------------------------------------------------------
-if sys.platform.startswith("win"):
-    from ctypes import POINTER
+config = tomllib.loads(Path(__file__).with_name("config.toml").read_text())
+ramp_s = config["volume_ramp_ms"] / 1000
 
-    import pythoncom
-    from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+RAMP_STEP_S = 0.01
 
-    def _get_endpoint() -> POINTER(IAudioEndpointVolume):
-        """Return **IAudioEndpointVolume** for the current default output."""
-        pythoncom.CoInitialize()
-        device = AudioUtilities.GetSpeakers()
-        return device.EndpointVolume
 
-    def get_level() -> float:
+class Backend(Protocol):
+    def get_level(self) -> float:
         """Current output volume as a percentage (0–100)."""
-        ep = _get_endpoint()
-        try:
-            return ep.GetMasterVolumeLevelScalar() * 100.0
-        finally:
-            try:
-                ep.Release()
-            except Exception:
-                pass
-            pythoncom.CoUninitialize()
-
-    def set_level(percent: float) -> None:
-        """Set output volume to percent (0–100)."""
-        ep = _get_endpoint()
+
+    def set_level(self, percent: float) -> None:
+        """Set output volume to *percent* (0–100)."""
+
+
+class WindowsBackend:
+    """The default output's IAudioEndpointVolume, via pycaw.
+
+    COM objects belong to the thread that made them, so only use this on the
+    thread it was created on.
+    """
+
+    def __init__(self):
+        import pythoncom
+        from pycaw.pycaw import AudioUtilities
+
+        pythoncom.CoInitialize()
+        self._speakers = AudioUtilities.GetSpeakers
+        self._endpoint = self._speakers().EndpointVolume
+
+    def _call(self, method: str, *args):
         try:
-            scalar = max(0.0, min(100.0, percent)) / 100.0
-            ep.SetMasterVolumeLevelScalar(scalar, None)
-        finally:
-            try:
-                ep.Release()
-            except Exception:
-                pass
-            pythoncom.CoUninitialize()
+            return getattr(self._endpoint, method)(*args)
+        except Exception:
+            # The device went away (unplugged, or no longer the default output)
+            self._endpoint = self._speakers().EndpointVolume
+            return getattr(self._endpoint, method)(*args)
 
+    def get_level(self) -> float:
+        return self._call("GetMasterVolumeLevelScalar") * 100.0
 
-# ---------------------------------------------------------------------------
-# macOS backend (AppleScript via `osascript`)
-# ---------------------------------------------------------------------------
-elif sys.platform == "darwin":
-    # This is a bit slow (100's of ms).
-    # You can also use PyObjC's packages and should get <10 ms results.
-    import subprocess
+    def set_level(self, percent: float) -> None:
+        scalar = max(0.0, min(100.0, percent)) / 100.0
+        self._call("SetMasterVolumeLevelScalar", scalar, None)
 
+
+class MacBackend:
+    """AppleScript via `osascript`. A bit slow (100's of ms); PyObjC would be <10 ms."""
+
+    @staticmethod
     def _osascript(script: str) -> str:
+        import subprocess
+
         result = subprocess.run(
-            [
-                "osascript",
-                "-e",
-                script,
-            ],
-            capture_output=True,
-            check=True,
-            text=True,
+            ["osascript", "-e", script], capture_output=True, check=True, text=True
         )
         return result.stdout.strip()
 
-    def get_level() -> float:
-        return float(_osascript("output volume of (get volume settings)"))
+    def get_level(self) -> float:
+        return float(self._osascript("output volume of (get volume settings)"))
 
-    def set_level(percent: float) -> None:
+    def set_level(self, percent: float) -> None:
         vol = int(max(0.0, min(100.0, percent)))
-        _osascript(f"set volume output volume {vol}")
+        self._osascript(f"set volume output volume {vol}")
+
+
+class PulseBackend:
+    """The default sink's volume, over one PulseAudio connection.
+
+    *pulse* is a pulsectl.Pulse, or anything with the same methods (FakePulse).
+    A connection this makes itself is reopened if the server goes away.
+    """
+
+    def __init__(self, pulse=None):
+        self._owns_connection = pulse is None
+        self._pulse = pulse or self._connect()
+        self._sink = None
 
+    @staticmethod
+    def _connect():
+        import pulsectl
 
-# ---------------------------------------------------------------------------
-# Linux / other – fall‑back stubs
-# ---------------------------------------------------------------------------
-else:
+        return pulsectl.Pulse("transcriber")
 
-    def get_level() -> float:
-        """Return a dummy level (100%). Modify for PulseAudio, etc."""
+    def _default_sink(self):
+        # Sink info is a snapshot, so it's fetched again for each reading
+        pulse = self._pulse
+        return pulse.get_sink_by_name(pulse.server_info().default_sink_name)
+
+    def get_level(self) -> float:
+        try:
+            self._sink = self._default_sink()
+        except Exception:
+            if not self._owns_connection:
+                raise
+            self._pulse = self._connect()
+            self._sink = self._default_sink()
+        return self._pulse.volume_get_all_chans(self._sink) * 100.0
+
+    def set_level(self, percent: float) -> None:
+        if self._sink is None:
+            self.get_level()
+        # Allow for volumes over 100%, which PulseAudio supports
+        self._pulse.volume_set_all_chans(self._sink, max(0.0, percent) / 100.0)
+
+
+class NullBackend:
+    def get_level(self) -> float:
         return 100.0
 
-    def set_level(_percent: float) -> None:
-        """No‑op on unsupported platforms."""
+    def set_level(self, percent: float) -> None:
         pass
 
 
-# ---------------------------------------------------------------------------
-# Common helpers – duck / restore
-# ---------------------------------------------------------------------------
-_prev_level: Optional[float] = None
+class FakePulse:
+    """The part of pulsectl.Pulse that PulseBackend uses, with one sink, each call
+    taking call_s. levels records every volume set, for checking ramps."""
+
+    def __init__(self, volume: float = 1.0, call_s: float = 0.0):
+        self.volume = volume
+        self.call_s = call_s
+        self.calls = 0
+        self.levels: list[float] = []
+
+    def _call(self) -> None:
+        self.calls += 1
+        if self.call_s:
+            time.sleep(self.call_s)
+
+    def server_info(self):
+        self._call()
+        return SimpleNamespace(default_sink_name="fake_sink")
+
+    def get_sink_by_name(self, name: str):
+        self._call()
+        return SimpleNamespace(name=name, index=0, volume=self.volume)
+
+    def volume_get_all_chans(self, sink) -> float:
+        return sink.volume  # From the snapshot, as pulsectl does
+
+    def volume_set_all_chans(self, sink, volume: float) -> None:
+        self._call()
+        sink.volume = self.volume = volume
+        self.levels.append(volume)
+
+
+def default_backend() -> Backend:
+    if sys.platform.startswith("win"):
+        return WindowsBackend()
+    if sys.platform == "darwin":
+        return MacBackend()
+    try:
+        return PulseBackend()
+    except Exception as exc:
+        print(f"Volume ducking disabled, no PulseAudio connection: {exc!r}")
+        return NullBackend()
+
+
+class VolumeController:
+    """Applies duck() and restore() in order on a worker thread.
+
+    A ramp gives way to whatever's queued after it: the level goes straight to
+    the ramp's target, and the next change starts from there.
+    """
+
+    def __init__(
+        self, backend: Callable[[], Backend] = default_backend, ramp_s: float = 0.0
+    ):
+        self.ramp_s = ramp_s
+        self.applied = 0
+        self._make_backend = backend
+        self._prev_level: float | None = None
+        self._ids = itertools.count()
+        self._latest_id = -1
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def duck(self, factor: float = 0.3, ramp_s: float | None = None) -> None:
+        """Lower the volume to *factor* (0–1) of what it is now. Returns at once."""
+        self._submit("duck", factor, ramp_s)
+
+    def restore(self, ramp_s: float | None = None) -> None:
+        """Put the volume back to where the last duck() found it. Returns at once."""
+        self._submit("restore", None, ramp_s)
+
+    def _submit(self, action: str, factor, ramp_s: float | None) -> None:
+        self._latest_id = change_id = next(self._ids)
+        ramp_s = self.ramp_s if ramp_s is None else ramp_s
+        self._queue.put((change_id, action, factor, ramp_s))
+
+    def flush(self) -> None:
+        """Wait until everything queued so far has been applied."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        try:
+            backend = self._make_backend()
+        except Exception as exc:
+            print(f"Volume ducking disabled: {exc!r}")
+            backend = NullBackend()
+        while (item := self._queue.get()) is not None:
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            try:
+                self._apply(backend, *item)
+            except Exception as exc:
+                print(f"Volume {item[1]} failed: {exc!r}")
+            self.applied += 1
+
+    def _apply(
+        self, backend: Backend, change_id: int, action: str, factor, ramp_s: float
+    ) -> None:
+        if action == "duck":
+            level = backend.get_level()
+            # Ducking again before a restore keeps the level from before the first
+            if self._prev_level is None:
+                self._prev_level = level
+            target = self._prev_level * factor
+        elif self._prev_level is None:
+            return
+        else:
+            target, self._prev_level = self._prev_level, None
+            level = backend.get_level() if ramp_s > 0 else target
+
+        if ramp_s > 0:
+            started_at = perf_counter()
+            while (t := (perf_counter() - started_at) / ramp_s) < 1:
+                if self._latest_id != change_id:
+                    break  # Another change is queued
+                backend.set_level(level + (target - level) * t)
+                time.sleep(RAMP_STEP_S)
+        backend.set_level(target)
+
+
+_controller: VolumeController | None = None
+_controller_lock = threading.Lock()
+
+
+def get_controller() -> VolumeController:
+    """The shared controller, started on first use."""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = VolumeController(ramp_s=ramp_s)
+        return _controller
+
+
+def use_backend(backend: Callable[[], Backend]) -> VolumeController:
+    """Replace the shared controller with one using *backend* (e.g. for replays)."""
+    global _controller
+    with _controller_lock:
+        if _controller is not None:
+            _controller.close()
+        _controller = VolumeController(backend, ramp_s=ramp_s)
+        return _controller
+
+
+@atexit.register
+def _close() -> None:
+    # Drain the queue, so a restore queued just before exit isn't lost
+    if _controller is not None:
+        _controller.close()
 
 
 def duck(factor: float = 0.3) -> None:
-    """Lower the current system volume by *factor* (0–1) and remember it."""
-    global _prev_level
-    current = get_level()
-    _prev_level = current
-    set_level(current * factor)
+    """Lower the system volume to *factor* (0–1) of its level, in the background."""
+    get_controller().duck(factor)
 
 
 def restore() -> None:
-    """Restore volume to the level captured by the last :pyfunc:`duck`."""
-    if _prev_level is not None:
-        set_level(_prev_level)
+    """Restore the volume captured by the last :pyfunc:`duck`, in the background."""
+    get_controller().restore()
 
 
 if __name__ == "__main__":